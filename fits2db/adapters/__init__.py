@@ -1,24 +1,44 @@
 """
 This module provides the DBWriter class, which manages database operations
-for FITS files using a configurable loader such as MySQL. It supports operations
-like upsert, update, and database cleaning.
+for FITS files using a configurable loader such as MySQL, PostgreSQL or SQLite,
+or a Parquet dataset. It supports
+operations like upsert, update, reading and database cleaning.
 
 Classes:
     DBWriter: Handles database operations for FITS files based on the provided configuration.
+    FileBatch: One transaction shared by the loaders of several files.
 """
 
 import logging
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Union
 
 from pandas import DataFrame
+from sqlalchemy.exc import SQLAlchemyError
 
 from ..config.config_model import ConfigType
 from ..fits import FitsFile
+from ..rollup import (
+    AGGREGATES,
+    STATE_AGGREGATE,
+    combine_rollup,
+    rollup_table,
+)
+from .base import BaseLoader, DateLike, FileBatch
 from .mysql import MySQL
+from .parquet import Parquet
+from .postgresql import PostgreSQL
+from .sqlite import SQLite
 
 # Use the configured log
 log = logging.getLogger("fits2db")
 
+LOADERS = {
+    "mysql": MySQL,
+    "parquet": Parquet,
+    "postgresql": PostgreSQL,
+    "sqlite": SQLite,
+}
+
 
 class DBWriter:
     """
@@ -28,46 +48,88 @@ class DBWriter:
         file (FitsFile): FITS file to be processed.
         config (ConfigType): Configuration settings for the database.
         db_type (Optional[str]): The type of database (e.g., "mysql").
-        loader (Optional[MySQL]): The database loader instance.
+        bulk_load (bool): Whether the loader is used for an initial bulk load.
+        batch (Optional[FileBatch]): The batch the file is loaded in.
+        loader (Optional[BaseLoader]): The database loader instance.
     """
 
-    def __init__(self, config: ConfigType, file: FitsFile = None) -> None:
+    def __init__(
+        self,
+        config: ConfigType,
+        file: FitsFile = None,
+        bulk_load: bool = False,
+        batch: Optional[FileBatch] = None,
+    ) -> None:
         """
         Initializes the DBWriter class.
 
         Args:
             config (ConfigType): Configuration settings for the database.
             file (FitsFile): FITS file to be processed.
+            bulk_load (bool): Whether the loader is used for an initial bulk
+                load, e.g. during build.
+            batch (Optional[FileBatch]): Loads the file in the transaction of
+                the batch, see `begin_batch`.
         """
         log.debug("Initializing DBWriter.")
         self.file: FitsFile = file
         self.config: ConfigType = config
+        self.bulk_load = bulk_load
+        self.batch = batch
         self.db_type: Optional[str] = None
         self.loader = self._load_db()
+        if self.loader is not None:
+            self.loader.batch = batch
         log.info("DBWriter initialized successfully.")
 
-    def _get_loader(self) -> Optional[MySQL]:
+    @property
+    def supports_file_batches(self) -> bool:
+        """Whether several files can be loaded in one `FileBatch`."""
+        return bool(self.loader and self.loader.supports_file_batches)
+
+    def begin_batch(self) -> FileBatch:
+        """
+        Returns a batch committing the files loaded in it together.
+
+        Pass the batch to the DBWriter of every file and use it as context
+        manager, the files are committed when it exits. Each file is loaded
+        in its own savepoint, a failing file does not abort the batch.
+
+        Returns:
+            FileBatch: The batch, not begun yet.
+
+        Raises:
+            ValueError: If the loader does not support file batches.
+        """
+        if not self.loader:
+            raise ValueError("Loader is not initialized.")
+        return FileBatch(self.loader)
+
+    def _get_loader(self) -> Optional[BaseLoader]:
         """
         Returns the database loader based on the configuration.
 
         Returns:
-            Optional[MySQL]: An instance of the MySQL loader if the
-                    database type is MySQL, otherwise None.
+            Optional[BaseLoader]: An instance of the loader registered for the
+                    database type in LOADERS, otherwise None.
         """
         log.debug("Getting database loader for type: %s", self.db_type)
-        if self.db_type and self.db_type.lower() == "mysql":
-            log.info("MySQL loader created.")
-            return MySQL(self.config, self.file)
+        loader_class = (
+            LOADERS.get(self.db_type.lower()) if self.db_type else None
+        )
+        if loader_class is not None:
+            log.info(f"{loader_class.__name__} loader created.")
+            return loader_class(self.config, self.file, self.bulk_load)
 
-        log.debug("No loader created. Database type is not MySQL.")
+        log.debug("No loader created. Database type is not supported.")
         return None
 
-    def _load_db(self) -> Optional[MySQL]:
+    def _load_db(self) -> Optional[BaseLoader]:
         """
         Loads the database type from the configuration and initializes the loader.
 
         Returns:
-            Optional[MySQL]: An instance of the loader based on the database type.
+            Optional[BaseLoader]: An instance of the loader based on the database type.
         """
         try:
             self.db_type = self.config["database"]["type"]
@@ -115,6 +177,97 @@ class DBWriter:
         except Exception as e:
             log.error(f"Error during upsert operation: {e}")
 
+    def file_ranges(
+        self, table: str, file_ids: Optional[List[int]] = None
+    ) -> DataFrame:
+        """
+        Returns the first and last timestamp each file wrote to a table.
+
+        Args:
+            table (str): The name of the table.
+            file_ids (Optional[List[int]]): Ids of the files in FITS2DB_META,
+                all files if None.
+
+        Returns:
+            DataFrame: One row per file with `file_meta_id`, `start` and `end`.
+
+        Raises:
+            ValueError: If the loader is not initialized.
+        """
+        if not self.loader:
+            raise ValueError("Loader is not initialized.")
+        return self.loader.file_ranges(table, file_ids)
+
+    def table_columns(self, table: str) -> Optional[List[str]]:
+        """
+        Returns the columns of a table in the database.
+
+        Args:
+            table (str): The name of the table.
+
+        Returns:
+            Optional[List[str]]: The lower case column names, None if the
+                table does not exist.
+
+        Raises:
+            ValueError: If the loader is not initialized.
+        """
+        if not self.loader:
+            raise ValueError("Loader is not initialized.")
+        table = str.lower(table)
+        if not self.loader.check_table_exists(table):
+            return None
+        return [
+            str.lower(column)
+            for column in self.loader._fetch_column_details(table)
+        ]
+
+    def enums(self, table: str) -> DataFrame:
+        """
+        Returns the labels of the codes stored in the enum columns of a table.
+
+        Args:
+            table (str): The name of the table.
+
+        Returns:
+            DataFrame: One row per code with `column_name`, `label` and `code`.
+
+        Raises:
+            ValueError: If the loader is not initialized.
+        """
+        if not self.loader:
+            raise ValueError("Loader is not initialized.")
+        return self.loader.get_enums(table)
+
+    def evolve_schema(
+        self, tables: Dict[str, List[DataFrame]]
+    ) -> Dict[str, List[str]]:
+        """
+        Applies the union schema of the files of a run, see
+        `BaseLoader.evolve_schema`.
+
+        A failure is logged, the columns are then added by the files that
+        bring them.
+
+        Args:
+            tables (Dict[str, List[DataFrame]]): Per table the schema frames
+                of the files that shape it, see `fits2db.plan.union_schema`.
+
+        Returns:
+            Dict[str, List[str]]: The added columns per altered table.
+        """
+        if not self.loader:
+            log.error("Loader is not initialized.")
+            return {}
+        try:
+            with self.loader.unit_of_work():
+                return self.loader.evolve_schema(tables)
+        except SQLAlchemyError as e:
+            log.error(f"Error while evolving the schema: {e}")
+            return {}
+        finally:
+            self.loader.close_connection()
+
     def upsert(self) -> None:
         """
         Inserts or updates data in the database.
@@ -122,7 +275,11 @@ class DBWriter:
         log.debug("Starting upsert operation.")
         try:
             if self.loader:
-                self.loader.upload_file()
+                try:
+                    with self.loader.unit_of_work(), self.loader.savepoint():
+                        self.loader.upload_file()
+                finally:
+                    self.loader.release_memory()
                 log.info("Upsert operation completed successfully.")
                 self.loader.close_connection()
                 log.info("Connection closed")
@@ -138,7 +295,11 @@ class DBWriter:
         log.debug("Starting update operation.")
         try:
             if self.loader:
-                self.loader.update_file()
+                try:
+                    with self.loader.unit_of_work(), self.loader.savepoint():
+                        self.loader.update_file()
+                finally:
+                    self.loader.release_memory()
                 log.info("Update operation completed successfully.")
                 self.loader.close_connection()
                 log.info("Connection closed")
@@ -146,3 +307,66 @@ class DBWriter:
                 log.error("Loader is not initialized.")
         except Exception as e:
             log.error(f"Error during update operation: {e}")
+
+    def read(
+        self,
+        table: str,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        columns: Optional[List[str]] = None,
+        chunksize: Optional[int] = None,
+        date_column: str = "timestamp",
+        resolution: Optional[str] = None,
+    ) -> Union[DataFrame, Iterator[DataFrame]]:
+        """
+        Reads the rows of a table between two dates, see `BaseLoader.read_table`.
+
+        With a `resolution` the rollup of the table is read instead and the
+        rollup rows of all files are combined per bucket, see `fits2db.rollup`.
+        A requested column is read with its aggregates, or its last value if
+        it is not numeric.
+
+        Args:
+            table (str): The name of the table to read.
+            start (Optional[DateLike]): Lower bound of the date column, inclusive.
+            end (Optional[DateLike]): Upper bound of the date column, inclusive.
+            columns (Optional[List[str]]): Columns to read, all if None.
+            chunksize (Optional[int]): Maximum number of rows per chunk.
+            date_column (str): Column the date range applies to.
+            resolution (Optional[str]): Rollup resolution to read, e.g. `hour`.
+
+        Returns:
+            Union[DataFrame, Iterator[DataFrame]]: The rows as a single
+                DataFrame, or an iterator of DataFrames if `chunksize` is set.
+
+        Raises:
+            ValueError: If the loader is not initialized, a column does not
+                exist or a rollup is read in chunks.
+        """
+        if not self.loader:
+            raise ValueError("Loader is not initialized.")
+        log.debug(f"Reading {table} between {start} and {end}")
+        if resolution is None:
+            return self.loader.read_table(
+                table, start, end, columns, chunksize, date_column
+            )
+        if chunksize is not None:
+            raise ValueError("Rollups can not be read in chunks.")
+        name = rollup_table(table, resolution)
+        if columns is not None:
+            available = self.table_columns(name) or []
+            names = []
+            for column in map(str.lower, columns):
+                if column == date_column:
+                    continue
+                # Columns that are not numeric only have their last value
+                state = f"{column}_{STATE_AGGREGATE}"
+                if state in available:
+                    names.append(state)
+                else:
+                    names.extend(
+                        f"{column}_{aggregate}" for aggregate in AGGREGATES
+                    )
+            columns = names
+        df = self.loader.read_table(name, start, end, columns)
+        return combine_rollup(df)
@@ -7,24 +7,235 @@ operations such as dropping tables and upserting data.
 
 Classes:
     BaseLoader: An abstract base class for writing data from FITS files into a database.
+    FileBatch: One transaction shared by the loaders of several files.
+    UnitOfWork: The pinned connection and cached table existence of one file.
 """
 
+import hashlib
 import logging
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
-from sqlalchemy import engine, MetaData, Table, text, inspect, delete
+from sqlalchemy import engine, MetaData, Table, text, inspect, delete, insert, func, or_
+from sqlalchemy.engine import Connection
+from sqlalchemy import SmallInteger
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.sql import select
+from sqlalchemy.sql import column as column_clause, table as table_clause
 from sqlalchemy.exc import SQLAlchemyError
 
 from ..config.config_model import ConfigType
-from ..fits.fits import FitsFile
-from .meta import Base, Fits2DbMeta, Fits2DbTableMeta
+from ..fits.fits import FitsFile, FitsTable
+from ..memory import estimate_table_bytes, governor
+from ..profiling import profiler
+from ..rollup import RESOLUTIONS, combine_rollup, compute_rollup, rollup_table
+from .meta import Base, Fits2DbEnum, Fits2DbMeta, Fits2DbTableMeta, Fits2DbHeader
 
 log = logging.getLogger("fits2db")
 
+DateLike = Union[str, datetime, pd.Timestamp]
+
+# Row number of a row in its FITS table, unique per file with file_meta_id
+ROW_ORDINAL = "row_ordinal"
+
+# Column type of uint8 columns such as enum codes, TINYINT where available
+TINYINT_TYPE = SmallInteger().with_variant(
+    mysql.TINYINT(unsigned=True), "mysql", "mariadb"
+)
+
+
+def hash_header(meta: pd.DataFrame) -> str:
+    """
+    Computes a stable hash over the keyword/value pairs of a FITS header.
+
+    Args:
+        meta (pd.DataFrame): Header cards with the columns `keyword` and `value`.
+
+    Returns:
+        str: SHA-256 hex digest of the header cards.
+    """
+    digest = hashlib.sha256()
+    for keyword, value in zip(meta["keyword"], meta["value"]):
+        digest.update(f"{keyword}\x1f{value}\x1e".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def select_columns(
+    available: List[str], columns: Optional[List[str]], date_column: str
+) -> List[str]:
+    """
+    Resolves the requested columns of a read against the columns of a table.
+
+    Args:
+        available (List[str]): Columns of the table.
+        columns (Optional[List[str]]): Requested columns, all if None.
+        date_column (str): Column that is always read.
+
+    Returns:
+        List[str]: The lower case column names to read, starting with the date column.
+
+    Raises:
+        ValueError: If a requested column or the date column does not exist.
+    """
+    if columns is None:
+        names = list(available)
+    else:
+        names = [date_column] + [
+            str.lower(column)
+            for column in columns
+            if str.lower(column) != date_column
+        ]
+    names = list(dict.fromkeys(names))
+    missing = [
+        name
+        for name in dict.fromkeys([date_column] + names)
+        if name not in available
+    ]
+    if missing:
+        raise ValueError(f"Unknown columns: {', '.join(missing)}")
+    return names
+
+
+def clean_column_names(columns: List[str]) -> List[str]:
+    """
+    Returns the column names as they are stored in the database.
+
+    Characters other than letters, digits, spaces and underscores are
+    removed, spaces become underscores and repeated names get the suffixes
+    `_1`, `_2`, ... in order of appearance.
+
+    Args:
+        columns (List[str]): Column names of a FITS table.
+
+    Returns:
+        List[str]: The cleaned column names.
+    """
+    names = [
+        "".join(c for c in column if c.isalnum() or c in " _").replace(" ", "_")
+        for column in columns
+    ]
+    seen: Dict[str, int] = {}
+    for position, name in enumerate(names):
+        if name in seen:
+            seen[name] += 1
+            names[position] = f"{name}_{seen[name]}"
+        else:
+            seen[name] = 0
+    return names
+
+
+def encode_enums(
+    data: pd.DataFrame, enums: List[Dict[str, Any]]
+) -> pd.DataFrame:
+    """
+    Replaces the string values of enum columns with their uint8 codes.
+
+    Labels are matched case insensitive and without surrounding spaces.
+    Only the distinct values of a column are looked up, the codes are then
+    spread to all rows with one `take`. Missing and unknown values get the
+    default code of the enum.
+
+    Args:
+        data (pd.DataFrame): Prepared data with lower case column names.
+        enums (List[Dict[str, Any]]): The `enums` of the table config.
+
+    Returns:
+        pd.DataFrame: The data with the enum columns encoded.
+    """
+    for enum in enums:
+        codes = {
+            str.lower(label.strip()): code
+            for label, code in enum["values"].items()
+        }
+        default = enum.get("default", 0)
+        for column in map(str.lower, enum["columns"]):
+            if column not in data.columns:
+                continue
+            values = data[column]
+            if values.dtype == np.uint8:
+                continue
+            positions, uniques = pd.factorize(values, use_na_sentinel=True)
+            labels = [
+                str.lower(
+                    value.decode() if isinstance(value, bytes) else str(value)
+                ).strip()
+                for value in uniques
+            ]
+            unknown = [label for label in labels if label not in codes]
+            if unknown:
+                log.warning(
+                    f"Unknown values {unknown} in enum column {column}, "
+                    f"stored as {default}"
+                )
+            lookup = np.array(
+                [codes.get(label, default) for label in labels] + [default],
+                dtype=np.uint8,
+            )
+            # The sentinel -1 of missing values picks the appended default
+            data[column] = lookup.take(positions)
+    return data
+
+
+def prepare_dataframe(
+    data: pd.DataFrame,
+    date_column: Optional[str],
+    enums: Optional[List[Dict[str, Any]]] = None,
+) -> pd.DataFrame:
+    """
+    Prepares the extracted data of a table for the database.
+
+    The column names are cleaned, the date column is parsed and copied to
+    `timestamp` and the enum columns are encoded.
+
+    Args:
+        data (pd.DataFrame): The extracted data with lower case column names.
+        date_column (Optional[str]): The `date_column` of the table config.
+        enums (Optional[List[Dict[str, Any]]]): The `enums` of the table config.
+
+    Returns:
+        pd.DataFrame: The prepared data.
+
+    Raises:
+        ValueError: If the date column can not be parsed.
+    """
+    data.columns = clean_column_names(data.columns)
+    if date_column is not None:
+        if date_column in data.columns:
+            # data = data.rename(columns={date_column: 'timestamp'})
+            data[date_column] = pd.to_datetime(data[date_column]) # FIX TIMESTAMP setting
+            data.dropna(subset=[date_column], inplace=True)
+            data['timestamp'] = data[date_column] # FIX TIMESTAMP setting
+    if enums:
+        data = encode_enums(data, enums)
+    return data
+
+
+def union_frame(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Combines frames without rows into one with the columns of all frames.
+
+    The columns keep the order of their first appearance and the dtype of
+    the first frame with the column.
+
+    Args:
+        frames (List[pd.DataFrame]): The frames, e.g. schema frames of files.
+
+    Returns:
+        pd.DataFrame: A frame without rows.
+    """
+    dtypes: Dict[str, Any] = {}
+    for frame in frames:
+        for column, dtype in frame.dtypes.items():
+            dtypes.setdefault(column, dtype)
+    return pd.DataFrame(
+        {column: pd.Series(dtype=dtype) for column, dtype in dtypes.items()}
+    )
+
 
 class BaseLoader(ABC):
     """
@@ -38,10 +249,39 @@ class BaseLoader(ABC):
         session (Session): SQLAlchemy session object for database transactions.
         new_file (Fits2DbMeta): Metadata object for the FITS file.
         db_table_names (set): Set of table names currently in the database.
+        to_sql_options (Dict[str, Any]): Additional keyword arguments passed to
+            `DataFrame.to_sql` when writing the temporary tables.
+        supports_file_batches (bool): Whether the schema changes of the
+            database are transactional, so several files can share one
+            `FileBatch`.
+        batch (Optional[FileBatch]): The batch the file is loaded in.
+        unit (Optional[UnitOfWork]): The unit of work of the file being
+            loaded, see `unit_of_work`.
+        merge_mode (str): The `merge_mode` of the config. With `update` or
+            `ignore` the rows get a `row_ordinal` and the data tables a
+            unique key on (file_meta_id, row_ordinal), rows whose key exists
+            are updated or skipped instead of inserted again.
+        supports_file_partitions (bool): Whether the data tables can be
+            LIST partitioned by `file_meta_id`.
+        partition_by_file (bool): Whether new data tables get one partition
+            per file, replacing or removing the rows of a file then empties
+            or drops its partition instead of deleting rows.
+        deferred_partitions (List[Tuple[str, int]]): Partitions of removed
+            rows, dropped once the file is committed, see
+            `drop_deferred_partitions`.
     """
 
+    to_sql_options: Dict[str, Any] = {}
+    supports_file_batches = False
+    supports_file_partitions = False
+
     def __init__(
-        self, db_url: str, engine: engine, config: ConfigType, file: FitsFile
+        self,
+        db_url: str,
+        engine: engine,
+        config: ConfigType,
+        file: FitsFile,
+        bulk_load: bool = False,
     ):
         """
         Initializes the BaseLoader with the given database URL, engine, configuration, and FITS file.
@@ -51,65 +291,631 @@ class BaseLoader(ABC):
             engine (engine.Engine): The SQLAlchemy engine for the database.
             config (ConfigType): Configuration data for loading tables from the FITS file.
             file (FitsFile): The FITS file object containing data to be loaded.
+            bulk_load (bool): Whether the loader is used for an initial bulk
+                load, e.g. during build, and may trade durability for speed.
         """
         self.db_url = db_url
         self.engine = engine
         self.config = config
         self.file = file
+        self.bulk_load = bulk_load
+        self.reserved_memory = 0
+        self.chunk_rollups: Dict[str, pd.DataFrame] = {}
+        self.batch: Optional["FileBatch"] = None
+        self.unit: Optional["UnitOfWork"] = None
+        self.merge_mode = config["fits_files"].get("merge_mode") or "append"
+        self.reused_file_meta = False
+        self.deferred_partitions: List[Tuple[str, int]] = []
+        self.partition_by_file = self.supports_file_partitions and bool(
+            config["database"].get("partition_by_file")
+        )
+
+    @property
+    def row_keys(self) -> bool:
+        """Whether the rows are merged on their row key."""
+        return self.merge_mode != "append"
 
     @abstractmethod
     def create_db_url(self) -> str:
         pass
 
+    @abstractmethod
+    def check_table_exists(self, table_name: str) -> bool:
+        """
+        Checks if a table exists in the database.
+
+        Args:
+            table_name (str): The name of the table to check.
+
+        Returns:
+            bool: True if the table exists, False otherwise.
+        """
+
+    @abstractmethod
+    def rename_table(self, old_name: str, new_name: str) -> None:
+        """
+        Renames a table in the database and adds an auto-incrementing primary key `id`.
+
+        Args:
+            old_name (str): The current name of the table.
+            new_name (str): The new name for the table.
+        """
+
+    def quote(self, name: str) -> str:
+        """
+        Quotes an identifier for the dialect of the database.
+
+        Args:
+            name (str): Table or column name.
+
+        Returns:
+            str: The quoted identifier.
+        """
+        return self.engine.dialect.identifier_preparer.quote(name)
+
+    def _pinned_connection(self) -> Optional[Connection]:
+        """The connection of the unit of work or file batch, if any."""
+        if self.unit is not None:
+            return self.unit.connection
+        if self.batch is not None:
+            return self.batch.connection
+        return None
+
+    @contextmanager
+    def connect(self) -> Iterator[Connection]:
+        """
+        Yields a connection, the pinned one of the unit of work or file
+        batch if there is one.
+
+        Like closing a connection, leaving the block rolls back a
+        transaction begun in it and not committed, except in a file batch.
+        """
+        conn = self._pinned_connection()
+        if conn is None:
+            with self.engine.connect() as conn:
+                yield conn
+            return
+        began = conn.in_transaction()
+        try:
+            yield conn
+        finally:
+            if self.batch is None and not began and conn.in_transaction():
+                conn.rollback()
+
+    def begin_transaction(self, conn: Connection):
+        """Begins a transaction on a connection, a savepoint in a file batch."""
+        return conn.begin() if self.batch is None else conn.begin_nested()
+
+    @contextmanager
+    def begin(self) -> Iterator[Connection]:
+        """
+        Like `engine.begin()`, inside a file batch a savepoint is used.
+        """
+        if self._pinned_connection() is None:
+            with self.engine.begin() as conn:
+                yield conn
+            return
+        with self.connect() as conn, self.begin_transaction(conn):
+            yield conn
+
+    @contextmanager
+    def savepoint(self) -> Iterator[None]:
+        """
+        Isolates a step of a file batch, a failing step is rolled back
+        without aborting the other files. Does nothing outside a batch.
+        """
+        if self.batch is None:
+            yield
+        else:
+            with self.batch.connection.begin_nested():
+                yield
+
+    def unit_of_work(self) -> "UnitOfWork":
+        """
+        Returns a unit of work pinning one connection for the load of a file.
+
+        Returns:
+            UnitOfWork: The unit, use it as context manager.
+        """
+        return UnitOfWork(self)
+
+    def has_table(self, table_name: str) -> bool:
+        """
+        Like `check_table_exists`, but cached in a unit of work.
+
+        Args:
+            table_name (str): The name of the table to check.
+
+        Returns:
+            bool: True if the table exists, False otherwise.
+        """
+        if self.unit is None:
+            return self.check_table_exists(table_name)
+        return self.unit.table_exists(table_name)
+
+    def _set_table_exists(self, table_name: str, exists: Optional[bool]) -> None:
+        """Updates the cache of the unit of work, None forgets the table."""
+        if self.unit is None:
+            return
+        self.unit.columns.pop(table_name, None)
+        self.unit.partitioned.pop(table_name, None)
+        if exists is None:
+            self.unit.tables.pop(table_name, None)
+        else:
+            self.unit.tables[table_name] = exists
+
+    def _rename_table(self, old_name: str, new_name: str) -> None:
+        """
+        Renames a table with `rename_table` and updates the cache.
+
+        A new data table with a `row_ordinal` gets its row key.
+        """
+        row_key = self.row_keys and ROW_ORDINAL in self._fetch_column_details(
+            old_name
+        )
+        self.rename_table(old_name, new_name)
+        self._set_table_exists(old_name, False)
+        self._set_table_exists(new_name, True)
+        if row_key:
+            with self.begin() as conn:
+                self.create_row_key(conn, new_name)
+
+    def creates_partitions(self, table_name: str) -> bool:
+        """
+        Whether a new table is partitioned by file.
+
+        Only the configured data tables are, the rollup tables are small
+        and keep deleting the rows of a file.
+
+        Args:
+            table_name (str): The name of the new table.
+
+        Returns:
+            bool: True if the table gets one partition per file.
+        """
+        if not self.partition_by_file:
+            return False
+        return str.lower(table_name) in {
+            str.lower(table["name"]) for table in self.config["fits_files"]["tables"]
+        }
+
+    def is_partitioned(self, table_name: str) -> bool:
+        """
+        Like `check_partitioned`, but cached in a unit of work.
+
+        Args:
+            table_name (str): The name of the table to check.
+
+        Returns:
+            bool: True if the table is partitioned by file.
+        """
+        if not self.partition_by_file:
+            return False
+        table_name = str.lower(table_name)
+        if self.unit is not None and table_name in self.unit.partitioned:
+            return self.unit.partitioned[table_name]
+        partitioned = self.check_partitioned(table_name)
+        if self.unit is not None:
+            self.unit.partitioned[table_name] = partitioned
+        return partitioned
+
+    def check_partitioned(self, table_name: str) -> bool:
+        """
+        Checks if a table is partitioned by file.
+
+        Args:
+            table_name (str): The name of the table to check.
+
+        Returns:
+            bool: True if the table is partitioned by file.
+        """
+        return False
+
+    def add_file_partition(self, conn, table_name: str, file_id: int) -> None:
+        """
+        Adds the partition of a file to a partitioned table if it is missing.
+
+        Only called for partitioned tables, the loaders with
+        `supports_file_partitions` implement it.
+
+        Args:
+            conn: The connection or session to execute it with.
+            table_name (str): The name of the partitioned table.
+            file_id (int): Id of the file in FITS2DB_META.
+        """
+
+    def truncate_file_partition(self, conn, table_name: str, file_id: int) -> None:
+        """
+        Removes the rows of a file by emptying its partition.
+
+        Only called for partitioned tables, the loaders with
+        `supports_file_partitions` implement it.
+
+        Args:
+            conn: The connection or session to execute it with.
+            table_name (str): The name of the partitioned table.
+            file_id (int): Id of the file in FITS2DB_META.
+        """
+
+    def drop_file_partition(self, conn, table_name: str, file_id: int) -> None:
+        """
+        Removes the rows of a file by dropping its partition.
+
+        Only called for partitioned tables, the loaders with
+        `supports_file_partitions` implement it.
+
+        Args:
+            conn: The connection or session to execute it with.
+            table_name (str): The name of the partitioned table.
+            file_id (int): Id of the file in FITS2DB_META.
+        """
+
+    def prepare_file_partition(self, table_name: str, file_id: int) -> None:
+        """
+        Adds the partition of a file before its rows are merged.
+
+        MySQL commits the open transaction before a partition is added, so
+        it is added in its own transaction ahead of the merge.
+
+        Args:
+            table_name (str): The name of the data table.
+            file_id (int): Id of the file in FITS2DB_META.
+        """
+        if self.is_partitioned(table_name):
+            with self.begin() as conn:
+                self.add_file_partition(conn, table_name, file_id)
+
+    def discard_file_partitions(self, table_names: List[str], file_id: int) -> None:
+        """
+        Drops the partitions added for a file whose upload failed.
+
+        The partitions are empty. They are kept if the file continues the
+        row of a previous attempt, which owns the rows loaded then.
+
+        Args:
+            table_names (List[str]): The names of the data tables.
+            file_id (int): Id of the file in FITS2DB_META.
+        """
+        if self.reused_file_meta:
+            return
+        for table_name in table_names:
+            if self.is_partitioned(table_name):
+                with self.begin() as conn:
+                    self.drop_file_partition(conn, table_name, file_id)
+
+    def drop_deferred_partitions(self) -> None:
+        """
+        Drops the partitions of removed rows once the file is committed.
+
+        Without transactional schema changes, see `supports_file_batches`,
+        dropping a partition would commit the changes of a file halfway.
+        """
+        while self.deferred_partitions:
+            table_name, file_id = self.deferred_partitions.pop(0)
+            with self.begin() as conn:
+                self.drop_file_partition(conn, table_name, file_id)
+
+    def create_row_key(self, conn: Connection, table_name: str) -> None:
+        """
+        Adds the unique key on (file_meta_id, row_ordinal) to a data table.
+
+        Args:
+            conn (Connection): The connection to execute it with.
+            table_name (str): The name of the data table.
+        """
+        index_name = f"uq_{str.lower(table_name)}_row"
+        conn.execute(
+            text(
+                f"CREATE UNIQUE INDEX {self.quote(index_name)} "
+                f"ON {self.quote(table_name)} (file_meta_id, {ROW_ORDINAL})"
+            )
+        )
+        log.info(f"Added row key {index_name} to {table_name}")
+
+    def keyed_insert(
+        self, original_table: str, tmp_table: str, columns: List[str]
+    ) -> str:
+        """
+        Returns an INSERT ... SELECT that merges the rows on their row key.
+
+        Rows whose key exists are updated with `merge_mode` `update` and
+        skipped with `ignore`. PostgreSQL and SQLite use `ON CONFLICT`,
+        SQLite needs the `WHERE true` to parse it after a SELECT.
+
+        Args:
+            original_table (str): The name of the data table.
+            tmp_table (str): The name of the temporary table.
+            columns (List[str]): The columns to insert.
+
+        Returns:
+            str: The statement.
+        """
+        column_list = ", ".join(self.quote(column) for column in columns)
+        if self.merge_mode == "ignore":
+            action = "DO NOTHING"
+        else:
+            action = "DO UPDATE SET " + ", ".join(
+                f"{self.quote(column)} = excluded.{self.quote(column)}"
+                for column in columns
+                if column not in ("file_meta_id", ROW_ORDINAL)
+            )
+        return f"""
+        INSERT INTO {self.quote(original_table)} ({column_list})
+        SELECT {column_list}
+        FROM {self.quote(tmp_table)} WHERE true
+        ON CONFLICT (file_meta_id, {ROW_ORDINAL}) {action}
+        """
+
+    def alter_table_statements(
+        self, table_name: str, clauses: List[str]
+    ) -> List[str]:
+        """
+        Combines clauses like `ADD COLUMN ...` into ALTER TABLE statements.
+
+        Args:
+            table_name (str): The name of the table to alter.
+            clauses (List[str]): The clauses of the ALTER TABLE statement.
+
+        Returns:
+            List[str]: One statement with all clauses.
+        """
+        return [f"ALTER TABLE {self.quote(table_name)} {', '.join(clauses)}"]
+
+    def execute_alter(
+        self, conn: Connection, table_name: str, clauses: List[str]
+    ) -> None:
+        """
+        Executes the ALTER TABLE statements of `alter_table_statements`.
+
+        Args:
+            conn (Connection): The connection to execute them with.
+            table_name (str): The name of the table to alter.
+            clauses (List[str]): The clauses of the ALTER TABLE statement.
+        """
+        for alter_query in self.alter_table_statements(table_name, clauses):
+            conn.execute(text(alter_query))
+
+    def begin_batch(self, conn: Connection):
+        """
+        Begins the outer transaction of a file batch.
+
+        Args:
+            conn (Connection): The connection of the batch.
+
+        Returns:
+            The transaction of the batch.
+        """
+        return conn.begin()
+
     def db_session(self) -> Session:
         """
         Creates and returns a new SQLAlchemy session for the database.
 
+        Inside a file batch the session is bound to the connection of the
+        batch, its commits only release savepoints.
+
         Returns:
             Session: A new SQLAlchemy session object.
         """
-        Base.metadata.create_all(self.engine)
-        Session = sessionmaker(bind=self.engine)
-        return Session()
+        if self.batch is None:
+            with self.engine.begin() as conn:
+                Base.metadata.create_all(conn)
+                self.migrate_meta(conn)
+        else:
+            Base.metadata.create_all(self.batch.connection)
+            self.migrate_meta(self.batch.connection)
+            return Session(
+                bind=self.batch.connection,
+                join_transaction_mode="create_savepoint",
+            )
+        Session_ = sessionmaker(bind=self.engine)
+        return Session_()
+
+    def migrate_meta(self, conn: Connection) -> None:
+        """
+        Migrates the metadata tables of a database built by an earlier version.
+
+        `create_all` does not add columns to existing tables. Before the
+        headers were shared through their hash, fits2db_table_meta had no
+        `header_hash` and the header of a table was kept in `<table>_meta`,
+        which only held the header of the last uploaded file. The column is
+        added and the header of each legacy table is copied into
+        fits2db_header and referenced from the latest file row of its table.
+        The legacy tables are left in place. Does nothing for a database
+        that is up to date.
+
+        Args:
+            conn (Connection): The connection to execute it with.
+        """
+        inspector = inspect(conn)
+        meta_table = Fits2DbTableMeta.__table__
+        columns = {
+            str.lower(column["name"])
+            for column in inspector.get_columns(meta_table.name)
+        }
+        if "header_hash" in columns:
+            return
+        self.execute_alter(
+            conn, meta_table.name, ["ADD COLUMN header_hash VARCHAR(64)"]
+        )
+        for index in meta_table.indexes:
+            if "header_hash" in index.columns:
+                index.create(conn)
+        log.info(f"Added header_hash to {meta_table.name}")
+
+        data_tables = {
+            str.lower(table["name"])
+            for table in self.config["fits_files"]["tables"]
+        }
+        with Session(bind=conn) as session:
+            for name in inspector.get_table_names():
+                tbl_name = str.lower(name)[: -len("_meta")]
+                if (
+                    not str.lower(name).endswith("_meta")
+                    or tbl_name not in data_tables
+                    or str.lower(name) in data_tables
+                ):
+                    continue
+                meta = pd.read_sql_table(name, con=conn)
+                meta.columns = map(str.lower, meta.columns)
+                latest = session.execute(
+                    select(func.max(Fits2DbTableMeta.id)).where(
+                        Fits2DbTableMeta.tablename == tbl_name
+                    )
+                ).scalar()
+                if meta.empty or latest is None:
+                    continue
+                (header_hash,) = self.write_headers([meta], session)
+                session.execute(
+                    Fits2DbTableMeta.__table__.update()
+                    .where(Fits2DbTableMeta.id == latest)
+                    .values(header_hash=header_hash)
+                )
+                log.warning(
+                    f"Copied the header of {name} into fits2db_header, "
+                    f"the table is no longer used and can be dropped"
+                )
+            session.flush()
 
     def write_file_meta(self, session: Session) -> None:
         """
         Writes metadata about the FITS file to the database.
+
+        The row is only flushed to get its id, it is committed together
+        with the table metadata of the file. When the rows are merged on
+        their row key, a retried upload continues with the row of the
+        previous attempt, so its rows get the same keys.
         """
         log.debug(f"Filepath {self.file.absolute_path.as_posix()}")
-        self.new_file = Fits2DbMeta(
-            filename=self.file.file_name,
-            filepath=self.file.absolute_path.as_posix(),
-            last_file_mutation=self.file.mdate,
-        )
-        session.add(self.new_file)
-        session.commit()
+        self.new_file = None
+        if self.row_keys:
+            self.new_file = (
+                session.query(Fits2DbMeta)
+                .filter_by(
+                    filepath=self.file.absolute_path.as_posix(),
+                    filename=self.file.file_name,
+                )
+                .first()
+            )
+        self.reused_file_meta = self.new_file is not None
+        if self.reused_file_meta:
+            self.new_file.last_file_mutation = self.file.mdate
+        else:
+            self.new_file = Fits2DbMeta(
+                filename=self.file.file_name,
+                filepath=self.file.absolute_path.as_posix(),
+                last_file_mutation=self.file.mdate,
+            )
+            session.add(self.new_file)
+        session.flush()
+
+    def discard_file_meta(self, session: Session) -> None:
+        """
+        Removes the FITS2DB_META row of a file whose upload failed.
+
+        Args:
+            session (Session): SQLAlchemy session object for database transactions.
+        """
+        session.rollback()
+        # The row of a previous attempt still owns the rows loaded then
+        if self.reused_file_meta:
+            return
+        if inspect(self.new_file).persistent:
+            session.delete(self.new_file)
+            session.commit()
 
     def write_table_meta(
-        self, tbl_name: str, df: pd.DataFrame, session: Session, file_id: int
+        self,
+        tables: List[Tuple[str, FitsTable]],
+        session: Session,
+        file_id: int,
     ) -> None:
         """
-        Writes metadata about a table in the FITS file to the database.
+        Writes metadata and headers of the uploaded tables of a file to the database.
+
+        Existing rows of the file are replaced with one bulk delete and one
+        bulk insert. Nothing is committed, so the metadata of a file is
+        written in the same transaction as its FITS2DB_META row.
 
         Args:
-            tbl_name (str): The name of the table.
-            df (pd.DataFrame): The DataFrame representing the table data.
+            tables (List[Tuple[str, FitsTable]]): Table names with the uploaded tables.
+            session (Session): SQLAlchemy session object for database transactions.
+            file_id (int): Id of the file in FITS2DB_META.
         """
-        rows, cols = df.shape
-        table = session.execute(select(Fits2DbTableMeta).filter_by(file_meta_id=file_id, tablename=tbl_name)).scalar_one_or_none()
-        if table is None:
-            new_table = Fits2DbTableMeta(
-                file_meta_id=file_id,
-                tablename=str.lower(tbl_name),
-                record_count=rows,
-                column_count=cols,
+        if not tables:
+            return
+        header_hashes = self.write_headers(
+            [table.meta for _, table in tables], session
+        )
+        table_names = [str.lower(tbl_name) for tbl_name, _ in tables]
+        session.execute(
+            delete(Fits2DbTableMeta).where(
+                Fits2DbTableMeta.file_meta_id == file_id,
+                Fits2DbTableMeta.tablename.in_(table_names),
             )
-            session.add(new_table)
-        else:
-            table.record_count = rows
-            table.column_count = cols
-            table.tablename = str.lower(tbl_name)
-        session.commit()
+        )
+        rows = []
+        for tbl_name, (_, table), header_hash in zip(
+            table_names, tables, header_hashes
+        ):
+            record_count = table.n_rows
+            column_count = len(table.data.columns)
+            rows.append(
+                {
+                    "file_meta_id": file_id,
+                    "tablename": tbl_name,
+                    "record_count": record_count,
+                    "column_count": column_count,
+                    "header_hash": header_hash,
+                }
+            )
+        session.execute(insert(Fits2DbTableMeta), rows)
+        self.write_enums(table_names, session)
+
+    def write_headers(
+        self, metas: List[pd.DataFrame], session: Session
+    ) -> List[str]:
+        """
+        Stores header cards in the shared FITS2DB_HEADER table.
+
+        Headers whose hash is already stored are reused. All missing
+        headers are inserted with a single bulk insert.
+
+        Args:
+            metas (List[pd.DataFrame]): Header cards with the columns `keyword` and `value`.
+            session (Session): SQLAlchemy session object for database transactions.
+
+        Returns:
+            List[str]: Hash of each header, to be referenced from FITS2DB_TABLE_META.
+        """
+        header_hashes = [hash_header(meta) for meta in metas]
+        stored = set(
+            session.execute(
+                select(Fits2DbHeader.header_hash)
+                .where(Fits2DbHeader.header_hash.in_(set(header_hashes)))
+                .distinct()
+            ).scalars()
+        )
+        cards = []
+        for header_hash, meta in zip(header_hashes, metas):
+            if header_hash in stored:
+                continue
+            stored.add(header_hash)
+            cards.extend(
+                {
+                    "header_hash": header_hash,
+                    "card_index": index,
+                    "keyword": str(keyword),
+                    "value": str(value),
+                }
+                for index, (keyword, value) in enumerate(
+                    zip(meta["keyword"], meta["value"])
+                )
+            )
+        if cards:
+            session.execute(insert(Fits2DbHeader), cards)
+            log.info(f"Stored {len(cards)} new header cards")
+        return header_hashes
 
         # with self.engine.connect() as conn:
             # transaction = conn.begin()
@@ -134,25 +940,22 @@ class BaseLoader(ABC):
     def drop_user_tables(self, session: Session) -> None:
         """
         Drops FITS2DB created data tables from the database if they exist.
+
+        Every table except the shared metadata tables of `meta` is dropped,
+        including temporary tables and the `<table>_meta` header tables of
+        earlier versions. The metadata rows are removed by
+        `delete_meta_tables`.
         """
         metadata = MetaData()
         metadata.reflect(bind=self.engine)
         log.info(metadata.tables)
         try:
-            # db_table_names = self.get_tables(session)
-            # Bugfix that no tables were found
-            db_table_names = set(metadata.tables.keys())
-            for table_name in db_table_names:
-                if table_name in metadata.tables:
-                    metadata.tables[table_name].drop(self.engine)
-                    log.info(f"Dropped table {table_name}")
-                if table_name + "_META" in metadata.tables:
-                    metadata.tables[table_name + "_META"].drop(self.engine)
-                    log.info(f"Dropped table {table_name+'_META'}")
-                if "TMP_" + table_name in metadata.tables:
-                    metadata.tables["TMP_" + table_name].drop(self.engine)
-                    log.info(f"Dropped table {'TMP_'+table_name}")
-
+            for table in reversed(metadata.sorted_tables):
+                if table.name in Base.metadata.tables:
+                    continue
+                # The partitions of a table are dropped with it
+                table.drop(self.engine, checkfirst=True)
+                log.info(f"Dropped table {table.name}")
         except SQLAlchemyError as e:
             log.error(f"An error occurred while dropping tables: {e}")
         finally:
@@ -166,6 +969,8 @@ class BaseLoader(ABC):
         try:
             session.query(Fits2DbTableMeta).delete()
             log.debug("Run delete stmt for Fits2DbTableMeta")
+            session.query(Fits2DbHeader).delete()
+            log.debug("Run delete stmt for Fits2DbHeader")
             session.query(Fits2DbMeta).delete()
             log.debug("Commit changes")
             session.commit()
@@ -181,7 +986,8 @@ class BaseLoader(ABC):
             meta = MetaData()
             meta.reflect(bind=self.engine)
             for tbl in reversed(meta.sorted_tables):
-                tbl.drop(self.engine)
+                # The partitions of a table are dropped with it
+                tbl.drop(self.engine, checkfirst=True)
 
     def get_fits2db_meta(self) -> pd.DataFrame:
         """
@@ -197,6 +1003,108 @@ class BaseLoader(ABC):
             log.error(err)
             raise
 
+    def get_enums(self, table_name: str) -> pd.DataFrame:
+        """
+        Returns the lookup of the enum columns of a table from FITS2DB_ENUM.
+
+        Args:
+            table_name (str): The name of the table.
+
+        Returns:
+            pd.DataFrame: One row per code with `column_name`, `label` and `code`.
+        """
+        stmt = select(
+            Fits2DbEnum.column_name, Fits2DbEnum.label, Fits2DbEnum.code
+        ).where(Fits2DbEnum.tablename == str.lower(table_name))
+        with self.engine.connect() as conn:
+            return pd.read_sql(stmt, conn)
+
+    def read_table(
+        self,
+        table_name: str,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        columns: Optional[List[str]] = None,
+        chunksize: Optional[int] = None,
+        date_column: str = "timestamp",
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+        """
+        Reads the rows of a table between two dates, ordered by the date column.
+
+        The query is built from the reflected table with bound parameters.
+        With a `chunksize` the rows are streamed with a server-side cursor
+        where the driver supports it, so only one chunk is held in memory.
+
+        Args:
+            table_name (str): The name of the table to read.
+            start (Optional[DateLike]): Lower bound of the date column, inclusive.
+            end (Optional[DateLike]): Upper bound of the date column, inclusive.
+            columns (Optional[List[str]]): Columns to read, the date column is
+                always included. All columns if None.
+            chunksize (Optional[int]): Maximum number of rows per chunk.
+            date_column (str): Column the date range applies to.
+
+        Returns:
+            Union[pd.DataFrame, Iterator[pd.DataFrame]]: The rows as a single
+                DataFrame, or an iterator of DataFrames if `chunksize` is set.
+
+        Raises:
+            ValueError: If the table has no column with one of the given names.
+        """
+        table = Table(str.lower(table_name), MetaData(), autoload_with=self.engine)
+        names = select_columns(list(table.columns.keys()), columns, date_column)
+        date = table.c[date_column]
+        stmt = select(*(table.c[name] for name in names)).order_by(date)
+        if start is not None:
+            stmt = stmt.where(date >= pd.Timestamp(start).to_pydatetime())
+        if end is not None:
+            stmt = stmt.where(date <= pd.Timestamp(end).to_pydatetime())
+        if chunksize is None:
+            with self.engine.connect() as conn:
+                return pd.read_sql(stmt, conn)
+        return self._read_chunks(stmt, chunksize)
+
+    def _read_chunks(self, stmt, chunksize: int) -> Iterator[pd.DataFrame]:
+        """Streams the result of a query in chunks of `chunksize` rows."""
+        with self.engine.connect() as conn:
+            conn = conn.execution_options(
+                stream_results=True, max_row_buffer=chunksize
+            )
+            yield from pd.read_sql(stmt, conn, chunksize=chunksize)
+
+    def file_ranges(
+        self,
+        table_name: str,
+        file_ids: Optional[List[int]] = None,
+        date_column: str = "timestamp",
+    ) -> pd.DataFrame:
+        """
+        Returns the first and last date of the rows each file wrote to a table.
+
+        Args:
+            table_name (str): The name of the table.
+            file_ids (Optional[List[int]]): Ids of the files in FITS2DB_META,
+                all files if None.
+            date_column (str): Column with the dates.
+
+        Returns:
+            pd.DataFrame: One row per file with `file_meta_id`, `start` and `end`.
+        """
+        table = Table(str.lower(table_name), MetaData(), autoload_with=self.engine)
+        date = table.c[date_column]
+        stmt = select(
+            table.c.file_meta_id,
+            func.min(date).label("start"),
+            func.max(date).label("end"),
+        ).group_by(table.c.file_meta_id)
+        if file_ids is not None:
+            stmt = stmt.where(table.c.file_meta_id.in_(list(file_ids)))
+        with self.engine.connect() as conn:
+            df = pd.read_sql(stmt, conn)
+        df["start"] = pd.to_datetime(df["start"])
+        df["end"] = pd.to_datetime(df["end"])
+        return df
+
     def upload_file(self) -> None:
         """
         Upserts the FITS file and its tables into the database.
@@ -216,27 +1124,27 @@ class BaseLoader(ABC):
                 log.info(table_name)
                 log.info(table["ingest_all_columns"])
                 try:
-                    df = self.file.get_table(table_name)
                     table_name = str.lower(table_name)
-                    df.data["FILE_META_ID"] = self.new_file.id
-                    df.data.columns = map(str.lower, df.data.columns) # change to lower
-                    df.meta.columns = map(str.lower, df.meta.columns) # change to lower
                     date_column = table["date_column"]
                     try:
-                        df.data = self._prepare_dataframe(df.data, date_column)
+                        df = self.stage_table(table, self.new_file.id)
                     except ValueError:
                         faulty_tables.append((table_name, date_column))
                         continue
 
-                    self.upsert_data_table(table_name, df.data)
-                    if self.check_table_exists(table_name):
-                        source_table_details = self._fetch_column_details('tmp_' + table_name)
-                        target_table_details = self._fetch_column_details(table_name)
-                        source_table_details = {k.lower(): v for k, v in source_table_details.items()}
-                        new_columns = self._add_missing_columns(
-                            source_table_details, table_name, target_table_details
-                        )
-
+                    with profiler.stage(
+                        "ddl", file=self.file.file_name, table=table_name
+                    ):
+                        table_exists = self.has_table(table_name)
+                        if table_exists:
+                            source_table_details = self._fetch_column_details('tmp_' + table_name)
+                            target_table_details = self._fetch_column_details(table_name)
+                            source_table_details = {k.lower(): v for k, v in source_table_details.items()}
+                            new_columns = self._add_missing_columns(
+                                source_table_details, table_name, target_table_details
+                            )
+                            self.prepare_file_partition(table_name, self.new_file.id)
+                    if table_exists:
                         updated_tables.append((table_name, df, new_columns))
                     else:
                         new_tables.append((table_name, df))
@@ -253,16 +1161,22 @@ class BaseLoader(ABC):
                         f'Error while parsing datetime column {date_column} in table {table_name}'
                     )
                 self._delete_columns(updated_tables)
-                session.delete(self.new_file)
-                session.commit()
+                self.discard_file_partitions(
+                    [table for table, *_ in updated_tables], self.new_file.id
+                )
+                self.discard_file_meta(session)
                 for table, df, new_columns in updated_tables: 
                     self.drop_table('tmp_' + table)
                 return
-            with self.engine.connect() as conn:
-                transaction = conn.begin()
+            with self.connect() as conn:
+                transaction = self.begin_transaction(conn)
                 try: 
                     for table, df, new_columns in updated_tables: 
-                        self.merge_tables(table, 'tmp_' + table, conn)
+                        with profiler.stage(
+                            "merge_tables", file=self.file.file_name, table=table
+                        ) as stage:
+                            self.merge_tables(table, 'tmp_' + table, conn)
+                            stage.count(rows=df.n_rows)
                     transaction.commit()
                 except Exception as e:
                     transaction.rollback()  # Rollback the transaction on error
@@ -270,23 +1184,27 @@ class BaseLoader(ABC):
                     self._delete_columns(updated_tables)
                     log.error(f'Could not Upload {self.file.file_path}')
                     log.error(f"An error occurred: {e}")
-                    session.delete(self.new_file)
-                    session.commit()
+                    self.discard_file_partitions(
+                        [table for table, *_ in updated_tables], self.new_file.id
+                    )
+                    self.discard_file_meta(session)
                     for table, df, new_columns in updated_tables: 
                         self.drop_table('tmp_' + table)
                     return
-            for table, df, new_columns in updated_tables: 
-                self.drop_table('tmp_' + table)
-                self.update_table(str.lower(table) + "_meta", df.meta) # change to lower
-                self.write_table_meta(
-                    table, df.data, session, self.new_file.id
-                )
-            for table, df in new_tables: 
-                self.rename_table('tmp_' + table, table)
-                self.update_table(str.lower(table) + "_meta", df.meta) # change to lower
+            with profiler.stage("ddl", file=self.file.file_name):
+                for table, df, new_columns in updated_tables: 
+                    self.drop_table('tmp_' + table)
+                for table, df in new_tables: 
+                    self._rename_table('tmp_' + table, table)
+            for table, df in [(table, df) for table, df, _ in updated_tables] + new_tables:
+                self.write_rollups(table, df.data, self.new_file.id)
+            with profiler.stage("metadata", file=self.file.file_name):
                 self.write_table_meta(
-                    table, df.data, session, self.new_file.id
+                    [(table, df) for table, df, _ in updated_tables] + new_tables,
+                    session,
+                    self.new_file.id,
                 )
+                session.commit()
 
         # self.write_file_meta(session)
 
@@ -312,11 +1230,12 @@ class BaseLoader(ABC):
             Fits2DbTableMeta.file_meta_id == file_record.id
         )
         tables = {}
-        for table_meta in tables_to_delete:
-            tablename = table_meta.tablename
-            metadata = MetaData()
-            table = Table(tablename, metadata, autoload_with=self.engine)
-            tables[tablename] = table
+        with self.connect() as conn:
+            for table_meta in tables_to_delete:
+                tablename = table_meta.tablename
+                metadata = MetaData()
+                table = Table(tablename, metadata, autoload_with=conn)
+                tables[tablename] = table
         return tables
 
     def delete_file_from_table(self, session: Session, file_record: Fits2DbMeta, table: Table):
@@ -324,13 +1243,26 @@ class BaseLoader(ABC):
             Fits2DbTableMeta.file_meta_id == file_record.id, Fits2DbTableMeta.tablename == table.name
         )
         tables = {}
-        delete_stmt = table.delete().where(
-            table.c.file_meta_id == file_record.id # change to lowercase
-        )
-        session.execute(delete_stmt)
+        if self.is_partitioned(table.name) and self.supports_file_batches:
+            self.drop_file_partition(session, table.name, file_record.id)
+        elif self.is_partitioned(table.name):
+            self.deferred_partitions.append((table.name, file_record.id))
+        else:
+            delete_stmt = table.delete().where(
+                table.c.file_meta_id == file_record.id # change to lowercase
+            )
+            session.execute(delete_stmt)
         log.info(
             f"Deleted rows in table '{table.name}' where file_meta_id = {file_record.id}"
         )
+        for resolution in RESOLUTIONS:
+            rollup_name = rollup_table(table.name, resolution)
+            if self.has_table(rollup_name):
+                with self.connect() as conn:
+                    rollup = Table(rollup_name, MetaData(), autoload_with=conn)
+                session.execute(
+                    rollup.delete().where(rollup.c.file_meta_id == file_record.id)
+                )
         tables_to_delete.delete(synchronize_session=False)
         return tables
     
@@ -348,7 +1280,8 @@ class BaseLoader(ABC):
         for table_meta in tables_to_delete:
             tablename = table_meta.tablename
             metadata = MetaData()
-            table = Table(tablename, metadata, autoload_with=self.engine)
+            with self.connect() as conn:
+                table = Table(tablename, metadata, autoload_with=conn)
             delete_stmt = table.delete().where(
                 table.c.file_meta_id == file_record.id # change to lowercase
             )
@@ -367,7 +1300,6 @@ class BaseLoader(ABC):
             file_record = self.update_fits2db_meta(session)
             remaining_tables = self.get_current_file_tables(session, file_record)
             # self.update_fits2db_table(session, file_record)
-            session.commit()
             table_configs = self.config["fits_files"]["tables"]
             log.debug("Start upserting data")
             updated_tables = []
@@ -379,28 +1311,28 @@ class BaseLoader(ABC):
                 log.info(table_name)
                 log.info(table["ingest_all_columns"])
                 try:
-                    df = self.file.get_table(table_name)
                     table_name = str.lower(table_name)
-                    df.data["FILE_META_ID"] = file_record.id
-                    df.data.columns = map(str.lower, df.data.columns)
-                    df.meta.columns = map(str.lower, df.meta.columns)
                     date_column = table["date_column"]
                     try:
-                        df.data = self._prepare_dataframe(df.data, date_column)
+                        df = self.stage_table(table, file_record.id)
                     except ValueError as err:
                         faulty_tables.append((table_name, date_column))
                         continue
 
-                    self.upsert_data_table(table_name, df.data, file_record.id)
                     remaining_tables.pop(table_name, None)
-                    if self.check_table_exists(table_name):
-                        source_table_details = self._fetch_column_details('tmp_' + table_name)
-                        target_table_details = self._fetch_column_details(table_name)
-                        source_table_details = {k.lower(): v for k, v in source_table_details.items()}
-                        new_columns = self._add_missing_columns(
-                            source_table_details, table_name, target_table_details
-                        )
-
+                    with profiler.stage(
+                        "ddl", file=self.file.file_name, table=table_name
+                    ):
+                        table_exists = self.has_table(table_name)
+                        if table_exists:
+                            source_table_details = self._fetch_column_details('tmp_' + table_name)
+                            target_table_details = self._fetch_column_details(table_name)
+                            source_table_details = {k.lower(): v for k, v in source_table_details.items()}
+                            new_columns = self._add_missing_columns(
+                                source_table_details, table_name, target_table_details
+                            )
+                            self.prepare_file_partition(table_name, file_record.id)
+                    if table_exists:
                         updated_tables.append((table_name, df, file_record.id, new_columns))
                     else:
                         new_tables.append((table_name, df, file_record.id))
@@ -422,11 +1354,15 @@ class BaseLoader(ABC):
                     self.drop_table('tmp_' + table)
                 return
 
-            with self.engine.connect() as conn:
-                transaction = conn.begin()
+            with self.connect() as conn:
+                transaction = self.begin_transaction(conn)
                 try: 
                     for table, df, file_id, new_columns in updated_tables: 
-                        self.merge_tables(table, 'tmp_' + table, conn, file_id)
+                        with profiler.stage(
+                            "merge_tables", file=self.file.file_name, table=table
+                        ) as stage:
+                            self.merge_tables(table, 'tmp_' + table, conn, file_id)
+                            stage.count(rows=df.n_rows)
                     transaction.commit()
                 except Exception as e:
                     transaction.rollback()  # Rollback the transaction on error
@@ -436,27 +1372,389 @@ class BaseLoader(ABC):
                     for table, df, file_id, _ in updated_tables: 
                         self.drop_table('tmp_' + table)
                     return
-            for table, df, file_id, _ in updated_tables: 
-                self.drop_table('tmp_' + table)
+            with profiler.stage("ddl", file=self.file.file_name):
+                for table, df, file_id, _ in updated_tables: 
+                    self.drop_table('tmp_' + table)
+                for table, df, file_id in new_tables: 
+                    self._rename_table('tmp_' + table, table)
+            for table, df, *_ in updated_tables + new_tables:
+                self.write_rollups(table, df.data, file_record.id)
+            with profiler.stage("metadata", file=self.file.file_name):
                 self.write_table_meta(
-                    table, df.data, session, file_record.id
+                    [(table, df) for table, df, _, _ in updated_tables]
+                    + [(table, df) for table, df, _ in new_tables],
+                    session,
+                    file_record.id,
                 )
-                self.update_table(table + "_META", df.meta)
-            for table, df, file_id in new_tables: 
-                self.rename_table('tmp_' + table, table)
-                self.write_table_meta(
-                    table, df.data, session, file_record.id
+
+                if self.config['fits_files']['delete_rows_from_missing_tables']:
+                    for k, table in remaining_tables.items():
+                        self.delete_file_from_table(session, file_record, table)
+
+                file_record.last_file_mutation = self.file.mdate
+                session.commit()
+            self.drop_deferred_partitions()
+
+    def prepare_table(
+        self, df: FitsTable, table: Dict[str, Any], file_id: int
+    ) -> pd.DataFrame:
+        """
+        Prepares the data of an extracted table for the database.
+
+        Args:
+            df (FitsTable): The extracted table or a chunk of it.
+            table (Dict[str, Any]): The config of the table.
+            file_id (int): Id of the file in FITS2DB_META.
+
+        Returns:
+            pd.DataFrame: The prepared data.
+
+        Raises:
+            ValueError: If the date column can not be parsed.
+        """
+        table_name = str.lower(table["name"])
+        df.meta.columns = map(str.lower, df.meta.columns)
+        if df.prepared:
+            # Tables replayed from the spool are prepared already
+            df.data["file_meta_id"] = file_id
+            return self.add_row_ordinal(df.data)
+        df.data["FILE_META_ID"] = file_id
+        df.data.columns = map(str.lower, df.data.columns)
+        with profiler.stage(
+            "prepare_dataframe", file=self.file.file_name, table=table_name
+        ) as stage:
+            data = self._prepare_dataframe(
+                df.data, table["date_column"], table.get("enums")
+            )
+            stage.count(rows=len(data))
+        return self.add_row_ordinal(data)
+
+    def add_row_ordinal(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds the `row_ordinal` column if the rows are merged on their row key.
+
+        The index of the extracted data is the row number in the FITS
+        table, also for chunks and rows dropped by the preparation.
+
+        Args:
+            data (pd.DataFrame): The prepared data.
+
+        Returns:
+            pd.DataFrame: The data with the `row_ordinal` column.
+        """
+        if self.row_keys:
+            data[ROW_ORDINAL] = data.index.to_numpy(dtype=np.int64)
+        return data
+
+    def stage_table(self, table: Dict[str, Any], file_id: int) -> FitsTable:
+        """
+        Extracts, prepares and writes a table of the file into its temporary table.
+
+        The table is loaded at once if the memory `governor` is disabled or
+        has room for its estimated size. The reservation is held until `release_memory`,
+        because the prepared data is kept for the rollups. Otherwise it is
+        processed in chunks that fit into the free budget, see
+        `stage_table_chunks`.
+
+        Args:
+            table (Dict[str, Any]): The config of the table.
+            file_id (int): Id of the file in FITS2DB_META.
+
+        Returns:
+            FitsTable: The table with the prepared data.
+
+        Raises:
+            KeyError: If the file has no such table.
+            ValueError: If the date column can not be parsed.
+        """
+        if governor.enabled:
+            header = self.file.table_header(table["name"])
+            estimate = estimate_table_bytes(header)
+            if not governor.try_reserve(estimate):
+                return self.stage_table_chunks(
+                    table, header, estimate, file_id
                 )
-                self.update_table(table + "_META", df.meta)
-            
-            if self.config['fits_files']['delete_rows_from_missing_tables']:
-                for k, table in remaining_tables.items():
-                    self.delete_file_from_table(session, file_record, table)
+            self.reserved_memory += estimate
+        df = self.file.get_table(table["name"])
+        df.data = self.prepare_table(df, table, file_id)
+        self.upsert_data_table(str.lower(table["name"]), df.data)
+        return df
 
-            file_record.last_file_mutation = self.file.mdate
-            session.commit()
+    def stage_table_chunks(
+        self,
+        table: Dict[str, Any],
+        header,
+        estimate: int,
+        file_id: int,
+    ) -> FitsTable:
+        """
+        Extracts, prepares and writes a table in chunks of rows.
+
+        Only one chunk is held in memory. The finest rollup is computed per
+        chunk and kept in `chunk_rollups` for `write_rollups`, the returned
+        table holds no rows.
+
+        Args:
+            table (Dict[str, Any]): The config of the table.
+            header (astropy.io.fits.Header): Header of the table.
+            estimate (int): Estimated memory of the whole table.
+            file_id (int): Id of the file in FITS2DB_META.
+
+        Returns:
+            FitsTable: The table with the columns but not the rows of the data.
 
-    def upsert_data_table(self, table_name: str, df: pd.DataFrame, file_id: int=None) -> None:
+        Raises:
+            ValueError: If the date column can not be parsed.
+        """
+        table_name = str.lower(table["name"])
+        row_bytes = estimate // max(int(header.get("NAXIS2", 0)), 1)
+        chunk_rows = governor.chunk_rows(row_bytes)
+        log.warning(
+            f"{table_name} needs about {estimate / 1024**2:.0f} MB, "
+            f"processing it in chunks of {chunk_rows} rows"
+        )
+        resolutions = self.rollup_resolutions(table_name)
+        enum_columns = self.enum_columns(table_name)
+        rollups = []
+        row_count = 0
+        result = None
+        for chunk in self.file.iter_table(table["name"], chunk_rows):
+            nbytes = row_bytes * len(chunk.data)
+            governor.reserve(nbytes)
+            try:
+                try:
+                    data = self.prepare_table(chunk, table, file_id)
+                except ValueError:
+                    if result is not None:
+                        self.drop_table("tmp_" + table_name)
+                    raise
+                self.upsert_data_table(
+                    table_name,
+                    data,
+                    if_exists="replace" if result is None else "append",
+                )
+                if resolutions:
+                    rollups.append(
+                        compute_rollup(
+                            data, resolutions[0], states=enum_columns
+                        )
+                    )
+                row_count += len(data)
+                result = FitsTable(
+                    name=chunk.name,
+                    meta=chunk.meta,
+                    data=data.iloc[:0],
+                    row_count=row_count,
+                )
+            finally:
+                governor.release(nbytes)
+        if result is None:
+            # A table without rows is small
+            df = self.file.get_table(table["name"])
+            df.data = self.prepare_table(df, table, file_id)
+            self.upsert_data_table(table_name, df.data)
+            return df
+        if rollups:
+            # Buckets split between two chunks are merged
+            self.chunk_rollups[table_name] = combine_rollup(
+                pd.concat(rollups, ignore_index=True)
+            ).astype(rollups[0].dtypes.to_dict())
+        return result
+
+    def release_memory(self) -> None:
+        """Releases the memory reserved for the tables of the file."""
+        governor.release(self.reserved_memory)
+        self.reserved_memory = 0
+
+    def rollup_resolutions(self, table_name: str) -> List[str]:
+        """
+        Returns the configured rollup resolutions of a table, from fine to coarse.
+
+        Args:
+            table_name (str): The name of the table.
+
+        Returns:
+            List[str]: The resolutions, empty if the table has no rollups.
+        """
+        for table in self.config["fits_files"]["tables"]:
+            if str.lower(table["name"]) == table_name:
+                if table.get("rollups") and table.get("date_column"):
+                    return [r for r in RESOLUTIONS if r in table["rollups"]]
+        return []
+
+    def table_enums(self, table_name: str) -> List[Dict[str, Any]]:
+        """
+        Returns the enum mappings of a table from its config.
+
+        Args:
+            table_name (str): The name of the table.
+
+        Returns:
+            List[Dict[str, Any]]: The enums, empty if the table has none.
+        """
+        for table in self.config["fits_files"]["tables"]:
+            if str.lower(table["name"]) == str.lower(table_name):
+                return table.get("enums") or []
+        return []
+
+    def enum_columns(self, table_name: str) -> List[str]:
+        """Returns the lower case names of the enum columns of a table."""
+        return [
+            str.lower(column)
+            for enum in self.table_enums(table_name)
+            for column in enum["columns"]
+        ]
+
+    def write_enums(self, table_names: List[str], session: Session) -> None:
+        """
+        Replaces the lookup rows of the enum columns of tables in FITS2DB_ENUM.
+
+        Nothing is committed, the rows are written in the transaction of the
+        table metadata.
+
+        Args:
+            table_names (List[str]): Lower case names of the uploaded tables.
+            session (Session): SQLAlchemy session object for database transactions.
+        """
+        rows = []
+        for table_name in table_names:
+            for enum in self.table_enums(table_name):
+                for column in map(str.lower, enum["columns"]):
+                    rows.extend(
+                        {
+                            "tablename": table_name,
+                            "column_name": column,
+                            "label": label,
+                            "code": code,
+                        }
+                        for label, code in enum["values"].items()
+                    )
+        if not rows:
+            return
+        session.execute(
+            delete(Fits2DbEnum).where(
+                Fits2DbEnum.tablename.in_({row["tablename"] for row in rows})
+            )
+        )
+        session.execute(insert(Fits2DbEnum), rows)
+
+    def write_rollups(self, table_name: str, df: pd.DataFrame, file_id: int) -> None:
+        """
+        Replaces the rollup rows of a file in the rollup tables of a table.
+
+        The finest rollup is computed from the data, the coarser ones from
+        the finer rollup. The rollups go through the same temporary tables
+        as the data, so new columns are added to existing rollup tables.
+        A failing rollup is logged and does not fail the upload, it is
+        rebuilt by the next update of the file.
+
+        Args:
+            table_name (str): The name of the data table.
+            df (pd.DataFrame): The prepared data of the file.
+            file_id (int): Id of the file in FITS2DB_META.
+        """
+        # Tables processed in chunks come with their finest rollup
+        rollup = self.chunk_rollups.pop(table_name, None)
+        # Means of enum codes are meaningless, their last value is kept
+        enum_columns = self.enum_columns(table_name)
+        for resolution in self.rollup_resolutions(table_name):
+            name = rollup_table(table_name, resolution)
+            with profiler.stage("rollup", file=self.file.file_name, table=name) as stage:
+                if rollup is None:
+                    rollup = compute_rollup(
+                        df, resolution, states=enum_columns
+                    )
+                else:
+                    rollup = combine_rollup(rollup, resolution)
+                rollup["file_meta_id"] = file_id
+                stage.count(rows=len(rollup))
+                try:
+                    with self.savepoint():
+                        self.upsert_data_table(name, rollup)
+                        if self.has_table(name):
+                            source_table_details = self._fetch_column_details('tmp_' + name)
+                            target_table_details = self._fetch_column_details(name)
+                            self._add_missing_columns(
+                                source_table_details, name, target_table_details
+                            )
+                            with self.begin() as conn:
+                                self.merge_tables(name, 'tmp_' + name, conn, file_id)
+                            self.drop_table('tmp_' + name)
+                        else:
+                            self._rename_table('tmp_' + name, name)
+                except SQLAlchemyError as err:
+                    log.error(f"Could not write rollup {name}: {err}")
+                    self._set_table_exists(name, None)
+                    self._set_table_exists('tmp_' + name, None)
+                    if self.has_table('tmp_' + name):
+                        self.drop_table('tmp_' + name)
+
+    def evolve_schema(
+        self, tables: Dict[str, List[pd.DataFrame]]
+    ) -> Dict[str, List[str]]:
+        """
+        Applies the schema changes of the files of a run before they are loaded.
+
+        Every existing table gets the missing columns of all files in one
+        ALTER TABLE. A new table that more than one file shapes is created
+        with the columns of all files, a new table of a single shape is left
+        to its first file. So the files of the run are loaded without
+        altering the tables in between. The rollup tables are evolved with
+        their tables. The schemas go through temporary tables like the data,
+        so the columns get the types of a load.
+
+        Args:
+            tables (Dict[str, List[pd.DataFrame]]): Per lower case table
+                name the schema frames of the files that shape it, see
+                `fits2db.plan.union_schema`.
+
+        Returns:
+            Dict[str, List[str]]: The added columns per altered table.
+        """
+        added = {}
+        for table_name, frames in tables.items():
+            frames = [self.add_row_ordinal(frame.copy()) for frame in frames]
+            shapes = {table_name: frames}
+            enum_columns = self.enum_columns(table_name)
+            for frame in frames:
+                # Same rollups as `write_rollups`
+                rollup = None
+                for resolution in self.rollup_resolutions(table_name):
+                    if rollup is None:
+                        rollup = compute_rollup(
+                            frame, resolution, states=enum_columns
+                        )
+                    else:
+                        rollup = combine_rollup(rollup, resolution)
+                    rollup["file_meta_id"] = 0
+                    shapes.setdefault(rollup_table(table_name, resolution), []).append(rollup)
+            for name, shape in shapes.items():
+                with profiler.stage("ddl", table=name):
+                    exists = self.has_table(name)
+                    if not exists and len(frames) < 2:
+                        continue
+                    self.upsert_data_table(name, union_frame(shape))
+                    if not exists:
+                        self._rename_table('tmp_' + name, name)
+                        log.info(f"Created {name} with the columns of all files")
+                        continue
+                    source_table_details = self._fetch_column_details('tmp_' + name)
+                    target_table_details = self._fetch_column_details(name)
+                    columns = self._add_missing_columns(
+                        source_table_details, name, target_table_details
+                    )
+                    self.drop_table('tmp_' + name)
+                    if columns:
+                        added[name] = columns
+        return added
+
+    def upsert_data_table(
+        self,
+        table_name: str,
+        df: pd.DataFrame,
+        file_id: int = None,
+        if_exists: str = "replace",
+    ) -> None:
         """
         Upserts data into a table in the database. If the table exists, merges the data.
         Otherwise, renames the temporary table.
@@ -464,6 +1762,8 @@ class BaseLoader(ABC):
         Args:
             table_name (str): The name of the table to upsert.
             df (pd.DataFrame): The DataFrame containing the data to upsert.
+            if_exists (str): `append` to add the rows of a further chunk to
+                the temporary table.
         """
         log.debug("Passed engine:")
         log.debug(self.engine)
@@ -473,14 +1773,26 @@ class BaseLoader(ABC):
 
         try:
             tmp_tbl = "tmp_" + str.lower(table_name)  # change to lowercase
-            with self.engine.connect() as conn:
+            with profiler.stage(
+                "to_sql",
+                file=self.file.file_name if self.file else None,
+                table=str.lower(table_name),
+            ) as stage, self.connect() as conn:
                 df.to_sql(
                     name=tmp_tbl,
                     con=conn,
-                    if_exists="replace",
+                    if_exists=if_exists,
                     index=False,
+                    dtype={
+                        column: TINYINT_TYPE
+                        for column, dtype in df.dtypes.items()
+                        if dtype == np.uint8
+                    },
+                    **self.to_sql_options,
                 )
+                stage.count(rows=len(df), nbytes=df.memory_usage(index=False).sum())
                 log.info(f"Temporary table {tmp_tbl} created.")
+            self._set_table_exists(tmp_tbl, True)
 
             # if self.check_table_exists(table_name):
                 # self.merge_tables(table_name, tmp_tbl, file_id)
@@ -492,21 +1804,6 @@ class BaseLoader(ABC):
             log.error(err)
             raise
 
-    def check_table_exists(self, table_name: str) -> bool:
-        """
-        Checks if a table exists in the database.
-
-        Args:
-            table_name (str): The name of the table to check.
-
-        Returns:
-            bool: True if the table exists, False otherwise.
-        """
-        with self.engine.connect() as conn:
-            query = text("SHOW TABLES LIKE :table_name")
-            result = conn.execute(query, {"table_name": table_name})
-            return result.fetchone() is not None
-
     def drop_table(self, table_name: str) -> bool:
         """
         Drops a table from the database.
@@ -517,42 +1814,20 @@ class BaseLoader(ABC):
         Returns:
             bool: True if the table was successfully dropped, False otherwise.
         """
-        with self.engine.connect() as conn:
-            transaction = conn.begin()  # Start a new transaction
+        with self.connect() as conn:
+            transaction = self.begin_transaction(conn)  # Start a new transaction
             try:
                 # Safely create the SQL string with the table name included
-                query = text(f"DROP TABLE `{table_name}`")
+                query = text(f"DROP TABLE {self.quote(table_name)}")
                 conn.execute(query)
                 transaction.commit()  # Commit the transaction if the drop is successful
+                self._set_table_exists(table_name, False)
                 return True
             except Exception as e:
                 transaction.rollback()  # Roll back the transaction on error
                 print(f"Failed to drop table {table_name}: {e}")
                 return False
 
-    def rename_table(self, old_name: str, new_name: str) -> None:
-        """
-        Renames a table in the database and adds an auto-incrementing primary key.
-
-        Args:
-            old_name (str): The current name of the table.
-            new_name (str): The new name for the table.
-        """
-        with self.engine.connect() as conn:
-            try:
-                rename_stmt = text(f"RENAME TABLE {old_name} TO {new_name}")
-                id_stmt = text(f"""ALTER TABLE {new_name} 
-                                ADD COLUMN id INT AUTO_INCREMENT,
-                                ADD PRIMARY KEY (id);""")
-                conn.execute(rename_stmt)
-                conn.execute(id_stmt)
-                log.info(
-                    f"Table renamed from {old_name} to {new_name} and added primamry key id."
-                )
-            except SQLAlchemyError as err:
-                log.error(err)
-                raise
-
     def execute_sql(self, sql: str) -> None:
         """
         Executes a raw SQL query against the database.
@@ -563,6 +1838,7 @@ class BaseLoader(ABC):
         with self.engine.connect() as conn:
             try:
                 conn.execute(text(sql))
+                conn.commit()
                 log.info("Query executed successfully")
             except SQLAlchemyError as e:
                 error = str(e.__dict__["orig"])
@@ -572,33 +1848,69 @@ class BaseLoader(ABC):
         """
         Merges data from a temporary table into the original table.
 
+        With a `file_id` the rows of the file are replaced. Rows with a row
+        key are merged with `keyed_insert`, then only the rows the file no
+        longer has are deleted before. In a table partitioned by file the
+        partition of the file, added by `prepare_file_partition`, is emptied
+        instead if schema changes are transactional. MySQL would commit the
+        transaction before `TRUNCATE PARTITION`, there the rows are deleted,
+        which only scans the partition of the file.
+
         Args:
             original_table (str): The name of the original table.
             tmp_table (str): The name of the temporary table.
+            conn (Connection): The connection of the transaction.
+            file_id (int): Id of the file whose rows are replaced.
         """
-        metadata_obj = MetaData()
-        metadata_obj.reflect(bind=self.engine)
-        original_table_obj = metadata_obj.tables[str.lower(original_table)]
-        tmp_table_obj = metadata_obj.tables[str.lower(tmp_table)]
+        # Only the key columns are needed, the tables are not reflected
+        original_table_obj = table_clause(
+            str.lower(original_table),
+            column_clause("file_meta_id"),
+            column_clause(ROW_ORDINAL),
+        )
         source_table_details = self._fetch_column_details(tmp_table)
         target_table_details = self._fetch_column_details(original_table)
         source_table_details = {k.lower(): v for k, v in source_table_details.items()}
-
-        if file_id is not None:
+        columns = [
+            column
+            for column in source_table_details
+            if column in target_table_details
+        ]
+        keyed = self.row_keys and ROW_ORDINAL in columns
+        truncate = self.supports_file_batches and self.is_partitioned(
+            original_table
+        )
+        if file_id is not None and truncate:
+            # The rows of the file are replaced without deleting rows
+            self.truncate_file_partition(conn, original_table, file_id)
+        elif file_id is not None:
             delete_stmt = (
                 delete(original_table_obj)
                 .where(original_table_obj.c.file_meta_id == file_id)
             )
-            res = conn.execute(delete_stmt)
-        common_columns = ", ".join(
-            set(source_table_details.keys())
-            & set(target_table_details.keys())
-        )
-        insert_query = f"""
-        INSERT INTO {original_table} ({common_columns})
-        SELECT {common_columns}
-        FROM {tmp_table}
-        """
+            if keyed and self.merge_mode == "update":
+                # Rows the file still has are updated in place below
+                tmp_table_obj = table_clause(
+                    str.lower(tmp_table), column_clause(ROW_ORDINAL)
+                )
+                delete_stmt = delete_stmt.where(
+                    or_(
+                        original_table_obj.c.row_ordinal.is_(None),
+                        original_table_obj.c.row_ordinal.not_in(
+                            select(tmp_table_obj.c.row_ordinal)
+                        ),
+                    )
+                )
+            conn.execute(delete_stmt)
+        if keyed:
+            insert_query = self.keyed_insert(original_table, tmp_table, columns)
+        else:
+            common_columns = ", ".join(self.quote(column) for column in columns)
+            insert_query = f"""
+            INSERT INTO {self.quote(original_table)} ({common_columns})
+            SELECT {common_columns}
+            FROM {self.quote(tmp_table)}
+            """
         result = conn.execute(text(insert_query))
 
         log.info(
@@ -622,9 +1934,16 @@ class BaseLoader(ABC):
         Returns:
             Dict[str, Any]: A dictionary mapping column names to their types.
         """
+        table_name = str.lower(table_name)
+        if self.unit is not None and table_name in self.unit.columns:
+            return dict(self.unit.columns[table_name])
         meta = MetaData()
-        table = Table(str.lower(table_name), meta, autoload_with=self.engine)
-        return {column.name: column.type for column in table.columns}
+        with self.connect() as conn:
+            table = Table(table_name, meta, autoload_with=conn)
+        details = {column.name: column.type for column in table.columns}
+        if self.unit is not None:
+            self.unit.columns[table_name] = details
+        return dict(details)
 
     def _add_missing_columns(
         self,
@@ -640,33 +1959,49 @@ class BaseLoader(ABC):
             target_table (str): The name of the target table.
             target_table_details (Dict[str, Any]): Details of the target table's columns.
         """
-        added_columns = []
+        added_columns = {}
         source_table_details = {k.lower(): v for k, v in source_table_details.items()}
         target_table = str.lower(target_table)
-        with self.engine.connect() as conn:
-            for column, col_type in source_table_details.items():
-                if column not in target_table_details:
-                    alter_query = f"ALTER TABLE {target_table} ADD COLUMN {column} {col_type}"
-                    conn.execute(text(alter_query))
-                    log.info(
-                        f"Added column {column} of type {col_type} to {target_table}"
-                    )
-                    added_columns.append(column)
-        return added_columns
+        for column, col_type in source_table_details.items():
+            if column not in target_table_details:
+                added_columns[column] = col_type.compile(dialect=self.engine.dialect)
+        if not added_columns:
+            return []
+        clauses = [
+            f"ADD COLUMN {self.quote(column)} {col_type}"
+            for column, col_type in added_columns.items()
+        ]
+        with self.begin() as conn:
+            self.execute_alter(conn, target_table, clauses)
+            if self.row_keys and ROW_ORDINAL in added_columns:
+                self.create_row_key(conn, target_table)
+        self._set_table_exists(target_table, True)
+        for column, col_type in added_columns.items():
+            log.info(f"Added column {column} of type {col_type} to {target_table}")
+        return list(added_columns)
 
     def _delete_columns(self, table_infos):
-        with self.engine.connect() as conn:
+        with self.connect() as conn:
             for table_info in table_infos:
                 table = table_info[0]
-                columns = table_info[-1]
-                for column in columns:
-                    alter_query = f"ALTER TABLE {table} DROP COLUMN {column}"
+                # The row key keeps its column, its rows are merged anyway
+                columns = [
+                    column for column in table_info[-1] or [] if column != ROW_ORDINAL
+                ]
+                if not columns:
+                    continue
+                clauses = [f"DROP COLUMN {self.quote(column)}" for column in columns]
+                self._set_table_exists(table, True)
+                for alter_query in self.alter_table_statements(table, clauses):
+                    transaction = self.begin_transaction(conn)
                     try:
                         conn.execute(text(alter_query))
-                        log.info(f"Deleted column {column} in table {table}")
+                        transaction.commit()
+                        log.info(f"Deleted columns {columns} in table {table}")
                     # except Exception as e:
                     except SQLAlchemyError as e:
-                        log.error(f"Error while deleting {column} from table {table}")
+                        transaction.rollback()
+                        log.error(f"Error while deleting {columns} from table {table}")
                         # print(type(e))
 
     def update_table(self, table_name: str, df: pd.DataFrame) -> None:
@@ -681,7 +2016,7 @@ class BaseLoader(ABC):
         log.debug(self.engine)
         try:
             tmp_tbl = "tmp_" + str.lower(table_name)
-            with self.engine.connect() as conn:
+            with self.connect() as conn:
                 df.to_sql(
                     name=str.lower(table_name),
                     con=conn,
@@ -689,30 +2024,113 @@ class BaseLoader(ABC):
                     index=False,
                 )
                 log.info(f"Temporary table {tmp_tbl} created.")
+            self._set_table_exists(str.lower(table_name), True)
 
         except Exception as err:
             log.error(err)
             raise
     
-    def _prepare_dataframe(self, data, data_column):
-        mapping = {col: ''.join(c for c in col if c.isalnum() or c == ' ' or c == '_') for col in data.columns}
-        data = data.rename(columns=mapping)
-
-        space_cols = [col for col in data.columns if ' ' in col]
-        mapping = {col: col.replace(' ', '_') for col in space_cols}
-        data = data.rename(columns=mapping)
-
-        cols=pd.Series(data.columns)
-
-        for dup in cols[cols.duplicated()].unique(): 
-            cols[cols[cols == dup].index.values.tolist()] = [dup + '_' + str(i) if i != 0 else dup for i in range(sum(cols == dup))]
-
-        # rename the columns with the cols list.
-        data.columns=cols
-        if data_column is not None:
-            if data_column in data.columns:
-                # data = data.rename(columns={data_column: 'timestamp'})
-                data[data_column] = pd.to_datetime(data[data_column]) # FIX TIMESTAMP setting
-                data.dropna(subset=[data_column], inplace=True)
-                data['timestamp'] = data[data_column] # FIX TIMESTAMP setting
-        return data
+    def _prepare_dataframe(self, data, data_column, enums=None):
+        return prepare_dataframe(data, data_column, enums)
+
+
+class FileBatch:
+    """
+    One transaction shared by the loaders of several files.
+
+    Every file is loaded in a savepoint of the batch, a failing file is
+    rolled back to its savepoint while the other files of the batch are
+    committed together when the batch ends. Only loaders with
+    `supports_file_batches` can be batched, the schema changes of a file
+    have to be part of the transaction.
+
+    !!! note "Example usage"
+        ```python
+        with DBWriter(configs).begin_batch() as batch:
+            for file in files:
+                DBWriter(configs, file, batch=batch).upsert()
+        ```
+
+    Attributes:
+        loader (BaseLoader): The loader whose engine the batch connects with.
+        connection (Optional[Connection]): The connection of the batch.
+    """
+
+    def __init__(self, loader: BaseLoader) -> None:
+        if not loader.supports_file_batches:
+            raise ValueError(
+                f"{type(loader).__name__} does not support file batches."
+            )
+        self.loader = loader
+        self.connection: Optional[Connection] = None
+        self._transaction = None
+
+    def __enter__(self) -> "FileBatch":
+        self.connection = self.loader.engine.connect()
+        self._transaction = self.loader.begin_batch(self.connection)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            if exc_type is None:
+                with profiler.stage("commit"):
+                    self._transaction.commit()
+            else:
+                self._transaction.rollback()
+        finally:
+            self.connection.close()
+            self.connection = None
+            self.loader.close_connection()
+
+
+class UnitOfWork:
+    """
+    The pinned connection and cached table existence of the load of a file.
+
+    Without a unit every existence check and DDL statement of a file checks
+    out its own connection and every table is looked up again for each
+    step. Within a unit the loader runs them on one connection and looks
+    up and reflects each table once, the tables it creates, renames, alters
+    and drops are tracked in the cache. Statements still commit as they
+    would without the unit. In a file batch the unit uses the connection
+    of the batch.
+
+    Attributes:
+        loader (BaseLoader): The loader of the file.
+        connection (Optional[Connection]): The pinned connection.
+        tables (Dict[str, bool]): Cached existence of the looked up tables.
+        columns (Dict[str, Dict[str, Any]]): Cached column types of the
+            reflected tables.
+        partitioned (Dict[str, bool]): Cached partitioning of the tables,
+            see `BaseLoader.is_partitioned`.
+    """
+
+    def __init__(self, loader: BaseLoader) -> None:
+        self.loader = loader
+        self.connection: Optional[Connection] = None
+        self.tables: Dict[str, bool] = {}
+        self.columns: Dict[str, Dict[str, Any]] = {}
+        self.partitioned: Dict[str, bool] = {}
+        self._owns_connection = False
+
+    def __enter__(self) -> "UnitOfWork":
+        if self.loader.batch is not None:
+            self.connection = self.loader.batch.connection
+        else:
+            self.connection = self.loader.engine.connect()
+            self._owns_connection = True
+        self.loader.unit = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.loader.unit = None
+        if self._owns_connection:
+            self.connection.close()
+        self.connection = None
+        self._owns_connection = False
+
+    def table_exists(self, table_name: str) -> bool:
+        """Checks if a table exists, looking it up on the first call."""
+        if table_name not in self.tables:
+            self.tables[table_name] = self.loader.check_table_exists(table_name)
+        return self.tables[table_name]
@@ -24,29 +24,51 @@ erDiagram
         int metadata_id FK
     }
 
-    YOUR_TABLE_META {
+    FITS2DB_HEADER {
         int id PK
+        varchar header_hash
+        int card_index
         text keyword
         text value
-        int metadata_id FK
+    }
+
+    FITS2DB_ENUM {
+        int id PK
+        varchar tablename
+        varchar column_name
+        varchar label
+        int code
     }
 
     FITS2DB_META ||--|| FITS2DB_TABLE_META : "foreign_id"
     FITS2DB_META ||--o| YOUR_TABLE : "foreign_id"
-    FITS2DB_TABLE_META ||--o| YOUR_TABLE_META : "metadata_id"
+    FITS2DB_TABLE_META }o--|| FITS2DB_HEADER : "header_hash"
+    YOUR_TABLE ||--o{ FITS2DB_ENUM : "column_name"
 ```
 This module defines the SQLAlchemy ORM models for the metadata
 tables used in the database. The models include:
 
 - Fits2DbMeta: Represents metadata for FITS files.
 - Fits2DbTableMeta: Represents metadata for tables related to FITS files.
+- Fits2DbHeader: Stores the header cards of the FITS tables. Identical
+  headers are stored once and shared between files through their hash.
+- Fits2DbEnum: Lookup of the codes of enum columns, which are stored as
+  small integers in the data tables.
 
 The relationships between these tables are visualized in the diagram above.
 """
 
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, Text
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+)
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -74,8 +96,8 @@ class Fits2DbMeta(Base):
     filepath = Column(Text)
     last_db_update = Column(
         DateTime,
-        default=datetime.now(timezone.utc),
-        onupdate=datetime.now(timezone.utc),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
     )
     last_file_mutation = Column(
         DateTime,
@@ -97,5 +119,56 @@ class Fits2DbTableMeta(Base):
     tablename = Column(Text)
     record_count = Column(Integer)
     column_count = Column(Integer)
+    header_hash = Column(String(64), index=True)
 
     file_meta = relationship("Fits2DbMeta", back_populates="tables")
+
+
+class Fits2DbHeader(Base):
+    """
+    SQLAlchemy ORM model representing the FITS2DB_HEADER table.
+
+    Each header card of a FITS table is stored as one row. All cards of a
+    header share the same `header_hash`, so a header that is identical
+    across many files is only stored once and referenced from
+    `fits2db_table_meta.header_hash`.
+
+    Attributes:
+        id (int): Primary key, auto-incremented.
+        header_hash (str): SHA-256 hex digest of the header cards.
+        card_index (int): Position of the card in the header.
+        keyword (str): Keyword of the header card.
+        value (str): Value of the header card as text.
+    """
+
+    __tablename__ = "fits2db_header"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    header_hash = Column(String(64), index=True)
+    card_index = Column(Integer)
+    keyword = Column(Text)
+    value = Column(Text)
+
+
+class Fits2DbEnum(Base):
+    """
+    SQLAlchemy ORM model representing the FITS2DB_ENUM table.
+
+    Columns declared in the `enums` of a table config are stored as codes
+    in the data table. This table maps every code back to its label.
+
+    Attributes:
+        id (int): Primary key, auto-incremented.
+        tablename (str): Name of the data table.
+        column_name (str): Name of the enum column.
+        label (str): String value of the column in the FITS file.
+        code (int): Code stored in the data table.
+    """
+
+    __tablename__ = "fits2db_enum"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tablename = Column(String(255), index=True)
+    column_name = Column(String(255))
+    label = Column(Text)
+    code = Column(SmallInteger)
@@ -3,24 +3,71 @@ This module provides an interface for interacting with a MySQL database using SQ
 It includes methods for creating database connections, managing tables, and performing
 operations such as upsert and merge.
 
+During a bulk load, e.g. `build`, the connections can run with the session
+settings of the `bulk_session` block of the database config: unique and
+foreign key checks turned off, optionally no binary log and a larger
+`bulk_insert_buffer_size`. The previous values are restored when a
+connection is returned to the pool.
+
+Columns are added with `ALGORITHM=INSTANT` where the server supports it,
+so adding columns to a large InnoDB table does not rebuild it.
+
+Rows with a row key are merged with `INSERT ... ON DUPLICATE KEY UPDATE`
+or `INSERT IGNORE`.
+
+With `partition_by_file` the data tables are LIST partitioned by
+`file_meta_id` with one partition `p<file id>` per file and the placeholder
+`p0`. A table holds at most 8192 partitions, so at most 8191 files.
+Partition DDL commits the open transaction, so partitions are only added
+before and dropped after the transaction of a file.
+
 Classes:
     MySQL: Manages MySQL database operations related to FITS files.
 """
 
 import logging
+from typing import Any, Dict, List
 
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Connection
 from sqlalchemy.dialects.mysql import DATETIME
+from sqlalchemy.exc import SQLAlchemyError
 
 
-from ..config.config_model import ConfigType
+from ..config.config_model import BulkSessionConfig, ConfigType
 from ..fits.fits import FitsFile
-from .base import BaseLoader
+from ..profiling import profiler
+from .base import ROW_ORDINAL, BaseLoader
 
 logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
 log = logging.getLogger("fits2db")
 
+# Server errors of an ALTER TABLE that can not run with ALGORITHM=INSTANT,
+# e.g. for tables with a FULLTEXT index or too many instant row versions
+INSTANT_UNSUPPORTED_ERRORS = {1845, 1846, 4092}
+
+# Maximum number of partitions of a table
+MAX_PARTITIONS = 8192
+
+
+def check_partition_count(table_name: str, count: int) -> None:
+    """
+    Checks that a table partitioned by file can have `count` partitions.
+
+    Args:
+        table_name (str): The name of the partitioned table.
+        count (int): The number of partitions including the new ones.
+
+    Raises:
+        ValueError: If it exceeds the partitions MySQL allows per table.
+    """
+    if count > MAX_PARTITIONS:
+        raise ValueError(
+            f"Table {table_name} can not hold more than {MAX_PARTITIONS - 1} "
+            "files with partition_by_file, rebuild the database without it"
+        )
+
 
 class MySQL(BaseLoader):
     """
@@ -32,20 +79,105 @@ class MySQL(BaseLoader):
     Attributes:
         config (ConfigType): Configuration details for database connection.
         engine: SQLAlchemy engine connected to the MySQL database.
+        bulk_session (Dict[str, int]): Session variables set on every
+            connection during a bulk load, empty if not configured.
     """
 
-    def __init__(self, config: ConfigType, file: FitsFile) -> None:
+    supports_file_partitions = True
+
+    def __init__(
+        self, config: ConfigType, file: FitsFile, bulk_load: bool = False
+    ) -> None:
         """
         Initializes the MySQL class with database configuration and a FITS file.
 
         Args:
             config (ConfigType): Configuration details for database connection.
             file (FitsFile): FITS file to be processed.
+            bulk_load (bool): Whether the loader is used for an initial bulk load.
         """
         self.config = config
         db_url = self.create_db_url()
         engine = create_engine(db_url)
-        super().__init__(db_url, engine, config, file)
+        super().__init__(db_url, engine, config, file, bulk_load)
+        self.bulk_session: Dict[str, int] = {}
+        bulk_session = config["database"].get("bulk_session")
+        if bulk_load and bulk_session is not None:
+            settings = BulkSessionConfig(**bulk_session)
+            self.bulk_session = self.session_variables(settings)
+            if settings.chunksize:
+                self.to_sql_options = {"chunksize": settings.chunksize}
+            event.listen(self.engine, "checkout", self._apply_bulk_session)
+            event.listen(self.engine, "checkin", self._restore_session)
+            profiler.note("bulk_session", self.bulk_session)
+
+    @staticmethod
+    def session_variables(settings: BulkSessionConfig) -> Dict[str, int]:
+        """
+        Returns the session variables of a bulk session profile.
+
+        Args:
+            settings (BulkSessionConfig): The `bulk_session` config.
+
+        Returns:
+            Dict[str, int]: The values of the variables that are changed.
+        """
+        variables = {
+            "unique_checks": int(settings.unique_checks),
+            "foreign_key_checks": int(settings.foreign_key_checks),
+        }
+        if not settings.sql_log_bin:
+            variables["sql_log_bin"] = 0
+        if settings.bulk_insert_buffer_size:
+            variables["bulk_insert_buffer_size"] = int(
+                settings.bulk_insert_buffer_size
+            )
+        return variables
+
+    def _apply_bulk_session(
+        self, dbapi_connection, connection_record, connection_proxy
+    ) -> None:
+        """
+        Sets the bulk session variables when a connection is checked out.
+
+        The previous values are kept in the connection record for
+        `_restore_session`. Variables the user may not set, e.g.
+        `sql_log_bin` without the privilege, are skipped with a warning.
+        """
+        names = list(self.bulk_session)
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(
+                "SELECT " + ", ".join(f"@@SESSION.{name}" for name in names)
+            )
+            previous = dict(zip(names, cursor.fetchone()))
+            applied: Dict[str, Any] = {}
+            for name, value in self.bulk_session.items():
+                try:
+                    cursor.execute(f"SET SESSION {name} = {value}")
+                except self.engine.dialect.loaded_dbapi.Error as err:
+                    log.warning(
+                        f"Could not set {name} for the bulk load: {err}"
+                    )
+                    continue
+                applied[name] = previous[name]
+            connection_record.info["bulk_session"] = applied
+        finally:
+            cursor.close()
+
+    def _restore_session(self, dbapi_connection, connection_record) -> None:
+        """
+        Restores the session variables when a connection is returned.
+        """
+        previous = connection_record.info.pop("bulk_session", None)
+        if not previous or dbapi_connection is None:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in previous.items():
+                cursor.execute(f"SET SESSION {name} = {int(value)}")
+        finally:
+            cursor.close()
 
     def create_db_url(self) -> str:
         """
@@ -66,3 +198,244 @@ class MySQL(BaseLoader):
         log.debug("Created url")
         log.info(url)
         return url
+
+    def supports_instant_add(self, conn: Connection) -> bool:
+        """
+        Whether the server adds columns with `ALGORITHM=INSTANT`.
+
+        MySQL supports it from 8.0.12 and MariaDB from 10.3.2 on.
+
+        Args:
+            conn (Connection): A connection to the server.
+
+        Returns:
+            bool: True if instant ADD COLUMN is supported.
+        """
+        version = conn.dialect.server_version_info or ()
+        if conn.dialect.is_mariadb:
+            return version >= (10, 3, 2)
+        return version >= (8, 0, 12)
+
+    def execute_alter(
+        self, conn: Connection, table_name: str, clauses: List[str]
+    ) -> None:
+        """
+        Executes an ALTER TABLE, with `ALGORITHM=INSTANT` if it only adds
+        columns and the server supports it.
+
+        If the table can not be altered instantly the statement is repeated
+        with the default algorithm.
+
+        Args:
+            conn (Connection): The connection to execute it with.
+            table_name (str): The name of the table to alter.
+            clauses (List[str]): The clauses of the ALTER TABLE statement.
+        """
+        if self.supports_instant_add(conn) and all(
+            clause.startswith("ADD COLUMN") for clause in clauses
+        ):
+            try:
+                super().execute_alter(
+                    conn, table_name, clauses + ["ALGORITHM=INSTANT"]
+                )
+                return
+            except SQLAlchemyError as err:
+                errno = getattr(getattr(err, "orig", None), "errno", None)
+                if errno not in INSTANT_UNSUPPORTED_ERRORS:
+                    raise
+                log.info(
+                    f"Can not alter {table_name} instantly, "
+                    f"using the default algorithm: {err.orig}"
+                )
+        super().execute_alter(conn, table_name, clauses)
+
+    def keyed_insert(
+        self, original_table: str, tmp_table: str, columns: List[str]
+    ) -> str:
+        """
+        Returns an INSERT ... SELECT that merges the rows on their row key.
+
+        Rows whose key exists are updated with `ON DUPLICATE KEY UPDATE`
+        or skipped with `INSERT IGNORE`. `VALUES()` is deprecated in MySQL
+        8.0.20 but the row alias that replaces it is unknown to MariaDB.
+
+        Args:
+            original_table (str): The name of the data table.
+            tmp_table (str): The name of the temporary table.
+            columns (List[str]): The columns to insert.
+
+        Returns:
+            str: The statement.
+        """
+        column_list = ", ".join(self.quote(column) for column in columns)
+        select = f"SELECT {column_list} FROM {self.quote(tmp_table)}"
+        if self.merge_mode == "ignore":
+            return (
+                f"INSERT IGNORE INTO {self.quote(original_table)} "
+                f"({column_list}) {select}"
+            )
+        updates = ", ".join(
+            f"{self.quote(column)} = VALUES({self.quote(column)})"
+            for column in columns
+            if column not in ("file_meta_id", ROW_ORDINAL)
+        )
+        return (
+            f"INSERT INTO {self.quote(original_table)} ({column_list}) "
+            f"{select} ON DUPLICATE KEY UPDATE {updates}"
+        )
+
+    def check_partitioned(self, table_name: str) -> bool:
+        """
+        Checks if a table is LIST partitioned.
+
+        Args:
+            table_name (str): The name of the table to check.
+
+        Returns:
+            bool: True if the table is partitioned by file.
+        """
+        with self.connect() as conn:
+            query = text(
+                "SELECT 1 FROM information_schema.partitions "
+                "WHERE table_schema = DATABASE() AND table_name = :table_name "
+                "AND partition_method = 'LIST' LIMIT 1"
+            )
+            result = conn.execute(query, {"table_name": table_name})
+            return result.fetchone() is not None
+
+    def _has_partition(self, conn, table_name: str, file_id: int) -> bool:
+        query = text(
+            "SELECT 1 FROM information_schema.partitions "
+            "WHERE table_schema = DATABASE() AND table_name = :table_name "
+            "AND partition_name = :partition_name"
+        )
+        result = conn.execute(
+            query, {"table_name": table_name, "partition_name": f"p{file_id}"}
+        )
+        return result.fetchone() is not None
+
+    def add_file_partition(self, conn, table_name: str, file_id: int) -> None:
+        """
+        Adds the partition `p<file id>` of a file if it is missing.
+
+        Args:
+            conn: The connection or session to execute it with.
+            table_name (str): The name of the partitioned table.
+            file_id (int): Id of the file in FITS2DB_META.
+
+        Raises:
+            ValueError: If the table has the maximum number of partitions.
+        """
+        query = text(
+            "SELECT COUNT(*), COALESCE(SUM(partition_name = :partition_name), 0) "
+            "FROM information_schema.partitions "
+            "WHERE table_schema = DATABASE() AND table_name = :table_name"
+        )
+        count, exists = conn.execute(
+            query, {"table_name": table_name, "partition_name": f"p{file_id}"}
+        ).one()
+        if exists:
+            return
+        check_partition_count(table_name, count + 1)
+        conn.execute(
+            text(
+                f"ALTER TABLE {self.quote(table_name)} ADD PARTITION "
+                f"(PARTITION p{int(file_id)} VALUES IN ({int(file_id)}))"
+            )
+        )
+        log.info(f"Added partition p{file_id} to {table_name}")
+
+    def truncate_file_partition(
+        self, conn, table_name: str, file_id: int
+    ) -> None:
+        """
+        Empties the partition of a file with `TRUNCATE PARTITION`.
+
+        Args:
+            conn: The connection or session to execute it with.
+            table_name (str): The name of the partitioned table.
+            file_id (int): Id of the file in FITS2DB_META.
+        """
+        conn.execute(
+            text(
+                f"ALTER TABLE {self.quote(table_name)} "
+                f"TRUNCATE PARTITION p{int(file_id)}"
+            )
+        )
+
+    def drop_file_partition(self, conn, table_name: str, file_id: int) -> None:
+        """
+        Drops the partition of a file if it exists.
+
+        Args:
+            conn: The connection or session to execute it with.
+            table_name (str): The name of the partitioned table.
+            file_id (int): Id of the file in FITS2DB_META.
+        """
+        if not self._has_partition(conn, table_name, file_id):
+            return
+        conn.execute(
+            text(
+                f"ALTER TABLE {self.quote(table_name)} "
+                f"DROP PARTITION p{int(file_id)}"
+            )
+        )
+        log.info(f"Dropped partition p{file_id} of {table_name}")
+
+    def check_table_exists(self, table_name: str) -> bool:
+        """
+        Checks if a table exists in the database.
+
+        Args:
+            table_name (str): The name of the table to check.
+
+        Returns:
+            bool: True if the table exists, False otherwise.
+        """
+        with self.connect() as conn:
+            query = text("SHOW TABLES LIKE :table_name")
+            result = conn.execute(query, {"table_name": table_name})
+            return result.fetchone() is not None
+
+    def rename_table(self, old_name: str, new_name: str) -> None:
+        """
+        Renames a table in the database and adds an auto-incrementing primary key.
+
+        A table partitioned by file gets the primary key (id, file_meta_id),
+        MySQL needs the partitioning column in every unique key, and one
+        partition per file of its rows.
+
+        Args:
+            old_name (str): The current name of the table.
+            new_name (str): The new name for the table.
+        """
+        with self.connect() as conn:
+            try:
+                rename_stmt = text(f"RENAME TABLE {old_name} TO {new_name}")
+                id_stmt = text(f"""ALTER TABLE {new_name} 
+                                ADD COLUMN id INT AUTO_INCREMENT,
+                                ADD PRIMARY KEY (id);""")
+                if self.creates_partitions(new_name):
+                    file_ids = conn.execute(
+                        text(f"SELECT DISTINCT file_meta_id FROM {old_name}")
+                    ).scalars()
+                    file_ids = sorted({0, *map(int, file_ids)})
+                    check_partition_count(new_name, len(file_ids))
+                    partitions = ", ".join(
+                        f"PARTITION p{file_id} VALUES IN ({file_id})"
+                        for file_id in file_ids
+                    )
+                    id_stmt = text(
+                        f"ALTER TABLE {new_name} "
+                        "ADD COLUMN id INT AUTO_INCREMENT, "
+                        "ADD PRIMARY KEY (id, file_meta_id) "
+                        f"PARTITION BY LIST (file_meta_id) ({partitions})"
+                    )
+                conn.execute(rename_stmt)
+                conn.execute(id_stmt)
+                log.info(
+                    f"Table renamed from {old_name} to {new_name} and added primamry key id."
+                )
+            except SQLAlchemyError as err:
+                log.error(err)
+                raise
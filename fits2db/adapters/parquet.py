@@ -0,0 +1,812 @@
+"""
+This module provides a loader that writes the FITS tables into a
+Hive-partitioned Parquet dataset instead of a SQL database. Each configured
+table is stored below `<db_name>/<table>/year=YYYY/month=MM/` and every FITS
+file contributes one fragment `part-<file_meta_id>.parquet` per partition it
+touches. Updating a file therefore only rewrites the fragments of that file,
+the rest of the dataset stays untouched.
+
+The `fits2db_meta`, `fits2db_table_meta` and `fits2db_header` bookkeeping is
+kept in a small SQLite catalog `<db_name>/_fits2db_catalog.db`.
+
+!!! note "Example usage"
+    ```python
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset("archive/housekeeping", partitioning="hive")
+    table = dataset.to_table(filter=(ds.field("year") == 2021))
+    ```
+
+Classes:
+    Parquet: Manages a Parquet dataset related to FITS files.
+"""
+
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from ..config.config_model import ConfigType
+from ..fits.fits import FitsFile, FitsTable
+from ..memory import estimate_table_bytes, governor
+from ..profiling import profiler
+from ..rollup import RESOLUTIONS, combine_rollup, compute_rollup, rollup_table
+from .base import BaseLoader, DateLike, select_columns
+from .meta import Base, Fits2DbTableMeta
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    ds = None
+    pq = None
+
+log = logging.getLogger("fits2db")
+
+CATALOG_NAME = "_fits2db_catalog.db"
+DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+class Parquet(BaseLoader):
+    """
+    Writes FITS tables into a Hive-partitioned Parquet dataset.
+
+    The fragments are written with zstd compression and row group statistics,
+    so readers can skip row groups by time range. New fragments are written
+    to hidden temporary files first and moved into place once all tables of
+    a file were written.
+
+    Inherits from:
+        BaseLoader: A base class for loading data into databases.
+
+    Attributes:
+        config (ConfigType): Configuration details, `db_name` is the dataset root.
+        root (Path): Root directory of the dataset.
+        engine: SQLAlchemy engine connected to the SQLite catalog.
+        write_options (Dict[str, Any]): Keyword arguments passed to
+            `pyarrow.parquet.write_table`.
+    """
+
+    write_options: Dict[str, Any] = {
+        "compression": "zstd",
+        "write_statistics": True,
+        "row_group_size": 128 * 1024,
+    }
+
+    def __init__(
+        self, config: ConfigType, file: FitsFile, bulk_load: bool = False
+    ) -> None:
+        """
+        Initializes the Parquet class with the dataset configuration and a FITS file.
+
+        Args:
+            config (ConfigType): Configuration details, `db_name` is the path
+                to the root directory of the dataset.
+            file (FitsFile): FITS file to be processed.
+            bulk_load (bool): Whether the loader is used for an initial bulk load.
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+        """
+        if pa is None:
+            raise ImportError(
+                "The parquet output needs pyarrow, install it with "
+                "`pip install fits2db[parquet]`"
+            )
+        self.config = config
+        self.root = Path(config["database"]["db_name"])
+        self.root.mkdir(parents=True, exist_ok=True)
+        db_url = self.create_db_url()
+        engine = create_engine(db_url, connect_args={"timeout": 60})
+        super().__init__(db_url, engine, config, file, bulk_load)
+
+    def create_db_url(self) -> str:
+        """
+        Creates the connection URL of the SQLite catalog.
+
+        Returns:
+            str: Connection URL for the catalog.
+        """
+        url = f"sqlite:///{(self.root / CATALOG_NAME).as_posix()}"
+        log.info(url)
+        return url
+
+    def write_file_meta(self, session: Session) -> None:
+        """
+        Writes metadata about the FITS file to the catalog.
+
+        The row is committed right away, see `SQLite.write_file_meta`.
+        `discard_file_meta` removes it again if the upload fails.
+        """
+        super().write_file_meta(session)
+        session.commit()
+
+    def check_table_exists(self, table_name: str) -> bool:
+        """
+        Checks if the dataset of a table exists.
+
+        Args:
+            table_name (str): The name of the table to check.
+
+        Returns:
+            bool: True if the table directory exists, False otherwise.
+        """
+        return (self.root / table_name).is_dir()
+
+    def _fetch_column_details(self, table_name: str) -> Dict[str, Any]:
+        """
+        Fetches the columns of the dataset of a table.
+
+        Args:
+            table_name (str): The name of the table to fetch details for.
+
+        Returns:
+            Dict[str, Any]: A dictionary mapping column names to their
+                Arrow types, over the schemas of all fragments.
+        """
+        paths = (self.root / str.lower(table_name)).glob("*/*/*.parquet")
+        schemas = [pq.read_schema(path) for path in paths]
+        if not schemas:
+            return {}
+        schema = pa.unify_schemas(schemas, promote_options="permissive")
+        return {field.name: field.type for field in schema}
+
+    def rename_table(self, old_name: str, new_name: str) -> None:
+        """
+        Renames the dataset directory of a table.
+
+        Args:
+            old_name (str): The current name of the table.
+            new_name (str): The new name for the table.
+        """
+        os.replace(self.root / old_name, self.root / new_name)
+        log.info(f"Table renamed from {old_name} to {new_name}")
+
+    def drop_table(self, table_name: str) -> bool:
+        """
+        Removes the dataset directory of a table.
+
+        Args:
+            table_name (str): The name of the table to drop.
+
+        Returns:
+            bool: True if the table existed, False otherwise.
+        """
+        table_dir = self.root / table_name
+        if not table_dir.is_dir():
+            return False
+        shutil.rmtree(table_dir)
+        log.info(f"Dropped table {table_name}")
+        return True
+
+    def clean_db(self) -> None:
+        """
+        Removes the datasets of all tables written by fits2db and the catalog.
+        """
+        with self.db_session() as session:
+            tables = set(
+                session.execute(
+                    select(Fits2DbTableMeta.tablename).distinct()
+                ).scalars()
+            )
+        tables.update(
+            str.lower(table["name"])
+            for table in self.config["fits_files"]["tables"]
+        )
+        for table in tables:
+            self.drop_table(table)
+            for resolution in RESOLUTIONS:
+                self.drop_table(rollup_table(table, resolution))
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    def partitions(
+        self,
+        table_name: str,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+    ) -> List[Path]:
+        """
+        Lists the partition directories of a table that overlap a date range.
+
+        Args:
+            table_name (str): The name of the table.
+            start (Optional[DateLike]): Start of the range, inclusive.
+            end (Optional[DateLike]): End of the range, inclusive.
+
+        Returns:
+            List[Path]: The partition directories in chronological order,
+                followed by the default partition.
+        """
+        first = (
+            pd.Timestamp(start).to_period("M") if start is not None else None
+        )
+        last = pd.Timestamp(end).to_period("M") if end is not None else None
+        dated = []
+        default = []
+        for directory in (self.root / table_name).glob("year=*/month=*"):
+            year = directory.parent.name.split("=", 1)[1]
+            month = directory.name.split("=", 1)[1]
+            if DEFAULT_PARTITION in (year, month):
+                default.append(directory)
+                continue
+            period = pd.Period(year=int(year), month=int(month), freq="M")
+            if first is not None and period < first:
+                continue
+            if last is not None and period > last:
+                continue
+            dated.append((period, directory))
+        return [directory for _, directory in sorted(dated)] + default
+
+    def read_table(
+        self,
+        table_name: str,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        columns: Optional[List[str]] = None,
+        chunksize: Optional[int] = None,
+        date_column: str = "timestamp",
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+        """
+        Reads the rows of a table between two dates, ordered by the date column.
+
+        Only the partitions overlapping the range are opened and row groups
+        outside of it are skipped by their statistics. The columns are
+        those of all fragments, a column a fragment does not have is null.
+        With a `chunksize` the partitions are streamed one after the other
+        in record batches, see `_read_chunks`.
+
+        Args:
+            table_name (str): The name of the table to read.
+            start (Optional[DateLike]): Lower bound of the date column, inclusive.
+            end (Optional[DateLike]): Upper bound of the date column, inclusive.
+            columns (Optional[List[str]]): Columns to read, the date column is
+                always included. All columns if None.
+            chunksize (Optional[int]): Maximum number of rows per chunk.
+            date_column (str): Column the date range applies to.
+
+        Returns:
+            Union[pd.DataFrame, Iterator[pd.DataFrame]]: The rows as a single
+                DataFrame, or an iterator of DataFrames if `chunksize` is set.
+
+        Raises:
+            ValueError: If the table has no column with one of the given names.
+        """
+        table_name = str.lower(table_name)
+        partitions = self.partitions(table_name, start, end)
+        fragments = [
+            path
+            for directory in partitions
+            for path in sorted(directory.glob("*.parquet"))
+        ]
+        if not fragments:
+            raise ValueError(f"No data for table {table_name}")
+        # Files of different schema versions can be in the dataset, a
+        # column is missing in the fragments written before it was added.
+        schema = pa.unify_schemas(
+            [pq.read_schema(path) for path in fragments],
+            promote_options="permissive",
+        )
+        names = select_columns(schema.names, columns, date_column)
+        expression = None
+        if start is not None:
+            expression = ds.field(date_column) >= pd.Timestamp(start)
+        if end is not None:
+            upper = ds.field(date_column) <= pd.Timestamp(end)
+            expression = upper if expression is None else expression & upper
+
+        if chunksize is None:
+            table = ds.dataset(
+                [path.as_posix() for path in fragments],
+                schema=schema,
+                format="parquet",
+            ).to_table(columns=names, filter=expression)
+            return (
+                table.to_pandas()
+                .sort_values(date_column, kind="stable")
+                .reset_index(drop=True)
+            )
+        return self._read_chunks(
+            partitions, schema, names, expression, chunksize, date_column
+        )
+
+    def _read_chunks(
+        self,
+        partitions: List[Path],
+        schema,
+        names: List[str],
+        expression,
+        chunksize: int,
+        date_column: str,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Streams the partitions one after the other in chunks of `chunksize` rows.
+
+        Every fragment of a partition is scanned in record batches of at
+        most `chunksize` rows and the batches are merged on the date column,
+        so only one batch per fragment is converted to pandas at a time.
+        The rows of a fragment are in the order of its FITS file, which is
+        expected to be sorted by date.
+        """
+        for directory in partitions:
+            batches = [
+                ds.dataset(path.as_posix(), schema=schema, format="parquet")
+                .scanner(
+                    columns=names, filter=expression, batch_size=chunksize
+                )
+                .to_batches()
+                for path in sorted(directory.glob("*.parquet"))
+            ]
+            buffers: List[Optional[pd.DataFrame]] = [None] * len(batches)
+            pending = []
+            while True:
+                for index, stream in enumerate(batches):
+                    while stream is not None and (
+                        buffers[index] is None or buffers[index].empty
+                    ):
+                        batch = next(stream, None)
+                        if batch is None:
+                            batches[index] = stream = None
+                        elif batch.num_rows:
+                            buffers[index] = (
+                                batch.to_pandas()
+                                .sort_values(date_column, kind="stable")
+                                .reset_index(drop=True)
+                            )
+                if all(df is None or df.empty for df in buffers):
+                    break
+                # Rows up to the smallest last date of the fragments still
+                # being scanned are complete and can be passed on
+                scanning = [
+                    df
+                    for df, stream in zip(buffers, batches)
+                    if stream is not None
+                ]
+                bound = (
+                    min(df[date_column].iloc[-1] for df in scanning)
+                    if scanning
+                    else None
+                )
+                for index, df in enumerate(buffers):
+                    if df is None or df.empty:
+                        continue
+                    split = (
+                        len(df.index)
+                        if bound is None
+                        else df[date_column].searchsorted(bound, "right")
+                    )
+                    pending.append(df.iloc[:split])
+                    buffers[index] = df.iloc[split:].reset_index(drop=True)
+                merged = pd.concat(pending, ignore_index=True).sort_values(
+                    date_column, kind="stable"
+                )
+                pending = []
+                for offset in range(0, len(merged.index), chunksize):
+                    chunk = merged.iloc[offset : offset + chunksize]
+                    if len(chunk.index) < chunksize:
+                        pending.append(chunk)
+                    else:
+                        yield chunk.reset_index(drop=True)
+            if pending:
+                yield pd.concat(pending, ignore_index=True)
+
+    def file_ranges(
+        self,
+        table_name: str,
+        file_ids: Optional[List[int]] = None,
+        date_column: str = "timestamp",
+    ) -> pd.DataFrame:
+        """
+        Returns the first and last date of the rows each file wrote to a table.
+
+        The file of a fragment is taken from its name and only the date
+        column of the fragments is read.
+
+        Args:
+            table_name (str): The name of the table.
+            file_ids (Optional[List[int]]): Ids of the files in FITS2DB_META,
+                all files if None.
+            date_column (str): Column with the dates.
+
+        Returns:
+            pd.DataFrame: One row per file with `file_meta_id`, `start` and `end`.
+        """
+        rows = []
+        directory = self.root / str.lower(table_name)
+        for path in directory.glob("*/*/part-*.parquet"):
+            file_id = int(path.stem[len("part-") :])
+            if file_ids is not None and file_id not in file_ids:
+                continue
+            dates = pq.read_table(path, columns=[date_column]).column(0)
+            dates = dates.to_pandas()
+            if len(dates.index):
+                rows.append((file_id, dates.min(), dates.max()))
+        df = pd.DataFrame(rows, columns=["file_meta_id", "start", "end"])
+        return df.groupby("file_meta_id", as_index=False).agg(
+            {"start": "min", "end": "max"}
+        )
+
+    def fragments(self, table_name: str, file_id: int) -> List[Path]:
+        """
+        Lists the fragments a file contributes to the dataset of a table.
+
+        Args:
+            table_name (str): The name of the table.
+            file_id (int): Id of the file in FITS2DB_META.
+
+        Returns:
+            List[Path]: Paths of the fragments.
+        """
+        return sorted(
+            (self.root / table_name).glob(f"*/*/part-{file_id}.parquet")
+        )
+
+    def write_partitions(
+        self,
+        table_name: str,
+        df: pd.DataFrame,
+        date_column: Optional[str],
+        file_id: int,
+        writers: Optional[Dict[Path, Any]] = None,
+    ) -> Dict[Path, Path]:
+        """
+        Writes the rows of a table into temporary fragments, one per partition.
+
+        With `writers` the fragments are kept open, so further chunks of the
+        table are appended to them. The caller closes the writers.
+
+        Args:
+            table_name (str): The name of the table.
+            df (pd.DataFrame): The prepared data of the table.
+            date_column (Optional[str]): Column the partitions are derived from.
+            file_id (int): Id of the file in FITS2DB_META.
+            writers (Optional[Dict[Path, Any]]): Open `pq.ParquetWriter` by
+                temporary file.
+
+        Returns:
+            Dict[Path, Path]: Maps the temporary files to their final path.
+        """
+        if date_column is not None and date_column in df.columns:
+            dates = pd.to_datetime(df[date_column])
+            keys = pd.DataFrame(
+                {"year": dates.dt.year, "month": dates.dt.month},
+                index=df.index,
+            )
+            groups = df.groupby([keys["year"], keys["month"]], sort=True)
+            partitions = (
+                (f"year={year}", f"month={month:02d}", part)
+                for (year, month), part in groups
+            )
+        else:
+            partitions = [
+                (f"year={DEFAULT_PARTITION}", f"month={DEFAULT_PARTITION}", df)
+            ]
+
+        written = {}
+        with profiler.stage(
+            "to_parquet", file=self.file.file_name, table=table_name
+        ) as stage:
+            for year, month, part in partitions:
+                directory = self.root / table_name / year / month
+                directory.mkdir(parents=True, exist_ok=True)
+                target = directory / f"part-{file_id}.parquet"
+                tmp = directory / f".part-{file_id}.parquet.tmp"
+                table = pa.Table.from_pandas(part, preserve_index=False)
+                if writers is None:
+                    pq.write_table(table, tmp, **self.write_options)
+                else:
+                    if tmp not in writers:
+                        writers[tmp] = pq.ParquetWriter(
+                            tmp,
+                            table.schema,
+                            compression=self.write_options["compression"],
+                            write_statistics=self.write_options[
+                                "write_statistics"
+                            ],
+                        )
+                    writer = writers[tmp]
+                    writer.write_table(
+                        table.cast(writer.schema),
+                        row_group_size=self.write_options["row_group_size"],
+                    )
+                written[tmp] = target
+            stage.count(
+                rows=len(df), nbytes=df.memory_usage(index=False).sum()
+            )
+        log.info(f"Wrote {len(written)} partitions of {table_name}")
+        return written
+
+    def commit_fragments(
+        self, table_name: str, file_id: int, written: Dict[Path, Path]
+    ) -> None:
+        """
+        Replaces the fragments of a file with the newly written ones.
+
+        Fragments of partitions the file no longer touches are removed.
+
+        Args:
+            table_name (str): The name of the table.
+            file_id (int): Id of the file in FITS2DB_META.
+            written (Dict[Path, Path]): Temporary files mapped to their final path.
+        """
+        targets = set(written.values())
+        for fragment in self.fragments(table_name, file_id):
+            if fragment not in targets:
+                fragment.unlink()
+        for tmp, target in written.items():
+            os.replace(tmp, target)
+
+    def discard_fragments(self, written: Dict[Path, Path]) -> None:
+        """Removes temporary fragments of a failed upload."""
+        for tmp in written:
+            tmp.unlink(missing_ok=True)
+
+    def finest_rollup(
+        self, table_name: str, df: pd.DataFrame
+    ) -> Optional[pd.DataFrame]:
+        """Computes the finest configured rollup of prepared data."""
+        resolutions = self.rollup_resolutions(table_name)
+        if not resolutions:
+            return None
+        # Means of enum codes are meaningless, their last value is kept
+        return compute_rollup(
+            df, resolutions[0], states=self.enum_columns(table_name)
+        )
+
+    def write_table(
+        self, table: Dict[str, Any], file_id: int
+    ) -> Tuple[FitsTable, Dict[Path, Path], Optional[pd.DataFrame]]:
+        """
+        Writes a whole table into temporary fragments.
+
+        The rows are dropped once they are written, only the columns are
+        kept for the table metadata.
+
+        Args:
+            table (Dict[str, Any]): The config of the table.
+            file_id (int): Id of the file in FITS2DB_META.
+
+        Returns:
+            Tuple[FitsTable, Dict[Path, Path], Optional[pd.DataFrame]]: The
+                table, its fragments and its finest rollup.
+
+        Raises:
+            ValueError: If the date column can not be parsed.
+        """
+        table_name = str.lower(table["name"])
+        df = self.file.get_table(table["name"])
+        data = self.prepare_table(df, table, file_id)
+        written = {
+            table_name: self.write_partitions(
+                table_name, data, table["date_column"], file_id
+            )
+        }
+        rollup = self.finest_rollup(table_name, data)
+        df.data = data.iloc[:0]
+        df.row_count = len(data)
+        return df, written, rollup
+
+    def write_table_chunks(
+        self,
+        table: Dict[str, Any],
+        header,
+        estimate: int,
+        file_id: int,
+    ) -> Tuple[FitsTable, Dict[Path, Path], Optional[pd.DataFrame]]:
+        """
+        Writes a table in chunks of rows that fit into the memory budget.
+
+        Every partition is written by one `pq.ParquetWriter` that stays open
+        until the last chunk, so the file still has one fragment per
+        partition.
+
+        Args:
+            table (Dict[str, Any]): The config of the table.
+            header (astropy.io.fits.Header): Header of the table.
+            estimate (int): Estimated memory of the whole table.
+            file_id (int): Id of the file in FITS2DB_META.
+
+        Returns:
+            Tuple[FitsTable, Dict[Path, Path], Optional[pd.DataFrame]]: The
+                table, its fragments and its finest rollup.
+
+        Raises:
+            ValueError: If the date column can not be parsed.
+        """
+        table_name = str.lower(table["name"])
+        row_bytes = estimate // max(int(header.get("NAXIS2", 0)), 1)
+        chunk_rows = governor.chunk_rows(row_bytes)
+        log.warning(
+            f"{table_name} needs about {estimate / 1024**2:.0f} MB, "
+            f"processing it in chunks of {chunk_rows} rows"
+        )
+        writers = {}
+        written = {}
+        rollups = []
+        row_count = 0
+        result = None
+        try:
+            for chunk in self.file.iter_table(table["name"], chunk_rows):
+                nbytes = row_bytes * len(chunk.data)
+                governor.reserve(nbytes)
+                try:
+                    data = self.prepare_table(chunk, table, file_id)
+                    written.update(
+                        self.write_partitions(
+                            table_name,
+                            data,
+                            table["date_column"],
+                            file_id,
+                            writers,
+                        )
+                    )
+                    rollup = self.finest_rollup(table_name, data)
+                    if rollup is not None:
+                        rollups.append(rollup)
+                    row_count += len(data)
+                    result = FitsTable(
+                        name=chunk.name,
+                        meta=chunk.meta,
+                        data=data.iloc[:0],
+                        row_count=row_count,
+                    )
+                finally:
+                    governor.release(nbytes)
+        except ValueError:
+            for writer in writers.values():
+                writer.close()
+            self.discard_fragments(written)
+            raise
+        for writer in writers.values():
+            writer.close()
+        if result is None:
+            # A table without rows is small
+            return self.write_table(table, file_id)
+        rollup = None
+        if rollups:
+            # Buckets split between two chunks are merged
+            rollup = combine_rollup(
+                pd.concat(rollups, ignore_index=True)
+            ).astype(rollups[0].dtypes.to_dict())
+        return result, {table_name: written}, rollup
+
+    def write_tables(self, file_id: int) -> Optional[List[tuple]]:
+        """
+        Writes all configured tables of the file into temporary fragments.
+
+        Args:
+            file_id (int): Id of the file in FITS2DB_META.
+
+        Returns:
+            Optional[List[tuple]]: Table name, FitsTable and the written
+                fragments of the table and its rollups by dataset name, or
+                None if a table could not be prepared.
+        """
+        tables = []
+        faulty_tables = []
+        for table in self.config["fits_files"]["tables"]:
+            table_name = str.lower(table["name"])
+            date_column = table["date_column"]
+            try:
+                if governor.enabled:
+                    header = self.file.table_header(table["name"])
+                    estimate = estimate_table_bytes(header)
+                else:
+                    header, estimate = None, 0
+                if governor.try_reserve(estimate):
+                    try:
+                        df, written, rollup = self.write_table(table, file_id)
+                    finally:
+                        governor.release(estimate)
+                else:
+                    df, written, rollup = self.write_table_chunks(
+                        table, header, estimate, file_id
+                    )
+            except KeyError as err:
+                log.warning(err.args[0])
+                continue
+            except ValueError:
+                faulty_tables.append((table_name, date_column))
+                continue
+            resolutions = self.rollup_resolutions(table_name)
+            for position, resolution in enumerate(resolutions):
+                name = rollup_table(table_name, resolution)
+                if position:
+                    rollup = combine_rollup(rollup, resolution)
+                rollup["file_meta_id"] = file_id
+                written[name] = self.write_partitions(
+                    name, rollup, "timestamp", file_id
+                )
+            tables.append((table_name, df, written))
+
+        if faulty_tables:
+            log.error(f"Could not write File {self.file.file_path}")
+            for table_name, date_column in faulty_tables:
+                log.error(
+                    f"Error while parsing datetime column {date_column} in table {table_name}"
+                )
+            for _, _, written in tables:
+                for fragments in written.values():
+                    self.discard_fragments(fragments)
+            return None
+        return tables
+
+    def upload_file(self) -> None:
+        """
+        Writes the tables of the FITS file into the dataset.
+        """
+        with self.db_session() as session:
+            self.write_file_meta(session)
+            tables = self.write_tables(self.new_file.id)
+            if tables is None:
+                self.discard_file_meta(session)
+                return
+            for _, _, written in tables:
+                for name, fragments in written.items():
+                    self.commit_fragments(name, self.new_file.id, fragments)
+            with profiler.stage("metadata", file=self.file.file_name):
+                self.write_table_meta(
+                    [(table_name, df) for table_name, df, _ in tables],
+                    session,
+                    self.new_file.id,
+                )
+                session.commit()
+
+    def update_file(self) -> None:
+        """
+        Replaces the fragments of the FITS file in the dataset.
+
+        Only the partitions the file touched before or touches now are
+        changed.
+        """
+        with self.db_session() as session:
+            file_record = self.update_fits2db_meta(session)
+            current_tables = set(
+                session.execute(
+                    select(Fits2DbTableMeta.tablename).where(
+                        Fits2DbTableMeta.file_meta_id == file_record.id
+                    )
+                ).scalars()
+            )
+            tables = self.write_tables(file_record.id)
+            if tables is None:
+                return
+            for table_name, _, written in tables:
+                for name, fragments in written.items():
+                    self.commit_fragments(name, file_record.id, fragments)
+                current_tables.discard(table_name)
+            with profiler.stage("metadata", file=self.file.file_name):
+                self.write_table_meta(
+                    [(table_name, df) for table_name, df, _ in tables],
+                    session,
+                    file_record.id,
+                )
+                if self.config["fits_files"][
+                    "delete_rows_from_missing_tables"
+                ]:
+                    for table_name in current_tables:
+                        names = [table_name] + [
+                            rollup_table(table_name, resolution)
+                            for resolution in RESOLUTIONS
+                        ]
+                        for name in names:
+                            for fragment in self.fragments(
+                                name, file_record.id
+                            ):
+                                fragment.unlink()
+                        session.query(Fits2DbTableMeta).filter(
+                            Fits2DbTableMeta.file_meta_id == file_record.id,
+                            Fits2DbTableMeta.tablename == table_name,
+                        ).delete(synchronize_session=False)
+                        log.info(
+                            f"Deleted fragments of table '{table_name}' where file_meta_id = {file_record.id}"
+                        )
+                file_record.last_file_mutation = self.file.mdate
+                session.commit()
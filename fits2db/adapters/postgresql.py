@@ -0,0 +1,307 @@
+"""
+This module provides an interface for interacting with a PostgreSQL database using SQLAlchemy.
+The prepared tables are streamed into the temporary staging tables with
+`COPY ... FROM STDIN`, which is much faster than the INSERT statements
+`DataFrame.to_sql` uses by default.
+
+Classes:
+    PostgreSQL: Manages PostgreSQL database operations related to FITS files.
+"""
+
+import io
+import logging
+from typing import Iterable, List
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..config.config_model import ConfigType
+from ..fits.fits import FitsFile
+from .base import BaseLoader
+
+log = logging.getLogger("fits2db")
+
+
+# Characters with a special meaning in the text format of COPY
+COPY_ESCAPES = str.maketrans(
+    {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"}
+)
+
+
+def _copy_value(value) -> str:
+    """
+    Formats a value for the text format of COPY.
+
+    NULL is written as `\\N`, so an empty string stays an empty string.
+    Backslashes and the delimiter and line break characters are escaped.
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, str):
+        return value.translate(COPY_ESCAPES)
+    return str(value)
+
+
+def copy_from_stdin(table, conn, keys: List[str], data_iter: Iterable) -> int:
+    """
+    Insert method for `DataFrame.to_sql` writing rows with `COPY ... FROM STDIN`.
+
+    The rows of each chunk are serialized in the text format of COPY into
+    an in-memory buffer and streamed to the server in a single COPY
+    statement. Unlike unquoted CSV fields, NULL and empty strings stay
+    apart, like they do with the INSERT statements of `to_sql`.
+
+    Args:
+        table (pandas.io.sql.SQLTable): The table to write to.
+        conn (sqlalchemy.engine.Connection): The connection to write with.
+        keys (List[str]): The column names.
+        data_iter (Iterable): The rows of the chunk.
+
+    Returns:
+        int: The number of written rows.
+    """
+    buffer = io.StringIO()
+    rows = 0
+    for row in data_iter:
+        buffer.write("\t".join(map(_copy_value, row)))
+        buffer.write("\n")
+        rows += 1
+    buffer.seek(0)
+
+    preparer = conn.dialect.identifier_preparer
+    columns = ", ".join(preparer.quote(key) for key in keys)
+    name = preparer.quote(table.name)
+    if table.schema:
+        name = f"{preparer.quote_schema(table.schema)}.{name}"
+    dbapi_conn = conn.connection
+    with dbapi_conn.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {name} ({columns}) FROM STDIN WITH (FORMAT text)", buffer
+        )
+    return rows
+
+
+class PostgreSQL(BaseLoader):
+    """
+    Handles PostgreSQL database operations for managing FITS files.
+
+    The temporary tables are created by pandas and filled with
+    `COPY ... FROM STDIN` in chunks of `to_sql_options["chunksize"]` rows.
+    They are merged into the target tables with `INSERT ... SELECT`.
+
+    With `partition_by_file` the data tables are LIST partitioned by
+    `file_meta_id`, every file gets its own partition table
+    `<table>_p<file id>`.
+
+    Inherits from:
+        BaseLoader: A base class for loading data into databases.
+
+    Attributes:
+        config (ConfigType): Configuration details for database connection.
+        engine: SQLAlchemy engine connected to the PostgreSQL database.
+    """
+
+    to_sql_options = {"method": copy_from_stdin, "chunksize": 50000}
+    supports_file_batches = True
+    supports_file_partitions = True
+
+    def __init__(
+        self, config: ConfigType, file: FitsFile, bulk_load: bool = False
+    ) -> None:
+        """
+        Initializes the PostgreSQL class with database configuration and a FITS file.
+
+        Args:
+            config (ConfigType): Configuration details for database connection.
+            file (FitsFile): FITS file to be processed.
+            bulk_load (bool): Whether the loader is used for an initial bulk load.
+        """
+        self.config = config
+        db_url = self.create_db_url()
+        engine = create_engine(db_url)
+        super().__init__(db_url, engine, config, file, bulk_load)
+
+    def create_db_url(self) -> str:
+        """
+        Creates a database connection URL from the configuration.
+
+        Returns:
+            str: Connection URL for PostgreSQL.
+        """
+        log.debug("Start create db url")
+        user = self.config["database"]["user"]
+        password = self.config["database"]["password"]
+        host = self.config["database"]["host"]
+        port = self.config["database"]["port"] or 5432
+        db_name = self.config["database"]["db_name"]
+        url = (
+            f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{db_name}"
+        )
+        log.debug("Created url")
+        log.info(url)
+        return url
+
+    def check_table_exists(self, table_name: str) -> bool:
+        """
+        Checks if a table exists in the current schema of the database.
+
+        Args:
+            table_name (str): The name of the table to check.
+
+        Returns:
+            bool: True if the table exists, False otherwise.
+        """
+        with self.connect() as conn:
+            query = text(
+                "SELECT 1 FROM information_schema.tables "
+                "WHERE table_schema = current_schema() "
+                "AND table_name = :table_name"
+            )
+            result = conn.execute(query, {"table_name": table_name})
+            return result.fetchone() is not None
+
+    def rename_table(self, old_name: str, new_name: str) -> None:
+        """
+        Renames a table in the database and adds an auto-incrementing primary key.
+
+        A table partitioned by file can not be made from an existing table,
+        it is created with the columns of the temporary table and the
+        primary key (id, file_meta_id) and the rows are copied into the
+        partitions of their files.
+
+        Args:
+            old_name (str): The current name of the table.
+            new_name (str): The new name for the table.
+        """
+        if self.creates_partitions(new_name):
+            self._create_partitioned_table(old_name, new_name)
+            return
+        with self.begin() as conn:
+            try:
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {self.quote(old_name)} "
+                        f"RENAME TO {self.quote(new_name)}"
+                    )
+                )
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {self.quote(new_name)} "
+                        "ADD COLUMN id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY"
+                    )
+                )
+                log.info(
+                    f"Table renamed from {old_name} to {new_name} and added primamry key id."
+                )
+            except SQLAlchemyError as err:
+                log.error(err)
+                raise
+
+    def _create_partitioned_table(self, old_name: str, new_name: str) -> None:
+        columns = ", ".join(
+            self.quote(name) for name in self._fetch_column_details(old_name)
+        )
+        with self.begin() as conn:
+            try:
+                conn.execute(
+                    text(
+                        f"CREATE TABLE {self.quote(new_name)} "
+                        f"(LIKE {self.quote(old_name)} INCLUDING DEFAULTS, "
+                        "id BIGINT GENERATED BY DEFAULT AS IDENTITY, "
+                        "PRIMARY KEY (id, file_meta_id)) "
+                        "PARTITION BY LIST (file_meta_id)"
+                    )
+                )
+                file_ids = conn.execute(
+                    text(
+                        f"SELECT DISTINCT file_meta_id FROM {self.quote(old_name)}"
+                    )
+                ).scalars()
+                for file_id in list(file_ids):
+                    self.add_file_partition(conn, new_name, file_id)
+                conn.execute(
+                    text(
+                        f"INSERT INTO {self.quote(new_name)} ({columns}) "
+                        f"SELECT {columns} FROM {self.quote(old_name)}"
+                    )
+                )
+                conn.execute(text(f"DROP TABLE {self.quote(old_name)}"))
+                log.info(
+                    f"Created {new_name} partitioned by file from {old_name}."
+                )
+            except SQLAlchemyError as err:
+                log.error(err)
+                raise
+
+    def check_partitioned(self, table_name: str) -> bool:
+        """
+        Checks if a table is a partitioned table.
+
+        Args:
+            table_name (str): The name of the table to check.
+
+        Returns:
+            bool: True if the table is partitioned by file.
+        """
+        with self.connect() as conn:
+            query = text(
+                "SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass(:table_name)"
+            )
+            result = conn.execute(
+                query, {"table_name": self.quote(table_name)}
+            )
+            return result.fetchone() is not None
+
+    def _partition_name(self, table_name: str, file_id: int) -> str:
+        return self.quote(f"{str.lower(table_name)}_p{int(file_id)}")
+
+    def add_file_partition(self, conn, table_name: str, file_id: int) -> None:
+        """
+        Creates the partition table of a file if it is missing.
+
+        Args:
+            conn: The connection or session to execute it with.
+            table_name (str): The name of the partitioned table.
+            file_id (int): Id of the file in FITS2DB_META.
+        """
+        conn.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS "
+                f"{self._partition_name(table_name, file_id)} "
+                f"PARTITION OF {self.quote(table_name)} "
+                f"FOR VALUES IN ({int(file_id)})"
+            )
+        )
+
+    def truncate_file_partition(
+        self, conn, table_name: str, file_id: int
+    ) -> None:
+        """
+        Empties the partition table of a file.
+
+        Args:
+            conn: The connection or session to execute it with.
+            table_name (str): The name of the partitioned table.
+            file_id (int): Id of the file in FITS2DB_META.
+        """
+        conn.execute(
+            text(f"TRUNCATE TABLE {self._partition_name(table_name, file_id)}")
+        )
+
+    def drop_file_partition(self, conn, table_name: str, file_id: int) -> None:
+        """
+        Drops the partition table of a file if it exists.
+
+        Args:
+            conn: The connection or session to execute it with.
+            table_name (str): The name of the partitioned table.
+            file_id (int): Id of the file in FITS2DB_META.
+        """
+        conn.execute(
+            text(
+                "DROP TABLE IF EXISTS "
+                f"{self._partition_name(table_name, file_id)}"
+            )
+        )
+        log.info(f"Dropped partition {file_id} of {table_name}")
@@ -0,0 +1,195 @@
+"""
+This module provides an interface for interacting with a SQLite database using SQLAlchemy.
+SQLite needs no server, which makes it a fast embedded backend for small
+deployments, local analysis and benchmarks.
+
+Classes:
+    SQLite: Manages SQLite database operations related to FITS files.
+"""
+
+import logging
+from typing import List
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..config.config_model import ConfigType
+from ..fits.fits import FitsFile
+from .base import BaseLoader
+
+log = logging.getLogger("fits2db")
+
+
+class SQLite(BaseLoader):
+    """
+    Handles SQLite database operations for managing FITS files.
+
+    The connections are tuned for bulk loading: the database runs in WAL
+    mode, temporary data is kept in memory and during a bulk load, e.g.
+    `build`, `synchronous` is turned off. The temporary tables are written
+    with `executemany` in batches of `to_sql_options["chunksize"]` rows.
+
+    Inherits from:
+        BaseLoader: A base class for loading data into databases.
+
+    Attributes:
+        config (ConfigType): Configuration details for database connection.
+        engine: SQLAlchemy engine connected to the SQLite database.
+    """
+
+    to_sql_options = {"chunksize": 10000}
+    supports_file_batches = True
+
+    def __init__(
+        self, config: ConfigType, file: FitsFile, bulk_load: bool = False
+    ) -> None:
+        """
+        Initializes the SQLite class with database configuration and a FITS file.
+
+        Args:
+            config (ConfigType): Configuration details for database connection.
+                `db_name` is the path to the database file.
+            file (FitsFile): FITS file to be processed.
+            bulk_load (bool): Whether the loader is used for an initial bulk load.
+        """
+        self.config = config
+        db_url = self.create_db_url()
+        engine = create_engine(db_url, connect_args={"timeout": 60})
+        super().__init__(db_url, engine, config, file, bulk_load)
+        event.listen(self.engine, "connect", self._set_pragmas)
+
+    def create_db_url(self) -> str:
+        """
+        Creates a database connection URL from the configuration.
+
+        Returns:
+            str: Connection URL for SQLite.
+        """
+        log.debug("Start create db url")
+        db_name = self.config["database"]["db_name"]
+        url = f"sqlite:///{db_name}"
+        log.debug("Created url")
+        log.info(url)
+        return url
+
+    def _set_pragmas(self, dbapi_connection, connection_record) -> None:
+        """
+        Applies the bulk load settings to every new connection.
+        """
+        synchronous = "OFF" if self.bulk_load else "NORMAL"
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={synchronous}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-65536")
+        cursor.close()
+
+    def begin_batch(self, conn: Connection):
+        """
+        Begins the outer transaction of a file batch.
+
+        pysqlite only emits BEGIN before DML statements and commits before
+        others, which breaks savepoints and transactional DDL. The driver
+        transaction handling is turned off for the batch connection and
+        BEGIN is emitted explicitly.
+
+        Args:
+            conn (Connection): The connection of the batch.
+
+        Returns:
+            The transaction of the batch.
+        """
+        conn.connection.driver_connection.isolation_level = None
+        transaction = conn.begin()
+        conn.exec_driver_sql("BEGIN")
+        return transaction
+
+    def alter_table_statements(
+        self, table_name: str, clauses: List[str]
+    ) -> List[str]:
+        """
+        SQLite allows only one clause per ALTER TABLE statement.
+
+        Args:
+            table_name (str): The name of the table to alter.
+            clauses (List[str]): The clauses of the ALTER TABLE statements.
+
+        Returns:
+            List[str]: One statement per clause.
+        """
+        return [
+            f"ALTER TABLE {self.quote(table_name)} {clause}"
+            for clause in clauses
+        ]
+
+    def write_file_meta(self, session: Session) -> None:
+        """
+        Writes metadata about the FITS file to the database.
+
+        SQLite allows only one writer at a time, so the row is committed right
+        away instead of holding the write lock while the tables of the file
+        are written on other connections. `discard_file_meta` removes the row
+        again if the upload fails. In a file batch the commit only releases
+        the savepoint of the session.
+        """
+        super().write_file_meta(session)
+        session.commit()
+
+    def check_table_exists(self, table_name: str) -> bool:
+        """
+        Checks if a table exists in the database.
+
+        Args:
+            table_name (str): The name of the table to check.
+
+        Returns:
+            bool: True if the table exists, False otherwise.
+        """
+        with self.connect() as conn:
+            query = text(
+                "SELECT name FROM sqlite_master "
+                "WHERE type = 'table' AND name = :table_name"
+            )
+            result = conn.execute(query, {"table_name": table_name})
+            return result.fetchone() is not None
+
+    def rename_table(self, old_name: str, new_name: str) -> None:
+        """
+        Renames a table in the database and adds an auto-incrementing primary key.
+
+        SQLite can not add a primary key to an existing table, so the table is
+        recreated with an `id` column and the rows are copied in one transaction.
+
+        Args:
+            old_name (str): The current name of the table.
+            new_name (str): The new name for the table.
+        """
+        columns = self._fetch_column_details(old_name)
+        column_defs = ", ".join(
+            f"{self.quote(name)} {col_type.compile(dialect=self.engine.dialect)}"
+            for name, col_type in columns.items()
+        )
+        column_names = ", ".join(self.quote(name) for name in columns)
+        with self.begin() as conn:
+            try:
+                conn.execute(
+                    text(
+                        f"CREATE TABLE {self.quote(new_name)} "
+                        f"(id INTEGER PRIMARY KEY AUTOINCREMENT, {column_defs})"
+                    )
+                )
+                conn.execute(
+                    text(
+                        f"INSERT INTO {self.quote(new_name)} ({column_names}) "
+                        f"SELECT {column_names} FROM {self.quote(old_name)}"
+                    )
+                )
+                conn.execute(text(f"DROP TABLE {self.quote(old_name)}"))
+                log.info(
+                    f"Table renamed from {old_name} to {new_name} and added primamry key id."
+                )
+            except SQLAlchemyError as err:
+                log.error(err)
+                raise
@@ -0,0 +1,326 @@
+"""
+Local on-disk cache of query results.
+
+Results of `DBWriter.read` are stored as Parquet files keyed by table,
+columns, time window and rollup resolution. An entry stays valid until
+`fits2db_meta.last_db_update` shows that a file whose rows overlap its
+window was ingested, updated or removed. When the cache grows beyond its
+size cap the least recently used entries are evicted.
+
+`QueryCache.validate` reads the small `fits2db_meta` table and, only for
+files that changed since the last validation, the time range they wrote to
+the cached tables. Warm reads are then served without querying the data
+tables at all.
+
+!!! note "Example usage"
+    ```python
+    from fits2db.adapters import DBWriter
+    from fits2db.cache import QueryCache
+
+    reader = DBWriter(configs)
+    cache = QueryCache("~/.cache/fits2db", max_bytes=2 * 1024**3)
+    cache.validate(reader)
+    df = cache.get("housekeeping", columns, start, end)
+    if df is None:
+        df = reader.read("housekeeping", start, end, columns)
+        cache.put("housekeeping", columns, start, end, df)
+    ```
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+from .adapters.base import DateLike
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+log = logging.getLogger("fits2db")
+
+DEFAULT_MAX_BYTES = 1024**3
+STATE_NAME = "state.json"
+# Rollup buckets start up to a day before the first row of a file
+RANGE_MARGIN = pd.Timedelta("1D")
+
+
+def _timestamp(value: Optional[DateLike]) -> Optional[str]:
+    return None if value is None else pd.Timestamp(value).isoformat()
+
+
+def _write_json(path: Path, data: dict) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+class QueryCache:
+    """
+    Parquet cache of query results in a local directory.
+
+    Every entry is a `<key>.parquet` file with a `<key>.json` sidecar
+    describing the query. The modification time of the Parquet file is the
+    last use of the entry. `state.json` keeps the `last_db_update` of every
+    file seen at the last validation and the time range each file wrote to
+    the cached tables.
+
+    Attributes:
+        root (Path): Directory of the cache.
+        max_bytes (int): Size cap of the Parquet files.
+    """
+
+    def __init__(
+        self, root: Union[str, Path], max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> None:
+        """
+        Initializes the cache and creates its directory.
+
+        Args:
+            root (Union[str, Path]): Directory of the cache.
+            max_bytes (int): Size cap of the cached results.
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+        """
+        if pyarrow is None:
+            raise ImportError(
+                "The query cache needs pyarrow, install it with "
+                "`pip install fits2db[parquet]`"
+            )
+        self.root = Path(root).expanduser()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(
+        table: str,
+        columns: Optional[List[str]],
+        start: Optional[DateLike],
+        end: Optional[DateLike],
+        resolution: Optional[str] = None,
+    ) -> str:
+        """Returns the key of a query."""
+        query = {
+            "table": str.lower(table),
+            "columns": None if columns is None else list(columns),
+            "start": _timestamp(start),
+            "end": _timestamp(end),
+            "resolution": resolution,
+        }
+        text = json.dumps(query, sort_keys=True)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(
+        self,
+        table: str,
+        columns: Optional[List[str]],
+        start: Optional[DateLike],
+        end: Optional[DateLike],
+        resolution: Optional[str] = None,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Returns a cached result, None if the query is not cached.
+
+        Args:
+            table (str): The name of the table.
+            columns (Optional[List[str]]): The queried columns.
+            start (Optional[DateLike]): Start of the window.
+            end (Optional[DateLike]): End of the window.
+            resolution (Optional[str]): Rollup resolution of the query.
+
+        Returns:
+            Optional[pd.DataFrame]: The cached rows.
+        """
+        key = self.key(table, columns, start, end, resolution)
+        path = self.root / f"{key}.parquet"
+        try:
+            df = pd.read_parquet(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        log.debug(f"Query cache hit for {table} between {start} and {end}")
+        return df
+
+    def put(
+        self,
+        table: str,
+        columns: Optional[List[str]],
+        start: Optional[DateLike],
+        end: Optional[DateLike],
+        df: pd.DataFrame,
+        resolution: Optional[str] = None,
+    ) -> None:
+        """
+        Stores a query result and evicts old entries above the size cap.
+
+        Args:
+            table (str): The name of the table.
+            columns (Optional[List[str]]): The queried columns.
+            start (Optional[DateLike]): Start of the window.
+            end (Optional[DateLike]): End of the window.
+            df (pd.DataFrame): The rows to cache.
+            resolution (Optional[str]): Rollup resolution of the query.
+        """
+        key = self.key(table, columns, start, end, resolution)
+        path = self.root / f"{key}.parquet"
+        tmp = self.root / f".{key}.parquet.tmp"
+        df.to_parquet(tmp, index=False)
+        _write_json(
+            self.root / f"{key}.json",
+            {
+                "table": str.lower(table),
+                "start": _timestamp(start),
+                "end": _timestamp(end),
+                "resolution": resolution,
+            },
+        )
+        os.replace(tmp, path)
+        self.evict()
+
+    def entries(self) -> Dict[str, dict]:
+        """Returns the description of every entry by its key."""
+        entries = {}
+        for path in self.root.glob("*.json"):
+            if path.name == STATE_NAME:
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entries[path.stem] = json.load(f)
+            except (FileNotFoundError, ValueError):
+                continue
+        return entries
+
+    def remove(self, key: str) -> None:
+        """Removes an entry."""
+        for suffix in (".parquet", ".json"):
+            try:
+                (self.root / f"{key}{suffix}").unlink()
+            except FileNotFoundError:
+                pass
+
+    def size(self) -> int:
+        """Returns the size of the cached results in bytes."""
+        return sum(path.stat().st_size for path in self.root.glob("*.parquet"))
+
+    def evict(self) -> None:
+        """Removes the least recently used entries above the size cap."""
+        files = []
+        for path in self.root.glob("*.parquet"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path.stem))
+        total = sum(size for _, size, _ in files)
+        for _, size, key in sorted(files):
+            if total <= self.max_bytes:
+                break
+            self.remove(key)
+            total -= size
+            log.debug(f"Evicted query cache entry {key}")
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.root / STATE_NAME, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"files": {}, "ranges": {}}
+
+    def validate(self, reader) -> int:
+        """
+        Removes the entries whose window overlaps a changed file.
+
+        The `last_db_update` of every file in `fits2db_meta` is compared with
+        the last validation. For changed and removed files the time range
+        they wrote before the change is taken from the state, for new and
+        changed files the current range is queried from the cached tables.
+
+        Args:
+            reader (DBWriter): Reader of the database.
+
+        Returns:
+            int: The number of removed entries.
+        """
+        state = self._load_state()
+        meta = reader.get_db_file_infos()
+        files = {}
+        if meta is not None:
+            files = {
+                str(row.id): _timestamp(row.last_db_update)
+                for row in meta.itertuples()
+            }
+        previous = state["files"]
+        changed = [
+            file_id
+            for file_id, updated in files.items()
+            if previous.get(file_id) != updated
+        ]
+        removed = [file_id for file_id in previous if file_id not in files]
+        entries = self.entries()
+        tables = {entry["table"] for entry in entries.values()}
+        ranges = state["ranges"]
+        if not changed and not removed and tables.issubset(ranges):
+            return 0
+
+        stale = {table: [] for table in tables}
+        for table in tables:
+            if table not in ranges:
+                # First validation with entries of this table, the ranges of
+                # the files before their change are unknown
+                file_ids = None
+                if changed or removed:
+                    stale[table].append([None, None])
+            else:
+                # Where the changed files wrote before
+                for file_id in changed + removed:
+                    if file_id in ranges[table]:
+                        stale[table].append(ranges[table].pop(file_id))
+                file_ids = [int(file_id) for file_id in changed]
+                if not file_ids:
+                    continue
+            # Where the new and changed files write now
+            try:
+                current = reader.file_ranges(table, file_ids)
+            except Exception as err:
+                log.warning(f"Could not read the file ranges of {table}")
+                log.warning(err)
+                ranges.pop(table, None)
+                stale[table].append([None, None])
+                continue
+            known = ranges.setdefault(table, {})
+            for row in current.itertuples():
+                span = [_timestamp(row.start), _timestamp(row.end)]
+                known[str(row.file_meta_id)] = span
+                if file_ids is not None:
+                    stale[table].append(span)
+
+        removed_entries = 0
+        for key, entry in entries.items():
+            spans = stale[entry["table"]]
+            if any(self._overlaps(entry, span) for span in spans):
+                self.remove(key)
+                removed_entries += 1
+        state["files"] = files
+        _write_json(self.root / STATE_NAME, state)
+        log.info(f"Removed {removed_entries} outdated query cache entries")
+        return removed_entries
+
+    @staticmethod
+    def _overlaps(entry: dict, span: list) -> bool:
+        """Checks if the window of an entry overlaps the range of a file."""
+        first, last = span
+        if first is not None and entry["end"] is not None:
+            if pd.Timestamp(first) - RANGE_MARGIN > pd.Timestamp(entry["end"]):
+                return False
+        if last is not None and entry["start"] is not None:
+            if pd.Timestamp(last) < pd.Timestamp(entry["start"]):
+                return False
+        return True
@@ -1,5 +1,5 @@
 import click
-from .helper_func import tables, files, build, init, update
+from .helper_func import tables, files, build, init, update, plan
 from .utils import set_verbosity
 
 
@@ -40,6 +40,7 @@ cli.add_command(tables)
 cli.add_command(build)
 cli.add_command(init)
 cli.add_command(update)
+cli.add_command(plan)
 
 if __name__ == "__main__":
     cli()
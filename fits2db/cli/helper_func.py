@@ -1,7 +1,66 @@
+import json
+
 import click
-from .utils import validate_output_filename
+from .utils import validate_memory_size, validate_output_filename
 from ..core import Fits2db, get_all_fits
 from ..config import generate_config
+from ..memory import governor
+from ..profiling import profiler
+
+
+def profile_options(func):
+    """Adds the --profile, --profile-file and --compare-profile options to a command."""
+    func = click.option(
+        "--compare-profile",
+        default=None,
+        type=click.Path(exists=True, dir_okay=False),
+        help="Profile of an earlier run written with --profile, the speedup in rows/s over it is reported.",
+    )(func)
+    func = click.option(
+        "--profile-file",
+        default="fits2db_profile.json",
+        type=click.Path(dir_okay=False),
+        help="JSON file the profile is written to if --profile is set.",
+    )(func)
+    func = click.option(
+        "--profile",
+        default=False,
+        is_flag=True,
+        help="Time each ingest stage and print a summary at the end.",
+    )(func)
+    return func
+
+
+def memory_option(func):
+    """Adds the --max-memory option to a command."""
+    return click.option(
+        "--max-memory",
+        default=None,
+        callback=validate_memory_size,
+        help="Memory budget of the ingest, e.g. 4G. Tables that do not fit are processed in chunks.",
+    )(func)
+
+
+def report_profile(profile_file, compare_profile=None):
+    """
+    Prints the profile summary and writes it as JSON.
+
+    With a `compare_profile` the speedup of the run and of every stage over
+    that earlier run is added to the summary.
+    """
+    if compare_profile is not None:
+        with open(compare_profile, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        profiler.note("baseline_profile", compare_profile)
+        profiler.note("speedup_vs_baseline", profiler.speedup(baseline))
+        previous = baseline.get("notes", {}).get("bulk_session")
+        if previous is not None or "bulk_session" in profiler.notes:
+            # Shows which run had the MySQL bulk session profile
+            profiler.note("baseline_bulk_session", previous)
+    profiler.disable()
+    click.echo(profiler.report())
+    profiler.dump(profile_file)
+    click.echo(f"Profile written to {profile_file}")
 
 
 @click.command()
@@ -80,10 +139,21 @@ def tables(config_path, matrix, csv, excel, filename):
     is_flag=True,
     help="Rebuild entire database and drops old tables. If false it will error if there is already a able with the same name",
 )
-def build(config_path, reset):
+@profile_options
+@memory_option
+def build(
+    config_path, reset, profile, profile_file, compare_profile, max_memory
+):
     """Upsert all tables defnied in config.yml to databse"""
     fits = Fits2db(config_path)
-    fits.build(reset)
+    governor.configure(max_memory)
+    if profile:
+        profiler.enable()
+    try:
+        fits.build(reset)
+    finally:
+        if profile:
+            report_profile(profile_file, compare_profile)
 
 
 @click.command()
@@ -95,10 +165,57 @@ def build(config_path, reset):
     is_flag=True,
     help="Force overwrite of files in config. Accepts skipping invalid files",
 )
-def update(config_path, force):
+@click.option(
+    "--files-per-transaction",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of files committed in one transaction, each file is rolled back on its own if it fails",
+)
+@profile_options
+@memory_option
+def update(
+    config_path,
+    force,
+    files_per_transaction,
+    profile,
+    profile_file,
+    compare_profile,
+    max_memory,
+):
     """Upsert all tables defnied in config.yml to database"""
     fits = Fits2db(config_path)
-    fits.update_db(force=force)
+    governor.configure(max_memory)
+    if profile:
+        profiler.enable()
+    try:
+        fits.update_db(
+            force=force, files_per_transaction=files_per_transaction
+        )
+    finally:
+        if profile:
+            report_profile(profile_file, compare_profile)
+
+
+@click.command()
+@click.argument("config_path", default=".", type=click.Path(exists=True))
+@click.option(
+    "-u",
+    "--update",
+    default=False,
+    is_flag=True,
+    help="Plan an update with the new and changed files instead of a build",
+)
+@click.option(
+    "--profile-file",
+    default=["fits2db_profile.json"],
+    multiple=True,
+    type=click.Path(dir_okay=False),
+    help="Profile of a previous run written with --profile, used to estimate the duration. Can be repeated.",
+)
+def plan(config_path, update, profile_file):
+    """Shows what build or update would ingest without writing to the database"""
+    fits = Fits2db(config_path)
+    click.echo(fits.plan(update=update, profile_files=profile_file).report())
 
 
 @click.command()
@@ -1,6 +1,7 @@
 import click
 from typing import Optional
 from ..log import configure_logger, LOG_LEVELS
+from ..memory import parse_size
 
 
 def validate_output_filename(
@@ -32,6 +33,31 @@ def validate_output_filename(
     return value
 
 
+def validate_memory_size(
+    ctx: click.Context, param: Optional[click.Parameter], value: Optional[str]
+) -> Optional[int]:
+    """
+    Parse a memory size like `4G` into bytes.
+
+    Args:
+        ctx (click.Context): The Click context object.
+        param (Optional[click.Parameter]): The Click parameter object (unused).
+        value (Optional[str]): The size provided by the user.
+
+    Raises:
+        click.BadParameter: If the size can not be parsed.
+
+    Returns:
+        Optional[int]: The size in bytes, None if not set.
+    """
+    if value is None:
+        return None
+    try:
+        return parse_size(value)
+    except ValueError as err:
+        raise click.BadParameter(str(err))
+
+
 def set_verbosity(
     ctx: click.Context, param: Optional[click.Parameter], value: int
 ) -> int:
@@ -7,31 +7,75 @@ from typing_extensions import Self
 
 from pydantic import BaseModel, StrictStr, FilePath, model_validator
 
+from ..rollup import RESOLUTIONS
 
-ACCEPTABLE_TYPES = {"mysql"}
+
+ACCEPTABLE_TYPES = {"mysql", "parquet", "postgresql", "sqlite"}
+
+# Embedded databases need no host or credentials, db_name is the file path
+# (the dataset directory for parquet)
+EMBEDDED_TYPES = {"parquet", "sqlite"}
+
+# Databases whose data tables can be LIST partitioned by file_meta_id
+PARTITIONED_TYPES = {"mysql", "postgresql"}
+
+# append inserts the rows of a file, update and ignore merge them on the
+# unique key (file_meta_id, row_ordinal)
+MERGE_MODES = ("append", "update", "ignore")
+
+
+class BulkSessionConfig(BaseModel):
+    """Session settings of the MySQL connections during a bulk load."""
+
+    unique_checks: bool = False
+    foreign_key_checks: bool = False
+    # Turning off the binary log needs the SYSTEM_VARIABLES_ADMIN privilege
+    # and keeps the rows from the replicas
+    sql_log_bin: bool = True
+    bulk_insert_buffer_size: Optional[int] = 256 * 1024**2
+    # Rows per executemany batch of the temporary tables, all batches of a
+    # table are written in one transaction
+    chunksize: Optional[int] = 50000
 
 
 class DatabaseConfig(BaseModel):
     """Database configuration."""
 
     type: StrictStr
-    host: StrictStr
+    host: Optional[StrictStr] = None
     user: Optional[StrictStr] = None
     password: Optional[StrictStr] = None
     token: Optional[StrictStr] = None
     port: Optional[int] = None
     db_name: Optional[StrictStr] = None
+    bulk_session: Optional[BulkSessionConfig] = None
+    # One partition per file in the data tables
+    partition_by_file: Optional[bool] = False
 
     @model_validator(mode="after")
     def validate_database(self) -> Self:
         """Validate if supported db type"""
         if self.type.lower() not in ACCEPTABLE_TYPES:
             raise ValueError(f"{self.type} is not a supported db")
+        if self.bulk_session is not None and self.type.lower() != "mysql":
+            raise ValueError("bulk_session is only supported for mysql.")
+        if self.partition_by_file and self.type.lower() not in PARTITIONED_TYPES:
+            raise ValueError(
+                "partition_by_file is only supported for mysql and postgresql."
+            )
         return self
 
     @model_validator(mode="after")
     def check_cedentials(self) -> Self:
         """Validate credentials"""
+        if self.type.lower() in EMBEDDED_TYPES:
+            if not self.db_name:
+                raise ValueError(f"db_name must be the database file for {self.type}.")
+            return self
+
+        if not self.host:
+            raise ValueError("host must be provided.")
+
         user = self.user
         password = self.password
         token = self.token
@@ -49,6 +93,27 @@ class DatabaseConfig(BaseModel):
         return self
 
 
+class EnumConfig(BaseModel):
+    """Mapping of the string values of columns to small integer codes."""
+
+    columns: list[StrictStr]
+    values: dict[StrictStr, int]
+    default: int = 0
+
+    @model_validator(mode="after")
+    def validate_codes(self) -> Self:
+        """Validate that the codes fit into an unsigned TINYINT"""
+        codes = list(self.values.values()) + [self.default]
+        if any(code < 0 or code > 255 for code in codes):
+            raise ValueError("Enum codes must be between 0 and 255.")
+        labels = [str.lower(label.strip()) for label in self.values]
+        if len(set(labels)) != len(labels):
+            raise ValueError(
+                f"Enum values {list(self.values)} differ only in case."
+            )
+        return self
+
+
 class TableConfig(BaseModel):
     """Table configuration."""
 
@@ -57,6 +122,22 @@ class TableConfig(BaseModel):
     description: Optional[StrictStr] = None
     columns: Optional[list] = None # No functionality yet
     date_column: Optional[str] = None
+    rollups: Optional[list[StrictStr]] = None
+    enums: Optional[list[EnumConfig]] = None
+
+    @model_validator(mode="after")
+    def validate_rollups(self) -> Self:
+        """Validate the rollup resolutions"""
+        if not self.rollups:
+            return self
+        unknown = set(self.rollups) - set(RESOLUTIONS)
+        if unknown:
+            raise ValueError(
+                f"Unknown rollups {sorted(unknown)}, use {list(RESOLUTIONS)}"
+            )
+        if self.date_column is None:
+            raise ValueError(f"Rollups of {self.name} need a date_column.")
+        return self
 
 
 class FitsConfig(BaseModel):
@@ -65,6 +146,18 @@ class FitsConfig(BaseModel):
     paths: list
     tables: list[TableConfig]
     delete_rows_from_missing_tables: Optional[bool] = False
+    # Local directory the prepared tables are spooled to before loading
+    spool_dir: Optional[StrictStr] = None
+    merge_mode: Optional[StrictStr] = "append"
+
+    @model_validator(mode="after")
+    def validate_merge_mode(self) -> Self:
+        """Validate the merge mode"""
+        if self.merge_mode is not None and self.merge_mode not in MERGE_MODES:
+            raise ValueError(
+                f"Unknown merge_mode {self.merge_mode}, use {list(MERGE_MODES)}"
+            )
+        return self
 
 
 class ConfigFileValidator(BaseModel):
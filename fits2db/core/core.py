@@ -2,16 +2,38 @@
 
 import logging
 import os
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import pandas as pd
+from sqlalchemy.exc import SQLAlchemyError
 from tqdm import tqdm
 
 from ..adapters import DBWriter
+from ..adapters.base import DateLike
 from ..config import get_configs
-from ..fits import FitsFile
+from ..fits import FitsFile, is_fits_file
+from ..plan import (
+    SCHEMALESS_TYPES,
+    IngestPlan,
+    load_throughput,
+    plan_ingest,
+    table_rollups,
+    union_schema,
+)
+from ..profiling import profiler
+from ..spool import Spool, SpooledFile
 
 # Use the configured logger
 log = logging.getLogger("fits2db")
@@ -19,7 +41,7 @@ log = logging.getLogger("fits2db")
 
 def get_all_fits(paths: list) -> list:
     """Searches recursive throught all folders of given list of paths for fits files,
-     and gives them back.
+     and gives them back. Compressed files with one of the `FITS_SUFFIXES` are included.
     Args:
         paths (list): A list of paths to search recursivly for fits files.
 
@@ -31,9 +53,9 @@ def get_all_fits(paths: list) -> list:
         if os.path.isdir(path):
             for root, _, files in os.walk(path):
                 for file in files:
-                    if file.endswith(".fits"):
+                    if is_fits_file(file):
                         all_fits_files.append(os.path.join(root, file))
-        elif os.path.isfile(path) and path.endswith(".fits"):
+        elif os.path.isfile(path) and is_fits_file(path):
             all_fits_files.append(path)
     return all_fits_files
 
@@ -83,6 +105,8 @@ class Fits2db:
         self.config_path = Path(config_path)
         self.configs = get_configs(config_path)
         self.fits_file_paths = self.get_file_names()
+        spool_dir = self.configs["fits_files"].get("spool_dir")
+        self.spool = Spool(spool_dir) if spool_dir else None
 
     def get_file_names(self) -> list[str]:
         """
@@ -96,6 +120,31 @@ class Fits2db:
         log.info("run function")
         return list(dict.fromkeys(get_all_fits(paths)))
 
+    def open_file(self, path: Path) -> Union[FitsFile, SpooledFile]:
+        """
+        Opens a FITS file for loading, from the spool if one is configured.
+
+        A file that is not spooled yet is read once and its prepared tables
+        are written to the spool, the loaders then replay them from there.
+
+        Args:
+            path (Path): Path of the FITS file.
+
+        Returns:
+            Union[FitsFile, SpooledFile]: The file to pass to `DBWriter`.
+        """
+        if self.spool is None:
+            return FitsFile(path)
+        table_configs = self.configs["fits_files"]["tables"]
+        file = self.spool.open(path, table_configs)
+        if file is None:
+            fits_file = FitsFile(path)
+            try:
+                file = self.spool.write(fits_file, table_configs)
+            finally:
+                fits_file.close()
+        return file
+
     def get_file_infos(self) -> pd.DataFrame:
         """
         Generate metadata for each FITS file, including filename, path, and last modification date.
@@ -177,6 +226,28 @@ class Fits2db:
 
         return df
 
+    def evolve_schema(self, paths: List[str]) -> None:
+        """
+        Applies the union schema of files to the database before they are loaded.
+
+        The headers of all files are scanned first, then every table gets the
+        columns of all files in one ALTER TABLE. Tables that would change
+        while the files are loaded are created with all columns. So no table
+        is altered between the files.
+
+        Args:
+            paths (List[str]): Paths of the files that are loaded next.
+        """
+        if not paths:
+            return
+        if str.lower(self.configs["database"]["type"]) in SCHEMALESS_TYPES:
+            return
+        with profiler.stage("schema_scan"):
+            tables = union_schema(paths, self.configs["fits_files"]["tables"])
+        added = DBWriter(self.configs).evolve_schema(tables)
+        for table, columns in added.items():
+            log.info(f"Added {len(columns)} columns to {table}: {columns}")
+
     def build(self, reset: bool = True) -> None:
         """
         Build the database from the FITS files, optionally resetting the database first.
@@ -195,15 +266,19 @@ class Fits2db:
             else:
                 print("Invalid input. Please enter yes/no.")
         log.debug(f"Start building db with reset = {reset}")
+        profiler.reset()
         writer = DBWriter(self.configs)
         if reset:
             writer.clean_db()
             log.debug("Clean db success start uploading files")
+        self.evolve_schema(self.fits_file_paths)
         for path in tqdm(self.fits_file_paths):
             path = Path(path)
             try:
-                file = FitsFile(path)
-                writer = DBWriter(self.configs, file)
+                with profiler.stage("open_file", file=path.name) as stage:
+                    file = self.open_file(path)
+                    stage.count(nbytes=file.file_size)
+                writer = DBWriter(self.configs, file, bulk_load=True)
                 writer.upsert()
 
             except ValueError as err:
@@ -239,9 +314,17 @@ class Fits2db:
             ["filename", "filepath", "last_file_mutation_file"]
         ].rename(columns={"last_file_mutation_file": "last_file_mutation"})
 
-    def update_db(self, force=False) -> None:
+    def update_db(self, force=False, files_per_transaction: int = 1) -> None:
         """
         Update the database with new or modified FITS files.
+
+        Args:
+            force (bool): Whether to update all files already in the database.
+            files_per_transaction (int): Number of files committed together.
+                The files of a group are loaded in savepoints of one
+                transaction, a failing file is rolled back on its own.
+                Databases without transactional schema changes commit
+                every file.
         """
         self.file_infos = self.get_file_infos()
         log.info(self.file_infos)
@@ -250,27 +333,139 @@ class Fits2db:
         log.info(self.db_file_infos)
         self.get_db_diff(force=force) # TODO Make sideeffects of function clear!!
 
-        fits_file_paths = self.new_files["filepath"].to_list()
-        for path in tqdm(fits_file_paths, desc="Upload new files"):
-            path = Path(path)
-            try:
-                file = FitsFile(path)
-                writer = DBWriter(self.configs, file)
-                writer.upsert()
+        if files_per_transaction > 1 and not writer.supports_file_batches:
+            log.warning(
+                f"{self.configs['database']['type']} can not commit several "
+                "files in one transaction, committing every file."
+            )
+            files_per_transaction = 1
 
-            except ValueError as err:
-                log.error(f"\n {err}")
+        self.evolve_schema(
+            self.new_files["filepath"].to_list()
+            + self.files2update["filepath"].to_list()
+        )
+        self._load_files(
+            self.new_files["filepath"].to_list(),
+            "Upload new files",
+            files_per_transaction,
+        )
+        self._load_files(
+            self.files2update["filepath"].to_list(),
+            "Update files",
+            files_per_transaction,
+            update=True,
+        )
 
-        fits_file_paths = self.files2update["filepath"].to_list()
-        for path in tqdm(fits_file_paths, desc="Update files"):
-            path = Path(path)
+    def _load_files(
+        self,
+        fits_file_paths: List[str],
+        desc: str,
+        files_per_transaction: int,
+        update: bool = False,
+    ) -> None:
+        """
+        Upserts or updates files, committing `files_per_transaction` at once.
+
+        Args:
+            fits_file_paths (List[str]): Paths of the files.
+            desc (str): Description of the progress bar.
+            files_per_transaction (int): Number of files per transaction.
+            update (bool): Whether the files are already in the database.
+        """
+        progress = tqdm(total=len(fits_file_paths), desc=desc)
+        for start in range(0, len(fits_file_paths), files_per_transaction):
+            group = fits_file_paths[start : start + files_per_transaction]
+            if files_per_transaction > 1:
+                batch_context = DBWriter(self.configs).begin_batch()
+            else:
+                batch_context = nullcontext()
             try:
-                file = FitsFile(path)
-                writer = DBWriter(self.configs, file)
-                writer.update()
+                with batch_context as batch:
+                    for path in group:
+                        path = Path(path)
+                        try:
+                            with profiler.stage(
+                                "open_file", file=path.name
+                            ) as stage:
+                                file = self.open_file(path)
+                                stage.count(nbytes=file.file_size)
+                            writer = DBWriter(self.configs, file, batch=batch)
+                            if update:
+                                writer.update()
+                            else:
+                                writer.upsert()
+
+                        except ValueError as err:
+                            log.error(f"\n {err}")
+                        progress.update()
+            except SQLAlchemyError as err:
+                log.error(
+                    f"Could not commit {len(group)} files starting with "
+                    f"{group[0]}: {err}"
+                )
+        progress.close()
 
-            except ValueError as err:
-                log.error(f"\n {err}")
+    def plan(
+        self,
+        update: bool = False,
+        profile_files: Iterable[Union[str, os.PathLike]] = (),
+    ) -> IngestPlan:
+        """
+        Plans a build or update without writing to the database.
+
+        Only the headers of the FITS files are read. A build is planned
+        against an empty database and does not connect to it. An update
+        reads `fits2db_meta` and the columns of the existing tables to find
+        the new and changed files and the columns they would add.
+
+        Args:
+            update (bool): Plan an update instead of a build.
+            profile_files (Iterable[Union[str, os.PathLike]]): Profiles of
+                previous runs to estimate the duration from.
+
+        Returns:
+            IngestPlan: The planned files, rows, bytes and schema changes.
+
+        !!! note "Example usage"
+            ```python
+            fits = Fits2db("config.yml")
+            print(fits.plan(update=True).report())
+            ```
+        """
+        table_configs = self.configs["fits_files"]["tables"]
+        schema_changes = (
+            str.lower(self.configs["database"]["type"]) not in SCHEMALESS_TYPES
+        )
+        paths = self.fits_file_paths
+        existing_columns = None
+        if update:
+            self.file_infos = self.get_file_infos()
+            writer = DBWriter(self.configs)
+            self.db_file_infos = writer.get_db_file_infos()
+            if self.db_file_infos is None:
+                log.warning("No files in the database, all files are new")
+            else:
+                self.get_db_diff()
+                paths = (
+                    self.new_files["filepath"].to_list()
+                    + self.files2update["filepath"].to_list()
+                )
+            if schema_changes:
+                existing_columns = {}
+                for table in table_configs:
+                    for name in [table["name"]] + table_rollups(table):
+                        columns = writer.table_columns(name)
+                        if columns is not None:
+                            existing_columns[str.lower(name)] = columns
+        merge_mode = self.configs["fits_files"].get("merge_mode") or "append"
+        return plan_ingest(
+            paths,
+            table_configs,
+            existing_columns=existing_columns,
+            schema_changes=schema_changes,
+            throughput=load_throughput(profile_files),
+            row_keys=merge_mode != "append",
+        )
 
     def upsert_to_db(self) -> None:
         """
@@ -280,12 +475,63 @@ class Fits2db:
         writer = DBWriter(self.configs)
         writer.clean_db()
         log.debug("Clean db success start uploading files")
+        self.evolve_schema(self.fits_file_paths)
         for path in tqdm(self.fits_file_paths):
             path = Path(path)
             try:
-                file = FitsFile(path)
-                writer = DBWriter(self.configs, file)
+                with profiler.stage("open_file", file=path.name) as stage:
+                    file = self.open_file(path)
+                    stage.count(nbytes=file.file_size)
+                writer = DBWriter(self.configs, file, bulk_load=True)
                 writer.upsert()
 
             except ValueError as err:
                 log.error(f"\n {err}")
+
+    def read(
+        self,
+        table: str,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        columns: Optional[List[str]] = None,
+        chunksize: Optional[int] = None,
+        resolution: Optional[str] = None,
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+        """
+        Read the rows of a table between two dates, ordered by timestamp.
+
+        The query uses bound parameters. With a `chunksize` the rows are
+        streamed with a server-side cursor and returned as an iterator of
+        DataFrames with at most `chunksize` rows each, so large ranges do
+        not have to fit into memory at once.
+
+        With a `resolution` (`minute`, `hour` or `day`) the rollup of the
+        table is read, with the `min`, `max`, `mean` and `count` of every
+        numeric column and the last value of the other columns per bucket.
+        The table needs `rollups` in the config.
+
+        Args:
+            table (str): Name of the table, e.g. `housekeeping`.
+            start (Optional[DateLike]): Start of the range, inclusive. Open if None.
+            end (Optional[DateLike]): End of the range, inclusive. Open if None.
+            columns (Optional[List[str]]): Columns to read, the timestamp is
+                always included. All columns if None.
+            chunksize (Optional[int]): Maximum number of rows per chunk.
+            resolution (Optional[str]): Rollup resolution to read.
+
+        Returns:
+            Union[pd.DataFrame, Iterator[pd.DataFrame]]: A DataFrame, or an
+                iterator of DataFrames if `chunksize` is set.
+
+        !!! note "Example usage"
+            ```python
+            fits = Fits2db("config.yml")
+            df = fits.read("housekeeping", "2021-07-07", "2021-07-08")
+            for chunk in fits.read("housekeeping", chunksize=100_000):
+                ...
+            ```
+        """
+        writer = DBWriter(self.configs)
+        return writer.read(
+            table, start, end, columns, chunksize, resolution=resolution
+        )
@@ -1,3 +1,15 @@
-from .fits import FitsFile, FitsTable
+from .fits import (
+    FITS_SUFFIXES,
+    FitsFile,
+    FitsTable,
+    is_fits_file,
+    is_table_hdu,
+)
 
-__all__ = ["FitsFile", "FitsTable"]
+__all__ = [
+    "FITS_SUFFIXES",
+    "FitsFile",
+    "FitsTable",
+    "is_fits_file",
+    "is_table_hdu",
+]
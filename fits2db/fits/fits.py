@@ -1,5 +1,8 @@
 """FitsFile class to get the data"""
 
+import bz2
+import gzip
+import logging
 from dataclasses import dataclass, field
 from itertools import count
 from datetime import datetime
@@ -7,12 +10,51 @@ from astropy.io import fits
 import pandas as pd
 import os
 import time
-from typing import TypedDict, List
+from typing import Callable, Iterator, List, Optional, Tuple, TypedDict, Union
 from pathlib import Path
 
+from ..profiling import profiler
+
+log = logging.getLogger("fits2db")
 
 counter = count()
 
+# FITS files, also gzip or bzip2 compressed ones and the tile compressed
+# files of fpack, which astropy opens like plain FITS files
+FITS_SUFFIXES = (".fits", ".fits.gz", ".fits.bz2", ".fz")
+
+# Openers of the compressed files whose tables are streamed in chunks
+STREAM_OPENERS: dict[str, Callable] = {".gz": gzip.open, ".bz2": bz2.open}
+
+# Decompressed bytes of the rows read at once when a whole table of a
+# compressed file is streamed
+STREAM_CHUNK_BYTES = 64 * 1024**2
+
+
+def is_fits_file(path: Union[str, os.PathLike]) -> bool:
+    """Whether the name of a file has one of the `FITS_SUFFIXES`."""
+    return os.fspath(path).lower().endswith(FITS_SUFFIXES)
+
+
+def is_table_hdu(hdu) -> bool:
+    """
+    Whether an HDU is a table fits2db can read.
+
+    Tile compressed tables (ZTABLE) are skipped, astropy only decompresses
+    tile compressed images.
+    """
+    if not isinstance(hdu, (fits.BinTableHDU, fits.TableHDU)):
+        return False
+    if isinstance(hdu, fits.CompImageHDU):
+        return False
+    if hdu.header.get("ZTABLE"):
+        log.warning(
+            f"Skipping the tile compressed table {hdu.name}, "
+            "decompress it with funpack first"
+        )
+        return False
+    return True
+
 
 @dataclass
 class FitsTable:
@@ -21,6 +63,17 @@ class FitsTable:
     data: pd.DataFrame
     create_at: datetime = field(default_factory=datetime.now)
     index: int = field(default_factory=lambda: next(counter))
+    # Rows of tables processed in chunks, whose data is not kept
+    row_count: Optional[int] = None
+    # Data replayed from the spool, already prepared for the database
+    prepared: bool = False
+
+    @property
+    def n_rows(self) -> int:
+        """Number of rows of the table."""
+        if self.row_count is not None:
+            return self.row_count
+        return len(self.data)
 
 
 @dataclass
@@ -55,8 +108,11 @@ class FitsFile:
         self.file_size = self.file_path.stat().st_size
 
     def load_file(self):
-        if self.file_path.suffix.lower() != ".fits":
+        if not is_fits_file(self.file_path):
             raise ValueError(f"The file {self.file_path} is not a FITS file.")
+        # astropy decompresses gzip and bzip2 files while reading them, their
+        # tables are streamed instead of mapped, see `streams`
+        self.stream_opener = STREAM_OPENERS.get(self.file_path.suffix.lower())
         try:
             self.hdul = fits.open(self.absolute_path, memmap=True)
         except Exception as e:
@@ -70,19 +126,116 @@ class FitsFile:
             raise KeyError(
                 f"\n Key {name} is not a table in HDUL. \n in file {self.absolute_path}"
             )
-        hdu = self.hdul[name]
-        data = self.extract_data(hdu)
-        meta = self.extract_meta(hdu)
+        with profiler.stage(
+            "extract_data", file=self.file_name, table=name.lower()
+        ) as stage:
+            hdu = self.hdul[name]
+            if self.streams(hdu):
+                # Only one chunk of the decompressed rows is held at a time
+                chunk_rows = max(
+                    STREAM_CHUNK_BYTES // max(hdu.header.get("NAXIS1", 0), 1),
+                    1,
+                )
+                frames = [
+                    data for data, _ in self._stream_rows(hdu, chunk_rows)
+                ]
+                data = (
+                    pd.concat(frames, ignore_index=True)
+                    if frames
+                    else self.extract_data(hdu)
+                )
+            else:
+                data = self.extract_data(hdu)
+            meta = self.extract_meta(hdu)
+            stage.count(rows=len(data), nbytes=hdu.filebytes())
         fits_table = FitsTable(name=name, data=data, meta=meta)
         return fits_table
 
+    def table_header(self, name: str) -> fits.Header:
+        """Return the header of a table without loading its data."""
+        if name not in self.table_names:
+            raise KeyError(
+                f"\n Key {name} is not a table in HDUL. \n in file {self.absolute_path}"
+            )
+        return self.hdul[name].header
+
+    def iter_table(self, name: str, chunk_rows: int) -> Iterator[FitsTable]:
+        """Yield a table in chunks of at most `chunk_rows` rows."""
+        header = self.table_header(name)
+        hdu = self.hdul[name]
+        meta = self.extract_meta(hdu)
+        n_rows = header.get("NAXIS2", 0)
+        if self.streams(hdu):
+            yield from self._stream_table(hdu, meta, chunk_rows)
+            return
+        for start in range(0, n_rows, chunk_rows):
+            rows = slice(start, min(start + chunk_rows, n_rows))
+            with profiler.stage(
+                "extract_data", file=self.file_name, table=name.lower()
+            ) as stage:
+                data = self.extract_data(hdu, rows)
+                stage.count(
+                    rows=len(data), nbytes=len(data) * header.get("NAXIS1", 0)
+                )
+            yield FitsTable(name=name, data=data, meta=meta.copy())
+
+    def streams(self, hdu) -> bool:
+        """
+        Whether the rows of a table are streamed from the compressed file.
+
+        `hdu.data` would decompress the whole table into memory and keep
+        it there while the file is open. Tables with a heap of variable
+        length arrays are not streamed.
+        """
+        return self.stream_opener is not None and not hdu.header.get(
+            "PCOUNT", 0
+        )
+
+    def _stream_table(
+        self, hdu, meta: pd.DataFrame, chunk_rows: int
+    ) -> Iterator[FitsTable]:
+        """Yield the chunks of a table of a compressed file, see `_stream_rows`."""
+        rows = self._stream_rows(hdu, chunk_rows)
+        while True:
+            with profiler.stage(
+                "extract_data", file=self.file_name, table=hdu.name.lower()
+            ) as stage:
+                chunk = next(rows, None)
+                if chunk is None:
+                    return
+                data, nbytes = chunk
+                stage.count(rows=len(data), nbytes=nbytes)
+            yield FitsTable(name=hdu.name, data=data, meta=meta.copy())
+
+    def _stream_rows(
+        self, hdu, chunk_rows: int
+    ) -> Iterator[Tuple[pd.DataFrame, int]]:
+        """
+        Yield the rows of a table of a compressed file in chunks.
+
+        The file is decompressed again as a stream and only the rows of one
+        chunk are read at a time, they are parsed with the header of the
+        table. Yields the data of each chunk with its decompressed bytes.
+        """
+        header = hdu.header.copy()
+        row_bytes = header.get("NAXIS1", 0)
+        n_rows = header.get("NAXIS2", 0)
+        with self.stream_opener(self.absolute_path, "rb") as stream:
+            stream.seek(hdu.fileinfo()["datLoc"])
+            for start in range(0, n_rows, chunk_rows):
+                rows = min(chunk_rows, n_rows - start)
+                raw = stream.read(rows * row_bytes)
+                header["NAXIS2"] = rows
+                chunk = type(hdu).fromstring(
+                    header.tostring().encode("ascii") + raw, uint=True
+                )
+                data = self.extract_data(chunk)
+                data.index = pd.RangeIndex(start, start + len(data))
+                yield data, len(raw)
+
     def get_table_names(self):
         """Return the names of all tables in the FITS file."""
-        self.table_names = [
-            hdu.name
-            for hdu in self.hdul
-            if isinstance(hdu, (fits.BinTableHDU, fits.TableHDU))
-        ]
+        self.table_names = [hdu.name for hdu in self.hdul if is_table_hdu(hdu)]
 
     def close(self):
         """Close the FITS file."""
@@ -94,8 +247,11 @@ class FitsFile:
         """Ensure resources are freed when the object is deleted."""
         self.close()
 
-    def extract_data(self, hdu: fits.Card) -> pd.DataFrame:
-        data = hdu.data
+    def extract_data(
+        self, hdu: fits.Card, rows: Optional[slice] = None
+    ) -> pd.DataFrame:
+        """Extract the rows of a table, the index is the row number in the HDU."""
+        data = hdu.data if rows is None else hdu.data[rows]
         # Convert all big-endian columns to little-endian
         columns = data.columns.names
         little_endian_data = {
@@ -105,8 +261,25 @@ class FitsFile:
             for col in columns
         }
         df = pd.DataFrame(little_endian_data)
+        if rows is not None and rows.start:
+            df.index = pd.RangeIndex(rows.start, rows.start + len(df))
         return df
 
+    def extract_schema(self, hdu: fits.Card) -> pd.DataFrame:
+        """
+        Extract a table without rows, with the dtypes of `extract_data`.
+
+        The table is built from the header only, `hdu.data` is not read,
+        which would decompress the whole table of a compressed file.
+        """
+        header = hdu.header.copy()
+        header["NAXIS2"] = 0
+        header["PCOUNT"] = 0
+        empty = type(hdu).fromstring(
+            header.tostring().encode("ascii"), uint=True
+        )
+        return self.extract_data(empty)
+
     def extract_meta(self, hdu: fits.Card) -> pd.DataFrame:
         return pd.DataFrame(
             list(hdu.header.items()), columns=["Keyword", "Value"]
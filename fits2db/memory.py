@@ -0,0 +1,207 @@
+"""
+Memory budget for the ingest.
+
+Before a table is extracted its in-memory size is estimated from the FITS
+header: `NAXIS2` rows times the bytes a row takes once the columns are
+converted to numpy and pandas, but at least `NAXIS1`. The loaders only load
+a table at once while the process wide `governor` has room for it in its
+budget, larger tables are extracted, prepared and written in chunks of rows
+that fit into the remaining budget.
+
+The governor is disabled by default, every table is then loaded at once.
+
+!!! note "Example usage"
+    ```python
+    from fits2db.memory import estimate_table_bytes, governor, parse_size
+
+    governor.configure(parse_size("4G"))
+    nbytes = estimate_table_bytes(hdu.header)
+    if governor.try_reserve(nbytes):
+        ...  # load the whole table
+        governor.release(nbytes)
+    else:
+        rows = governor.chunk_rows(nbytes // hdu.header["NAXIS2"])
+    ```
+"""
+
+import logging
+import re
+import threading
+from typing import Optional, Union
+
+log = logging.getLogger("fits2db")
+
+# Bytes per element of the numeric FITS binary table formats
+FORMAT_BYTES = {
+    "L": 1,
+    "X": 1,
+    "B": 1,
+    "I": 2,
+    "J": 4,
+    "K": 8,
+    "E": 4,
+    "D": 8,
+    "C": 8,
+    "M": 16,
+}
+# Strings and variable length arrays become Python objects in pandas, a
+# pointer in the column plus the object itself
+OBJECT_BYTES = 8 + 49
+# The extracted arrays and the DataFrame built from them are alive together
+PEAK_FACTOR = 2
+MIN_CHUNK_ROWS = 10_000
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+TFORM_PATTERN = re.compile(r"^\s*(\d*)([A-Z])(\d*)")
+
+
+def parse_size(text: Union[str, int]) -> int:
+    """
+    Parses a size like `512M`, `4G` or `1.5GB` into bytes.
+
+    Args:
+        text (Union[str, int]): The size, plain numbers are bytes.
+
+    Returns:
+        int: The size in bytes.
+
+    Raises:
+        ValueError: If the size can not be parsed.
+    """
+    match = re.fullmatch(
+        r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*", str(text).upper()
+    )
+    if match is None:
+        raise ValueError(f"Invalid size {text}, use e.g. 512M or 4G")
+    number, unit = match.groups()
+    return int(float(number) * SIZE_UNITS[unit])
+
+
+def column_bytes(tform: str, ascii_table: bool = False) -> int:
+    """
+    Returns the in-memory bytes of one value of a FITS table column.
+
+    Args:
+        tform (str): The `TFORMn` of the column.
+        ascii_table (bool): Whether the column is part of an ASCII table.
+
+    Returns:
+        int: Bytes per row of the column.
+    """
+    match = TFORM_PATTERN.match(str.upper(tform))
+    if match is None:
+        return OBJECT_BYTES
+    repeat, code, width = match.groups()
+    if ascii_table:
+        # ASCII tables are Aw, Iw, Fw.d, Ew.d and Dw.d
+        return OBJECT_BYTES + int(width or 1) if code == "A" else 8
+    repeat = int(repeat) if repeat else 1
+    if code == "A":
+        return OBJECT_BYTES + repeat
+    if code in FORMAT_BYTES:
+        return repeat * FORMAT_BYTES[code]
+    # P and Q variable length arrays
+    return OBJECT_BYTES
+
+
+def estimate_table_bytes(header) -> int:
+    """
+    Estimates the peak memory of extracting and preparing a FITS table.
+
+    Args:
+        header (astropy.io.fits.Header): Header of the table HDU.
+
+    Returns:
+        int: The estimated peak memory in bytes.
+    """
+    rows = int(header.get("NAXIS2", 0))
+    ascii_table = str(header.get("XTENSION", "")).strip() == "TABLE"
+    row_bytes = sum(
+        column_bytes(header[f"TFORM{i}"], ascii_table)
+        for i in range(1, int(header.get("TFIELDS", 0)) + 1)
+    )
+    row_bytes = max(row_bytes, int(header.get("NAXIS1", 0)))
+    return rows * row_bytes * PEAK_FACTOR
+
+
+class MemoryGovernor:
+    """
+    Admits work only while its size fits into a memory budget.
+
+    Attributes:
+        max_bytes (Optional[int]): The budget, None if disabled.
+        reserved (int): Bytes reserved by admitted work.
+    """
+
+    def __init__(self) -> None:
+        self.max_bytes: Optional[int] = None
+        self.reserved = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether a budget is set."""
+        return self.max_bytes is not None
+
+    def configure(self, max_bytes: Optional[int]) -> None:
+        """Sets the budget, None disables the governor."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self.reserved = 0
+        if max_bytes is not None:
+            log.info(f"Memory budget {max_bytes / 1024**2:.0f} MB")
+
+    def available(self) -> Optional[int]:
+        """Returns the unreserved bytes of the budget, None if disabled."""
+        if not self.enabled:
+            return None
+        return max(self.max_bytes - self.reserved, 0)
+
+    def try_reserve(self, nbytes: int) -> bool:
+        """
+        Reserves memory if the budget has room for it.
+
+        Args:
+            nbytes (int): The bytes to reserve.
+
+        Returns:
+            bool: True if the memory was reserved or the governor is disabled.
+        """
+        if not self.enabled:
+            return True
+        with self._lock:
+            if self.reserved + nbytes > self.max_bytes:
+                return False
+            self.reserved += nbytes
+            return True
+
+    def reserve(self, nbytes: int) -> None:
+        """Reserves memory even if it exceeds the budget, e.g. for a chunk."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.reserved += nbytes
+
+    def release(self, nbytes: int) -> None:
+        """Releases reserved memory."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.reserved = max(self.reserved - nbytes, 0)
+
+    def chunk_rows(self, row_bytes: int) -> int:
+        """
+        Returns the number of rows whose data fits into the free budget.
+
+        Args:
+            row_bytes (int): Estimated bytes per row.
+
+        Returns:
+            int: The rows per chunk, at least `MIN_CHUNK_ROWS`.
+        """
+        available = self.available()
+        if available is None:
+            raise ValueError("The memory governor is disabled.")
+        return max(available // max(row_bytes, 1), MIN_CHUNK_ROWS)
+
+
+governor = MemoryGovernor()
@@ -0,0 +1,457 @@
+"""
+Dry run planning of an ingest.
+
+`plan_ingest` reads only the headers of the FITS files, so no table data is
+loaded. From `NAXIS1`, `NAXIS2` and the column names of every configured
+table it sums up the files, rows and bytes per table and replays the schema
+evolution of the loaders: the first file of a new table creates it, every
+later file with unknown columns adds them with `ALTER TABLE`, just like
+`BaseLoader._add_missing_columns`. The rollup tables of a table evolve with
+it, their columns follow from the `TFORM` of the columns.
+
+The duration is estimated from the throughput of previous runs, taken from
+the JSON profiles written by `fits2db build --profile` or
+`fits2db update --profile`.
+
+`union_schema` replays the schema evolution with the column types from the
+headers, so the loaders can apply the schema changes of a run at once
+before any data is loaded, see `BaseLoader.evolve_schema`.
+
+!!! note "Example usage"
+    ```python
+    from fits2db import Fits2db
+
+    plan = Fits2db("config.yml").plan(profile_files=["fits2db_profile.json"])
+    print(plan.report())
+    ```
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+from astropy.io import fits
+
+from .adapters.base import ROW_ORDINAL, clean_column_names, prepare_dataframe
+from .fits import FitsFile, is_table_hdu
+from .rollup import (
+    AGGREGATES,
+    EXCLUDED_COLUMNS,
+    RESOLUTIONS,
+    STATE_AGGREGATE,
+    rollup_table,
+)
+
+log = logging.getLogger("fits2db")
+
+# Database types whose tables have no fixed schema that has to be altered
+SCHEMALESS_TYPES = {"parquet"}
+# TFORM codes of the columns that are numeric in pandas
+NUMERIC_FORMATS = set("BIJKEDCM")
+
+
+def read_table_headers(path: Union[str, os.PathLike]) -> Dict[str, dict]:
+    """
+    Reads the shape and columns of all tables of a FITS file from its headers.
+
+    Args:
+        path (Union[str, os.PathLike]): Path of the FITS file.
+
+    Returns:
+        Dict[str, dict]: `rows`, `row_bytes`, `columns` and their
+            `formats` by table name.
+    """
+    tables = {}
+    with fits.open(path, memmap=True, lazy_load_hdus=True) as hdul:
+        for hdu in hdul:
+            if not is_table_hdu(hdu):
+                continue
+            header = hdu.header
+            fields = range(1, int(header.get("TFIELDS", 0)) + 1)
+            tables[hdu.name] = {
+                "rows": int(header.get("NAXIS2", 0)),
+                "row_bytes": int(header.get("NAXIS1", 0)),
+                "columns": [header[f"TTYPE{i}"] for i in fields],
+                "formats": [header[f"TFORM{i}"] for i in fields],
+            }
+    return tables
+
+
+def table_columns(
+    columns: List[str], date_column: Optional[str], row_keys: bool = False
+) -> List[str]:
+    """
+    Returns the columns a table gets in the database.
+
+    Args:
+        columns (List[str]): Column names in the FITS header.
+        date_column (Optional[str]): The `date_column` of the table config.
+        row_keys (bool): Whether the rows are merged on their row key, see
+            `BaseLoader.add_row_ordinal`.
+
+    Returns:
+        List[str]: The column names as written by the loaders.
+    """
+    names = clean_column_names(
+        [str.lower(column) for column in columns] + ["file_meta_id"]
+    )
+    if date_column is not None and date_column in names:
+        names.append("timestamp")
+    if row_keys:
+        names.append(ROW_ORDINAL)
+    return list(dict.fromkeys(names))
+
+
+def rollup_columns(
+    columns: List[str], formats: List[str], table: Dict[str, Any]
+) -> List[str]:
+    """
+    Returns the columns the rollup tables of a table get.
+
+    Numeric columns get their aggregates, the other columns and the enum
+    columns their last value, see `fits2db.rollup.compute_rollup`. Whether
+    a column is numeric is taken from its `TFORM`.
+
+    Args:
+        columns (List[str]): Column names in the FITS header.
+        formats (List[str]): `TFORM` of the columns.
+        table (Dict[str, Any]): The config of the table.
+
+    Returns:
+        List[str]: The column names of the rollup tables.
+    """
+    enums = {
+        str.lower(column)
+        for enum in table.get("enums") or []
+        for column in enum["columns"]
+    }
+    names = clean_column_names([str.lower(column) for column in columns])
+    numeric = []
+    states = []
+    for name, tform in dict(zip(names, formats)).items():
+        if name in EXCLUDED_COLUMNS or name == "timestamp":
+            continue
+        code = tform.lstrip("0123456789")[:1]
+        if (
+            name == str.lower(table.get("date_column") or "")
+            or name in enums
+            or code not in NUMERIC_FORMATS
+        ):
+            states.append(name)
+        else:
+            numeric.append(name)
+    return (
+        ["timestamp"]
+        + [
+            f"{name}_{aggregate}"
+            for name in numeric
+            for aggregate in AGGREGATES
+        ]
+        + [f"{name}_{STATE_AGGREGATE}" for name in states]
+        + ["file_meta_id"]
+    )
+
+
+def table_rollups(table: Dict[str, Any]) -> List[str]:
+    """Returns the rollup tables of a table, see `BaseLoader.rollup_resolutions`."""
+    if not table.get("rollups") or not table.get("date_column"):
+        return []
+    return [
+        rollup_table(table["name"], resolution)
+        for resolution in RESOLUTIONS
+        if resolution in table["rollups"]
+    ]
+
+
+def schema_frame(file: FitsFile, table: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Returns a table of a file without rows, prepared like the loaders do.
+
+    Only the header and no rows of the table are read, the columns and
+    dtypes are the ones the loaders write to the temporary tables.
+
+    Args:
+        file (FitsFile): The opened FITS file.
+        table (Dict[str, Any]): The config of the table.
+
+    Returns:
+        pd.DataFrame: The prepared table without rows.
+    """
+    data = file.extract_schema(file.hdul[table["name"]])
+    data["FILE_META_ID"] = 0
+    data.columns = map(str.lower, data.columns)
+    return prepare_dataframe(
+        data, table.get("date_column"), table.get("enums")
+    )
+
+
+def union_schema(
+    paths: List[Union[str, os.PathLike]],
+    table_configs: List[Dict[str, Any]],
+) -> Dict[str, List[pd.DataFrame]]:
+    """
+    Replays the schema evolution of the configured tables of FITS files.
+
+    Per table the schema frames of the files that shape it are returned in
+    ingest order: the frame of the first file with the table and of every
+    later file that adds columns. `union_frame` combines them into the
+    schema of the table after all files are loaded.
+
+    Args:
+        paths (List[Union[str, os.PathLike]]): The files in ingest order.
+        table_configs (List[Dict[str, Any]]): The `tables` of the config.
+
+    Returns:
+        Dict[str, List[pd.DataFrame]]: The schema frames by lower case
+            table name.
+    """
+    known: Dict[str, set] = {}
+    frames: Dict[str, List[pd.DataFrame]] = {}
+    for path in paths:
+        try:
+            file = FitsFile(Path(path))
+        except (OSError, ValueError) as err:
+            log.error(f"Could not read the headers of {path}: {err}")
+            continue
+        try:
+            for table in table_configs:
+                if table["name"] not in file.table_names:
+                    continue
+                name = str.lower(table["name"])
+                frame = schema_frame(file, table)
+                if not set(frame.columns) <= known.get(name, set()):
+                    known.setdefault(name, set()).update(frame.columns)
+                    frames.setdefault(name, []).append(frame)
+        finally:
+            file.close()
+    return frames
+
+
+def load_throughput(
+    profile_files: Iterable[Union[str, os.PathLike]],
+) -> Optional[Dict[str, float]]:
+    """
+    Reads the ingest throughput of previous runs from their profiles.
+
+    Args:
+        profile_files (Iterable[Union[str, os.PathLike]]): JSON profiles
+            written with `--profile`, missing files are skipped.
+
+    Returns:
+        Optional[Dict[str, float]]: `rows_per_s`, `bytes_per_s` and the
+            number of `runs`, None if no profile could be read.
+    """
+    runs = rows = nbytes = 0
+    seconds = 0.0
+    for path in profile_files:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                profile = json.load(f)
+        except (OSError, ValueError) as err:
+            log.info(f"Skipping profile {path}: {err}")
+            continue
+        stages = profile.get("stages", {})
+        runs += 1
+        seconds += profile.get("wall_time_s", 0.0)
+        rows += stages.get("extract_data", {}).get("rows", 0)
+        nbytes += stages.get("open_file", {}).get("bytes", 0)
+    if not seconds:
+        return None
+    return {
+        "rows_per_s": rows / seconds,
+        "bytes_per_s": nbytes / seconds,
+        "runs": runs,
+    }
+
+
+def format_duration(seconds: float) -> str:
+    """Formats seconds as hours, minutes and seconds."""
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {secs:02d}s"
+    return f"{secs}s"
+
+
+@dataclass
+class IngestPlan:
+    """
+    Result of a dry run.
+
+    Attributes:
+        tables (pd.DataFrame): Per table the number of `files`, `rows`,
+            the `bytes` of the table data and the number of `alters`.
+        schema_changes (pd.DataFrame): One row per created table or
+            `ALTER TABLE`, including the rollup tables, with `table`,
+            `file`, `action` and `columns`.
+        file_count (int): Number of planned files whose headers were read.
+        file_bytes (int): Size of the planned files.
+        throughput (Optional[Dict[str, float]]): Throughput of previous runs.
+    """
+
+    tables: pd.DataFrame
+    schema_changes: pd.DataFrame
+    file_count: int
+    file_bytes: int
+    throughput: Optional[Dict[str, float]] = None
+
+    @property
+    def seconds(self) -> Optional[float]:
+        """Estimated duration of the ingest, None without a throughput."""
+        if self.throughput is None:
+            return None
+        if self.throughput["rows_per_s"]:
+            rows = self.tables["rows"].sum()
+            return float(rows / self.throughput["rows_per_s"])
+        if self.throughput["bytes_per_s"]:
+            return self.file_bytes / self.throughput["bytes_per_s"]
+        return None
+
+    def report(self) -> str:
+        """
+        Formats the plan as a table for the terminal.
+
+        Returns:
+            str: The formatted plan.
+        """
+        header = (
+            f"{'table':<24}{'files':>8}{'rows':>14}{'MB':>12}{'alters':>8}"
+        )
+        lines = [header, "-" * len(header)]
+        for row in self.tables.itertuples():
+            lines.append(
+                f"{row.table:<24}{row.files:>8}{row.rows:>14}"
+                f"{row.bytes / 1e6:>12.1f}{row.alters:>8}"
+            )
+        lines.append("-" * len(header))
+        lines.append(
+            f"{self.file_count} files, {self.file_bytes / 1e6:.1f} MB on disk"
+        )
+        if len(self.schema_changes.index):
+            lines.append("schema changes:")
+            for change in self.schema_changes.itertuples():
+                if change.action == "create":
+                    columns = f"{len(change.columns)} columns"
+                else:
+                    columns = ", ".join(change.columns)
+                lines.append(
+                    f"  {change.action} {change.table} with {columns} "
+                    f"({change.file})"
+                )
+        seconds = self.seconds
+        if seconds is None:
+            lines.append(
+                "no profile of a previous run found, run build or update "
+                "with --profile to estimate the duration"
+            )
+        else:
+            lines.append(
+                f"estimated duration {format_duration(seconds)} at "
+                f"{self.throughput['rows_per_s']:.0f} rows/s "
+                f"measured in {self.throughput['runs']} previous run(s)"
+            )
+        return "\n".join(lines)
+
+
+def plan_ingest(
+    paths: List[Union[str, os.PathLike]],
+    table_configs: List[Dict[str, Any]],
+    existing_columns: Optional[Dict[str, List[str]]] = None,
+    schema_changes: bool = True,
+    throughput: Optional[Dict[str, float]] = None,
+    row_keys: bool = False,
+) -> IngestPlan:
+    """
+    Plans the ingest of FITS files from their headers.
+
+    Args:
+        paths (List[Union[str, os.PathLike]]): The files in ingest order.
+        table_configs (List[Dict[str, Any]]): The `tables` of the config.
+        existing_columns (Optional[Dict[str, List[str]]]): Columns of the
+            tables already in the database, an empty database if None.
+        schema_changes (bool): Whether the schema evolution is replayed.
+        throughput (Optional[Dict[str, float]]): Throughput of previous
+            runs, see `load_throughput`.
+        row_keys (bool): Whether the rows are merged on their row key, so
+            the tables get a `row_ordinal` column.
+
+    Returns:
+        IngestPlan: The planned files, rows, bytes and schema changes.
+    """
+    known = {
+        table: set(columns)
+        for table, columns in (existing_columns or {}).items()
+    }
+    totals = {
+        str.lower(table["name"]): dict.fromkeys(
+            ["files", "rows", "bytes", "alters"], 0
+        )
+        for table in table_configs
+    }
+    changes = []
+
+    def evolve(name: str, columns: List[str], file: str) -> bool:
+        """Records the creation or alteration of a table, True if altered."""
+        if name not in known:
+            known[name] = set(columns)
+            changes.append((name, file, "create", columns))
+            return False
+        added = [column for column in columns if column not in known[name]]
+        if not added:
+            return False
+        known[name].update(added)
+        changes.append((name, file, "alter", added))
+        return True
+
+    file_count = 0
+    file_bytes = 0
+    for path in paths:
+        path = Path(path)
+        try:
+            headers = read_table_headers(path)
+        except (OSError, ValueError) as err:
+            log.error(f"Could not read the headers of {path}: {err}")
+            continue
+        file_count += 1
+        file_bytes += path.stat().st_size
+        for table in table_configs:
+            if table["name"] not in headers:
+                continue
+            header = headers[table["name"]]
+            name = str.lower(table["name"])
+            entry = totals[name]
+            entry["files"] += 1
+            entry["rows"] += header["rows"]
+            entry["bytes"] += header["rows"] * header["row_bytes"]
+            if not schema_changes:
+                continue
+            columns = table_columns(
+                header["columns"], table.get("date_column"), row_keys
+            )
+            entry["alters"] += evolve(name, columns, path.name)
+            rollup = rollup_columns(
+                header["columns"], header["formats"], table
+            )
+            for rollup_name in table_rollups(table):
+                evolve(rollup_name, rollup, path.name)
+
+    tables = pd.DataFrame(
+        [{"table": table, **entry} for table, entry in totals.items()],
+        columns=["table", "files", "rows", "bytes", "alters"],
+    )
+    schema = pd.DataFrame(
+        changes, columns=["table", "file", "action", "columns"]
+    )
+    return IngestPlan(
+        tables=tables,
+        schema_changes=schema,
+        file_count=file_count,
+        file_bytes=file_bytes,
+        throughput=throughput,
+    )
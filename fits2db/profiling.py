@@ -0,0 +1,339 @@
+"""
+Stage timing instrumentation for Fits2db.
+
+This module provides a process wide profiler that times the stages of an
+ingest run (opening files, extracting tables, preparing dataframes,
+writing, merging, DDL and metadata bookkeeping) per file and per table and
+counts the rows and bytes handled by each stage.
+
+Stages may be nested, e.g. a `to_sql` inside a `ddl` stage. A stage only
+records its self time, the time of the stages opened inside it is left out,
+so the totals of all stages add up to at most the wall time.
+
+The profiler is disabled by default. While disabled, `profiler.stage()`
+returns a shared no-op object, so the instrumented code paths only pay for
+one attribute lookup and a method call.
+
+!!! note "Example usage"
+    ```python
+    from fits2db.profiling import profiler
+
+    profiler.enable()
+    with profiler.stage("to_sql", file="a.fits", table="housekeeping") as stage:
+        df.to_sql(...)
+        stage.count(rows=len(df), nbytes=df.memory_usage().sum())
+    print(profiler.report())
+    profiler.dump("profile.json")
+    ```
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+log = logging.getLogger("fits2db")
+
+
+@dataclass
+class StageRecord:
+    """A single timed execution of a stage, `seconds` is its self time."""
+
+    stage: str
+    seconds: float
+    file: Optional[str] = None
+    table: Optional[str] = None
+    rows: int = 0
+    nbytes: int = 0
+
+
+class _Stage:
+    """Context manager timing one execution of a stage."""
+
+    __slots__ = (
+        "_records",
+        "_active",
+        "stage",
+        "file",
+        "table",
+        "rows",
+        "nbytes",
+        "_start",
+        "_nested",
+    )
+
+    def __init__(
+        self,
+        records: List[StageRecord],
+        active: List["_Stage"],
+        stage: str,
+        file: Optional[str],
+        table: Optional[str],
+    ) -> None:
+        self._records = records
+        self._active = active
+        self.stage = stage
+        self.file = file
+        self.table = table
+        self.rows = 0
+        self.nbytes = 0
+
+    def count(self, rows: int = 0, nbytes: int = 0) -> None:
+        """Adds processed rows and bytes to the stage."""
+        self.rows += int(rows)
+        self.nbytes += int(nbytes)
+
+    def __enter__(self) -> "_Stage":
+        self._nested = 0.0
+        self._active.append(self)
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        elapsed = perf_counter() - self._start
+        self._active.remove(self)
+        if self._active:
+            self._active[-1]._nested += elapsed
+        self._records.append(
+            StageRecord(
+                stage=self.stage,
+                seconds=elapsed - self._nested,
+                file=self.file,
+                table=self.table,
+                rows=self.rows,
+                nbytes=self.nbytes,
+            )
+        )
+        return False
+
+
+class _NullStage:
+    """No-op stage used while profiling is disabled."""
+
+    __slots__ = ()
+
+    def count(self, rows: int = 0, nbytes: int = 0) -> None:
+        pass
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Profiler:
+    """
+    Collects stage timings and builds summaries of them.
+
+    Attributes:
+        enabled (bool): Whether stages are recorded.
+        records (List[StageRecord]): All recorded stage executions.
+        notes (Dict[str, Any]): Additional information added to the report.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.records: List[StageRecord] = []
+        self.notes: Dict[str, Any] = {}
+        self._started: Optional[float] = None
+        self._active: List[_Stage] = []
+
+    def enable(self) -> None:
+        """Starts recording stages and discards previous records."""
+        self.reset()
+        self.enabled = True
+        self._started = perf_counter()
+
+    def disable(self) -> None:
+        """Stops recording stages."""
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Discards all records and notes."""
+        self.records = []
+        self.notes = {}
+        self._active = []
+        self._started = perf_counter() if self.enabled else None
+
+    def stage(
+        self,
+        name: str,
+        file: Optional[str] = None,
+        table: Optional[str] = None,
+    ) -> Union[_Stage, _NullStage]:
+        """
+        Returns a context manager timing one execution of a stage.
+
+        Args:
+            name (str): Name of the stage, e.g. `to_sql`.
+            file (Optional[str]): Name of the file being processed.
+            table (Optional[str]): Name of the table being processed.
+
+        Returns:
+            Union[_Stage, _NullStage]: The stage timer, with a `count` method
+                to add processed rows and bytes.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self.records, self._active, name, file, table)
+
+    def note(self, key: str, value: Any) -> None:
+        """Adds additional information to the report if profiling is enabled."""
+        if self.enabled:
+            self.notes[key] = value
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Builds a summary of all records with totals, percentiles and throughput.
+
+        Returns:
+            Dict[str, Any]: Summary per stage, per table and per file.
+        """
+        wall_time = (
+            perf_counter() - self._started
+            if self._started is not None
+            else 0.0
+        )
+        stages: Dict[str, List[StageRecord]] = {}
+        tables: Dict[str, Dict[str, Any]] = {}
+        files: Dict[str, Dict[str, Any]] = {}
+        for record in self.records:
+            stages.setdefault(record.stage, []).append(record)
+            if record.table is not None:
+                entry = tables.setdefault(
+                    record.table, {"seconds": 0.0, "rows": 0, "stages": {}}
+                )
+                entry["seconds"] += record.seconds
+                entry["stages"][record.stage] = (
+                    entry["stages"].get(record.stage, 0.0) + record.seconds
+                )
+                if record.stage == "extract_data":
+                    entry["rows"] += record.rows
+            if record.file is not None:
+                entry = files.setdefault(record.file, {"seconds": 0.0})
+                entry["seconds"] += record.seconds
+
+        stage_summary = {}
+        for name, records in stages.items():
+            seconds = np.array([record.seconds for record in records])
+            total = float(seconds.sum())
+            rows = sum(record.rows for record in records)
+            nbytes = sum(record.nbytes for record in records)
+            stage_summary[name] = {
+                "count": len(records),
+                "total_s": total,
+                "share": total / wall_time if wall_time else 0.0,
+                "mean_s": float(seconds.mean()),
+                "p50_s": float(np.percentile(seconds, 50)),
+                "p95_s": float(np.percentile(seconds, 95)),
+                "max_s": float(seconds.max()),
+                "rows": rows,
+                "bytes": nbytes,
+                "rows_per_s": rows / total if total else 0.0,
+                "mb_per_s": nbytes / 1e6 / total if total else 0.0,
+            }
+
+        return {
+            "wall_time_s": wall_time,
+            "stages": stage_summary,
+            "tables": tables,
+            "files": files,
+            "notes": self.notes,
+        }
+
+    def speedup(self, baseline: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Compares the throughput of the run and its stages with another run.
+
+        The throughput of the run is the number of extracted rows per
+        second of wall time.
+
+        Args:
+            baseline (Dict[str, Any]): Summary of the other run, e.g.
+                loaded from the JSON written by `dump`.
+
+        Returns:
+            Dict[str, float]: Ratio of the rows per second of the run
+                (`run`) and by stage, above 1 if this run is faster. Stages
+                without rows are left out.
+        """
+        summary = self.summary()
+        previous = baseline.get("stages", {})
+
+        def run_rate(data: Dict[str, Any]) -> float:
+            rows = (
+                data.get("stages", {}).get("extract_data", {}).get("rows", 0)
+            )
+            wall_time = data.get("wall_time_s", 0.0)
+            return rows / wall_time if wall_time else 0.0
+
+        speedup = {}
+        before, after = run_rate(baseline), run_rate(summary)
+        if before and after:
+            speedup["run"] = round(after / before, 2)
+        for name, stage in summary["stages"].items():
+            before = previous.get(name, {}).get("rows_per_s", 0.0)
+            if before and stage["rows_per_s"]:
+                speedup[name] = round(stage["rows_per_s"] / before, 2)
+        return speedup
+
+    def report(self) -> str:
+        """
+        Formats the summary as a table for the terminal.
+
+        Returns:
+            str: The formatted report.
+        """
+        summary = self.summary()
+        header = (
+            f"{'stage':<20}{'count':>7}{'total s':>10}{'share':>8}"
+            f"{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"
+            f"{'rows/s':>12}{'MB/s':>9}"
+        )
+        lines = [header, "-" * len(header)]
+        stages = sorted(
+            summary["stages"].items(),
+            key=lambda item: item[1]["total_s"],
+            reverse=True,
+        )
+        for name, stage in stages:
+            lines.append(
+                f"{name:<20}{stage['count']:>7}{stage['total_s']:>10.2f}"
+                f"{stage['share']:>8.1%}{stage['p50_s'] * 1e3:>10.1f}"
+                f"{stage['p95_s'] * 1e3:>10.1f}{stage['max_s'] * 1e3:>10.1f}"
+                f"{stage['rows_per_s']:>12.0f}{stage['mb_per_s']:>9.2f}"
+            )
+        lines.append("-" * len(header))
+        lines.append(
+            f"wall time {summary['wall_time_s']:.2f} s, "
+            f"{len(summary['files'])} files, {len(summary['tables'])} tables"
+        )
+        for key, value in summary["notes"].items():
+            lines.append(f"{key}: {value}")
+        return "\n".join(lines)
+
+    def dump(self, path: Union[str, os.PathLike]) -> None:
+        """
+        Writes the summary and all records as JSON.
+
+        Args:
+            path (Union[str, os.PathLike]): Path of the JSON file.
+        """
+        data = self.summary()
+        data["records"] = [asdict(record) for record in self.records]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, default=str)
+        log.info(f"Profile written to {path}")
+
+
+profiler = Profiler()
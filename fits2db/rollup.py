@@ -0,0 +1,213 @@
+"""
+Time bucketed rollups of the ingested tables.
+
+For tables with `rollups` in their config the loaders maintain one rollup
+table per resolution, e.g. `housekeeping_rollup_hour`. A rollup row holds the
+`min`, `max`, `mean` and `count` of every numeric column of one file within
+one time bucket, stored as `<column>_min`, `<column>_max`, ... next to the
+bucket start in `timestamp` and the `file_meta_id` of the file. Columns that
+are not numeric, e.g. states stored as text, keep their last value of the
+bucket as `<column>_last`.
+
+Because every row belongs to exactly one file, uploading or updating a file
+only replaces the rollup rows of that file. Buckets shared by several files
+are merged at read time with `combine_rollup`.
+
+!!! note "Example usage"
+    ```python
+    from fits2db.rollup import choose_resolution, combine_rollup, rollup_table
+
+    resolution = choose_resolution("2021-01-01", "2021-12-31")  # "hour"
+    df = fits.read(
+        rollup_table("housekeeping", resolution), "2021-01-01", "2021-12-31"
+    )
+    df = combine_rollup(df)
+    ```
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Resolutions from fine to coarse with their bucket size
+RESOLUTIONS: Dict[str, str] = {"minute": "1min", "hour": "1h", "day": "1D"}
+AGGREGATES = ("min", "max", "mean", "count")
+# Aggregate of the columns that are not numeric
+STATE_AGGREGATE = "last"
+EXCLUDED_COLUMNS = {"id", "file_meta_id", "row_ordinal"}
+
+
+def rollup_table(table_name: str, resolution: str) -> str:
+    """
+    Returns the name of the rollup table of a table.
+
+    Args:
+        table_name (str): Name of the data table.
+        resolution (str): One of `RESOLUTIONS`.
+
+    Returns:
+        str: Name of the rollup table.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(
+            f"Unknown resolution {resolution}, use one of {', '.join(RESOLUTIONS)}"
+        )
+    return f"{str.lower(table_name)}_rollup_{resolution}"
+
+
+def numeric_columns(df: pd.DataFrame) -> List[str]:
+    """Returns the numeric columns of a table that are rolled up."""
+    return [
+        column
+        for column in df.select_dtypes(include="number").columns
+        if column not in EXCLUDED_COLUMNS
+    ]
+
+
+def state_columns(df: pd.DataFrame, date_column: str) -> List[str]:
+    """Returns the columns of a table that are rolled up by their last value."""
+    numeric = set(numeric_columns(df))
+    return [
+        column
+        for column in df.columns
+        if column not in numeric
+        and column not in EXCLUDED_COLUMNS
+        and column != date_column
+    ]
+
+
+def compute_rollup(
+    df: pd.DataFrame,
+    resolution: str,
+    date_column: str = "timestamp",
+    states: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Aggregates the columns of a table into time buckets.
+
+    Args:
+        df (pd.DataFrame): Prepared data of one file.
+        resolution (str): One of `RESOLUTIONS`.
+        date_column (str): Column with the timestamps.
+        states (Optional[List[str]]): Numeric columns that are rolled up by
+            their last value as well, e.g. enum codes.
+
+    Returns:
+        pd.DataFrame: One row per bucket with `timestamp`, the aggregates
+            of every numeric column and the last value of the other columns.
+    """
+    states = state_columns(df, date_column) + [
+        column for column in states or [] if column in df
+    ]
+    columns = [
+        column for column in numeric_columns(df) if column not in states
+    ]
+    buckets = pd.to_datetime(df[date_column]).dt.floor(RESOLUTIONS[resolution])
+    keys = buckets.to_numpy()
+    grouped = df[columns].groupby(keys, sort=True)
+    parts = {
+        aggregate: getattr(grouped, aggregate)() for aggregate in AGGREGATES
+    }
+    parts[STATE_AGGREGATE] = df[states].groupby(keys, sort=True).last()
+    return _assemble(parts, columns, states)
+
+
+def combine_rollup(
+    df: pd.DataFrame, resolution: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Merges rollup rows of the same bucket, e.g. of different files.
+
+    With a `resolution` the rows are first moved into the coarser buckets,
+    so an hourly rollup can be built from the minute rollup. Means are
+    weighted by the counts, of the last values the one of the last row of
+    a bucket is kept, so the rows are expected in the order of their time.
+
+    Args:
+        df (pd.DataFrame): Rollup rows as written by `compute_rollup`.
+        resolution (Optional[str]): Coarser resolution to combine into.
+
+    Returns:
+        pd.DataFrame: One row per bucket with `timestamp` and the aggregates.
+    """
+    columns = [
+        column[: -len("_count")]
+        for column in df.columns
+        if column.endswith("_count")
+        and f"{column[: -len('_count')]}_mean" in df
+    ]
+    buckets = pd.to_datetime(df["timestamp"])
+    if resolution is not None:
+        buckets = buckets.dt.floor(RESOLUTIONS[resolution])
+    keys = buckets.to_numpy()
+    suffix = f"_{STATE_AGGREGATE}"
+    states = [
+        column[: -len(suffix)]
+        for column in df.columns
+        if column.endswith(suffix)
+    ]
+
+    def frame(aggregate: str, names: List[str] = columns) -> pd.DataFrame:
+        values = df[[f"{column}_{aggregate}" for column in names]]
+        values.columns = names
+        return values
+
+    counts = frame("count").fillna(0)
+    weighted = (
+        (frame("mean").fillna(0) * counts).groupby(keys, sort=True).sum()
+    )
+    total = counts.groupby(keys, sort=True).sum()
+    parts = {
+        "min": frame("min").groupby(keys, sort=True).min(),
+        "max": frame("max").groupby(keys, sort=True).max(),
+        "mean": weighted / total.replace(0, np.nan),
+        "count": total,
+        STATE_AGGREGATE: frame(STATE_AGGREGATE, states)
+        .groupby(keys, sort=True)
+        .last(),
+    }
+    return _assemble(parts, columns, states)
+
+
+def _assemble(
+    parts: Dict[str, pd.DataFrame], columns: List[str], states: List[str]
+) -> pd.DataFrame:
+    """Joins the aggregates into one frame with `<column>_<aggregate>` columns."""
+    frames = []
+    for aggregate in AGGREGATES + (STATE_AGGREGATE,):
+        part = parts[aggregate]
+        if aggregate == "count":
+            part = part.astype("int64")
+        frames.append(part.add_suffix(f"_{aggregate}"))
+    result = pd.concat(frames, axis=1)
+    result = result[
+        [
+            f"{column}_{aggregate}"
+            for column in columns
+            for aggregate in AGGREGATES
+        ]
+        + [f"{column}_{STATE_AGGREGATE}" for column in states]
+    ]
+    result.index.name = "timestamp"
+    return result.reset_index()
+
+
+def choose_resolution(start, end, max_points: int = 10000) -> str:
+    """
+    Returns the finest resolution with at most `max_points` buckets in a range.
+
+    Args:
+        start: Start of the range.
+        end: End of the range.
+        max_points (int): Maximum number of buckets.
+
+    Returns:
+        str: The resolution, the coarsest one if all of them have more
+            than `max_points` buckets.
+    """
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    for resolution, freq in RESOLUTIONS.items():
+        if span / pd.Timedelta(freq) <= max_points:
+            return resolution
+    return list(RESOLUTIONS)[-1]
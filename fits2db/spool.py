@@ -0,0 +1,386 @@
+"""
+Local spool of prepared tables.
+
+The FITS files often live on a slow network share. With a spool directory
+every file is read from the share once: its configured tables are
+extracted, prepared with `prepare_dataframe` and written as Arrow IPC files
+(zstd compressed) into the spool before anything is loaded. The loaders
+then get a `SpooledFile`, which replays the prepared tables from the local
+disk. A retry after a database error, a rebuild or a load into another
+database with the same spool directory reads neither the share nor runs
+the preparation again.
+
+An entry is valid as long as the size and modification time of the FITS
+file and the table configs are unchanged. Writing a new entry of a file
+removes its outdated entries.
+
+!!! note "Example usage"
+    ```python
+    from fits2db.fits import FitsFile
+    from fits2db.spool import Spool
+
+    spool = Spool("/scratch/fits2db_spool")
+    file = spool.open(path, table_configs)
+    if file is None:
+        file = spool.write(FitsFile(path), table_configs)
+    DBWriter(configs, file).upsert()
+    ```
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import pandas as pd
+
+from .adapters.base import prepare_dataframe
+from .fits.fits import FitsFile, FitsTable
+from .memory import estimate_table_bytes, governor
+from .profiling import profiler
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+log = logging.getLogger("fits2db")
+
+# Bump when the layout of an entry or the preparation changes
+SPOOL_VERSION = 2
+MANIFEST_NAME = "manifest.json"
+
+
+def _path_key(path: Union[str, os.PathLike]) -> str:
+    text = Path(path).resolve().as_posix()
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def _meta_cards(meta: pd.DataFrame) -> List[list]:
+    """Returns the header cards as JSON values, hashing them stays stable."""
+    cards = []
+    for keyword, value in zip(meta.iloc[:, 0], meta.iloc[:, 1]):
+        if not isinstance(value, (bool, int, float, str)):
+            value = str(value)
+        cards.append([str(keyword), value])
+    return cards
+
+
+class SpooledFile:
+    """
+    A FITS file replayed from the spool.
+
+    It has the attributes and table accessors of `FitsFile` the loaders
+    use, but returns the prepared tables of the spool entry. The FITS file
+    itself is not opened.
+
+    Attributes:
+        entry (Path): Directory of the spool entry.
+        manifest (Dict[str, Any]): Description of the file and its tables.
+    """
+
+    def __init__(self, entry: Path, manifest: Dict[str, Any]) -> None:
+        self.entry = entry
+        self.manifest = manifest
+        self.file_path = Path(manifest["file_path"])
+        self.absolute_path = Path(manifest["absolute_path"])
+        self.file_name = manifest["file_name"]
+        self.file_size = manifest["file_size"]
+        self.mtime = manifest["mtime"]
+        self.mdate = datetime.fromisoformat(manifest["mdate"])
+        self.table_names = manifest["table_names"]
+
+    def _table(self, name: str) -> Dict[str, Any]:
+        if name not in self.manifest["tables"]:
+            raise KeyError(
+                f"\n Key {name} is not a table in HDUL. \n in file {self.absolute_path}"
+            )
+        table = self.manifest["tables"][name]
+        if table["error"] is not None:
+            raise ValueError(table["error"])
+        return table
+
+    def _meta(self, table: Dict[str, Any]) -> pd.DataFrame:
+        return pd.DataFrame(table["meta"], columns=["Keyword", "Value"])
+
+    def _reader(self, table: Dict[str, Any]):
+        source = pa.memory_map((self.entry / table["path"]).as_posix())
+        return pa.ipc.open_file(source)
+
+    def get_table(self, name: str) -> FitsTable:
+        """Reads a prepared table from the spool."""
+        table = self._table(name)
+        with profiler.stage(
+            "read_spool", file=self.file_name, table=name.lower()
+        ) as stage:
+            data = self._reader(table).read_all().to_pandas()
+            stage.count(rows=len(data), nbytes=table["bytes"])
+        return FitsTable(
+            name=name, meta=self._meta(table), data=data, prepared=True
+        )
+
+    def table_header(self, name: str) -> Dict[str, Any]:
+        """Returns the header cards of a table, NAXIS2 are the spooled rows."""
+        table = self._table(name)
+        header = {keyword: value for keyword, value in table["meta"]}
+        header["NAXIS2"] = table["rows"]
+        return header
+
+    def iter_table(self, name: str, chunk_rows: int) -> Iterator[FitsTable]:
+        """Yields a prepared table in chunks of at most `chunk_rows` rows."""
+        table = self._table(name)
+        reader = self._reader(table)
+        batches = []
+        rows = 0
+        for index in range(reader.num_record_batches):
+            batch = reader.get_batch(index)
+            while len(batch):
+                part = batch.slice(0, chunk_rows - rows)
+                batch = batch.slice(len(part))
+                batches.append(part)
+                rows += len(part)
+                if rows == chunk_rows:
+                    yield self._chunk(name, table, batches)
+                    batches, rows = [], 0
+        if batches:
+            yield self._chunk(name, table, batches)
+
+    def _chunk(self, name, table, batches) -> FitsTable:
+        with profiler.stage(
+            "read_spool", file=self.file_name, table=name.lower()
+        ) as stage:
+            data = pa.Table.from_batches(batches).to_pandas()
+            stage.count(rows=len(data))
+        return FitsTable(
+            name=name, meta=self._meta(table), data=data, prepared=True
+        )
+
+    def close(self) -> None:
+        """Nothing to close, the Arrow files are mapped per read."""
+
+
+class Spool:
+    """
+    Directory of spooled FITS files.
+
+    Every file gets a directory `<path hash>/<version hash>/` with one
+    `<n>.arrow` file per prepared table and a `manifest.json`, which is
+    written last and marks the entry as complete.
+
+    Attributes:
+        root (Path): Directory of the spool.
+    """
+
+    def __init__(self, root: Union[str, os.PathLike]) -> None:
+        """
+        Initializes the spool and creates its directory.
+
+        Args:
+            root (Union[str, os.PathLike]): Directory of the spool.
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+        """
+        if pa is None:
+            raise ImportError(
+                "The spool needs pyarrow, install it with "
+                "`pip install fits2db[parquet]`"
+            )
+        self.root = Path(root).expanduser()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def entry(
+        self,
+        path: Union[str, os.PathLike],
+        table_configs: List[Dict[str, Any]],
+    ) -> Path:
+        """
+        Returns the directory of the current entry of a file.
+
+        Args:
+            path (Union[str, os.PathLike]): Path of the FITS file.
+            table_configs (List[Dict[str, Any]]): The `tables` of the config.
+
+        Returns:
+            Path: The entry directory, it may not exist yet.
+        """
+        stat = Path(path).stat()
+        version = json.dumps(
+            {
+                "version": SPOOL_VERSION,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "tables": table_configs,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.sha256(version.encode("utf-8")).hexdigest()[:32]
+        return self.root / _path_key(path) / digest
+
+    def open(
+        self,
+        path: Union[str, os.PathLike],
+        table_configs: List[Dict[str, Any]],
+    ) -> Optional[SpooledFile]:
+        """
+        Opens the spooled file, None if it is not spooled or outdated.
+
+        Args:
+            path (Union[str, os.PathLike]): Path of the FITS file.
+            table_configs (List[Dict[str, Any]]): The `tables` of the config.
+
+        Returns:
+            Optional[SpooledFile]: The spooled file.
+        """
+        entry = self.entry(path, table_configs)
+        try:
+            with open(entry / MANIFEST_NAME, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        log.debug(f"Replaying {path} from the spool")
+        return SpooledFile(entry, manifest)
+
+    def write(
+        self, file: FitsFile, table_configs: List[Dict[str, Any]]
+    ) -> SpooledFile:
+        """
+        Extracts and prepares the configured tables of a file into the spool.
+
+        Tables that do not fit into the memory budget are extracted in
+        chunks and written batch by batch. A table whose date column can not
+        be parsed is recorded with its error, the loaders then reject the
+        file as they would without a spool.
+
+        Args:
+            file (FitsFile): The opened FITS file.
+            table_configs (List[Dict[str, Any]]): The `tables` of the config.
+
+        Returns:
+            SpooledFile: The spooled file.
+        """
+        entry = self.entry(file.absolute_path, table_configs)
+        shutil.rmtree(entry.parent, ignore_errors=True)
+        entry.mkdir(parents=True)
+        manifest = {
+            "version": SPOOL_VERSION,
+            "file_path": Path(file.file_path).as_posix(),
+            "absolute_path": file.absolute_path.as_posix(),
+            "file_name": file.file_name,
+            "file_size": file.file_size,
+            "mtime": file.mtime,
+            "mdate": file.mdate.isoformat(),
+            "table_names": list(file.table_names),
+            "tables": {},
+        }
+        with profiler.stage("write_spool", file=file.file_name) as stage:
+            for index, table in enumerate(table_configs):
+                name = table["name"]
+                if name not in file.table_names:
+                    continue
+                path = entry / f"{index}.arrow"
+                manifest["tables"][name] = self._write_table(file, table, path)
+                stage.count(
+                    rows=manifest["tables"][name]["rows"],
+                    nbytes=manifest["tables"][name]["bytes"],
+                )
+        tmp = entry / f".{MANIFEST_NAME}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, entry / MANIFEST_NAME)
+        log.info(f"Spooled {file.file_name} to {entry}")
+        return SpooledFile(entry, manifest)
+
+    def _write_table(
+        self, file: FitsFile, table: Dict[str, Any], path: Path
+    ) -> Dict[str, Any]:
+        """Writes one prepared table, returns its manifest entry."""
+        name = table["name"]
+        header = file.table_header(name)
+        estimate = estimate_table_bytes(header) if governor.enabled else 0
+        if governor.try_reserve(estimate):
+            try:
+                chunks = [file.get_table(name)]
+                meta = chunks[0].meta
+                result = self._write_chunks(
+                    file.file_name, chunks, table, path
+                )
+            finally:
+                governor.release(estimate)
+        else:
+            rows = max(int(header.get("NAXIS2", 0)), 1)
+            chunk_rows = governor.chunk_rows(estimate // rows)
+            meta = file.extract_meta(file.hdul[name])
+            result = self._write_chunks(
+                file.file_name, file.iter_table(name, chunk_rows), table, path
+            )
+        result["meta"] = _meta_cards(meta)
+        return result
+
+    def _write_chunks(
+        self, file_name: str, chunks, table: Dict[str, Any], path: Path
+    ) -> Dict[str, Any]:
+        """Prepares the chunks of a table and appends them to an Arrow file."""
+        writer = schema = None
+        rows = 0
+        try:
+            for chunk in chunks:
+                # Same columns as `BaseLoader.prepare_table`, the file id
+                # is set when the table is replayed
+                data = chunk.data
+                data["FILE_META_ID"] = 0
+                data.columns = map(str.lower, data.columns)
+                try:
+                    with profiler.stage(
+                        "prepare_dataframe",
+                        file=file_name,
+                        table=str.lower(table["name"]),
+                    ) as stage:
+                        data = prepare_dataframe(
+                            data, table["date_column"], table.get("enums")
+                        )
+                        stage.count(rows=len(data))
+                except ValueError as err:
+                    if writer is not None:
+                        writer.close()
+                        writer = None
+                    path.unlink(missing_ok=True)
+                    return {
+                        "path": None,
+                        "rows": 0,
+                        "bytes": 0,
+                        "error": str(err),
+                    }
+                # The index holds the FITS row numbers for `row_ordinal`
+                batch = pa.Table.from_pandas(
+                    data, schema=schema, preserve_index=True
+                )
+                if writer is None:
+                    schema = batch.schema
+                    writer = pa.ipc.new_file(
+                        path.as_posix(),
+                        schema,
+                        options=pa.ipc.IpcWriteOptions(compression="zstd"),
+                    )
+                writer.write_table(batch)
+                rows += len(data)
+        finally:
+            if writer is not None:
+                writer.close()
+        return {
+            "path": path.name,
+            "rows": rows,
+            "bytes": path.stat().st_size,
+            "error": None,
+        }
+
+    def clear(self) -> None:
+        """Removes all entries."""
+        for child in self.root.iterdir():
+            if child.is_dir():
+                shutil.rmtree(child, ignore_errors=True)
@@ -22,9 +22,377 @@ import datetime
 from matplotlib import ticker
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+import numpy as np
 import pandas as pd
 from matplotlib.ticker import AutoMinorLocator, MultipleLocator
 
+# Downsampling of the time series before plotting. The number of drawn points
+# only depends on the pixel width of the axes (about 2000 px for a subplot of
+# the 9 in wide figures at 500 dpi), not on the number of rows.
+DOWNSAMPLE_METHODS = ("minmax", "lttb", "none")
+
+
+def _to_float(values) -> np.ndarray:
+    """Returns values as floats, datetimes as matplotlib date numbers."""
+    values = np.asarray(values)
+    if values.dtype.kind in "MO":
+        return np.asarray(mdates.date2num(values), dtype=float)
+    return values.astype(float)
+
+
+def target_points(axis: plt.Axes) -> int:
+    """Returns the width of an axes in pixels of the saved figure."""
+    return max(int(axis.get_window_extent().width), 1)
+
+
+def minmax_downsample(x, y, n_buckets: int) -> np.ndarray:
+    """
+    Selects the minimum and maximum of every pixel bucket.
+
+    The x range is split into `n_buckets` equally wide buckets and the
+    indices of the smallest and largest y value of each bucket are kept, so
+    spikes stay visible. NaN values are dropped.
+
+    Args:
+        x: X values, numeric or datetimes.
+        y: Y values.
+        n_buckets (int): Number of buckets, usually the pixel width.
+
+    Returns:
+        np.ndarray: Sorted indices of the selected points.
+    """
+    x = _to_float(x)
+    y = _to_float(y)
+    valid = np.flatnonzero(~(np.isnan(x) | np.isnan(y)))
+    if len(valid) <= 2 * n_buckets:
+        return valid
+    xv, yv = x[valid], y[valid]
+    x_min, x_max = xv.min(), xv.max()
+    if x_max == x_min:
+        buckets = np.zeros(len(xv), dtype=np.int64)
+    else:
+        scaled = (xv - x_min) / (x_max - x_min) * n_buckets
+        buckets = scaled.astype(np.int64)
+        np.minimum(buckets, n_buckets - 1, out=buckets)
+    order = np.lexsort((yv, buckets))
+    sorted_buckets = buckets[order]
+    starts = np.flatnonzero(np.diff(sorted_buckets, prepend=-1))
+    ends = np.append(starts[1:], len(order)) - 1
+    return valid[np.unique(np.concatenate((order[starts], order[ends])))]
+
+
+def lttb(x, y, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last point are kept and of every bucket in between the
+    point spanning the largest triangle with the previously selected point and
+    the mean of the next bucket. Bucket means are computed with cumulative
+    sums, so only the selection loop over the `n_out` buckets is left in
+    Python. The data must be sorted by x, NaN values are dropped.
+
+    Args:
+        x: X values, numeric or datetimes.
+        y: Y values.
+        n_out (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted indices of the selected points.
+    """
+    x = _to_float(x)
+    y = _to_float(y)
+    valid = np.flatnonzero(~(np.isnan(x) | np.isnan(y)))
+    n = len(valid)
+    if n <= n_out or n_out < 3:
+        return valid
+    xv, yv = x[valid] - x[valid[0]], y[valid]
+
+    # n_out - 2 buckets between the first and the last point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    cum_x = np.concatenate(([0.0], np.cumsum(xv)))
+    cum_y = np.concatenate(([0.0], np.cumsum(yv)))
+    sizes = np.maximum(edges[1:] - edges[:-1], 1)
+    mean_x = (cum_x[edges[1:]] - cum_x[edges[:-1]]) / sizes
+    mean_y = (cum_y[edges[1:]] - cum_y[edges[:-1]]) / sizes
+    # The last bucket looks ahead to the last point
+    next_x = np.append(mean_x[1:], xv[-1])
+    next_y = np.append(mean_y[1:], yv[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        area = np.abs(
+            (xv[a] - next_x[i]) * (yv[lo:hi] - yv[a])
+            - (xv[a] - xv[lo:hi]) * (next_y[i] - yv[a])
+        )
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return valid[np.unique(selected)]
+
+
+def downsample(x, y, n_points: int, method: str = "minmax"):
+    """
+    Reduces a time series to about `n_points` points.
+
+    Args:
+        x: X values.
+        y: Y values.
+        n_points (int): Target number of points, usually the pixel width.
+        method (str): One of `DOWNSAMPLE_METHODS`. `minmax` keeps the
+            extremes of every pixel bucket (at most `2 * n_points` points),
+            `lttb` keeps the visual shape with `n_points` points.
+
+    Returns:
+        tuple: The selected x and y values with their original types.
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(
+            f"Unknown method {method}, "
+            f"use one of {', '.join(DOWNSAMPLE_METHODS)}"
+        )
+    if method == "none" or len(x) <= n_points:
+        return x, y
+    if method == "lttb":
+        index = lttb(x, y, n_points)
+    else:
+        index = minmax_downsample(x, y, n_points)
+    return _take(x, index), _take(y, index)
+
+
+def _take(values, index: np.ndarray):
+    """Selects the values at `index`, keeping Series as Series."""
+    if isinstance(values, pd.Series):
+        return values.iloc[index]
+    return np.asarray(values)[index]
+
+
+def pixel_downsample(x, y, xlim, ylim, shape) -> np.ndarray:
+    """
+    Keeps one point of every pixel a scatter plot draws into.
+
+    The x and y limits are divided into the `shape` pixels of the axes,
+    points outside of the limits fall into pixels of the same size. Of
+    every occupied pixel the first point is kept. NaN values are dropped.
+
+    Args:
+        x: X values.
+        y: Y values.
+        xlim (tuple): Lower and upper x limit of the axes.
+        ylim (tuple): Lower and upper y limit of the axes.
+        shape (tuple): Width and height of the axes in pixels.
+
+    Returns:
+        np.ndarray: Sorted indices of the selected points.
+    """
+    x = _to_float(x)
+    y = _to_float(y)
+    valid = np.flatnonzero(~(np.isnan(x) | np.isnan(y)))
+    width, height = shape
+    columns = np.floor(
+        (x[valid] - xlim[0]) / (xlim[1] - xlim[0]) * width
+    ).astype(np.int64)
+    rows = np.floor(
+        (y[valid] - ylim[0]) / (ylim[1] - ylim[0]) * height
+    ).astype(np.int64)
+    _, first = np.unique(
+        np.stack((columns, rows), axis=1), axis=0, return_index=True
+    )
+    return valid[np.sort(first)]
+
+
+def plot_series(axis: plt.Axes, x, y, *args, method: str = "minmax", **kwargs):
+    """
+    Plots a time series downsampled to the pixel width of the axes.
+
+    Takes the same arguments as `Axes.plot`.
+
+    Args:
+        axis (plt.Axes): Axes to plot into.
+        x: X values.
+        y: Y values.
+        method (str): Downsampling method, see `downsample`.
+
+    Returns:
+        list: The created lines.
+    """
+    x, y = downsample(x, y, target_points(axis), method)
+    return axis.plot(x, y, *args, **kwargs)
+
+
+def plot_scatter(axis: plt.Axes, x, y, *args, xlim, ylim, **kwargs):
+    """
+    Plots a scatter reduced to one point per pixel of the axes.
+
+    Takes the same arguments as `Axes.plot`, the limits are set on the axes.
+
+    Args:
+        axis (plt.Axes): Axes to plot into.
+        x: X values.
+        y: Y values.
+        xlim (tuple): Lower and upper x limit of the axes.
+        ylim (tuple): Lower and upper y limit of the axes.
+
+    Returns:
+        list: The created lines.
+    """
+    extent = axis.get_window_extent()
+    shape = (max(int(extent.width), 1), max(int(extent.height), 1))
+    index = pixel_downsample(x, y, xlim, ylim, shape)
+    lines = axis.plot(_take(x, index), _take(y, index), *args, **kwargs)
+    axis.set_xlim(*xlim)
+    axis.set_ylim(*ylim)
+    return lines
+
+
+# Columns read by the plot functions, so only these have to be queried
+PLOT_COLUMNS = {
+    "plot_HK_1": [
+        "timestamp",
+        "dcdc_12vdcdc_temp",
+        "dcdc_5vdcdc_temp",
+        "dcdc_icl_temp",
+        "dcdc_cs_temp",
+        "dcdc_5vpos_d_cm",
+        "dcdc_5vpos_a_cm",
+        "dcdc_12vpos_cm",
+        "dcdc_12vneg_cm",
+        "dcdc_28v_prim_current",
+        "cpu_hkref_temp",
+        "cpu_adc_temp",
+        "cpu_cpu_temp",
+        "cpu_mram_temp",
+        "cpu_sram_temp",
+        "cpu_osc_temp",
+        "dcdc_5vpos_a_prot",
+        "dcdc_5vpos_d_prot",
+        "dcdc_12vneg_prot",
+        "dcdc_12vpos_prot",
+        "cpu_vcc",
+        "cpu_vcc_3v3",
+        "daq_inst_a_i_temp",
+        "daq_inst_b_i_temp",
+        "daq_inst_c_i_temp",
+        "daq_ref_temp",
+        "daq_a_temp",
+        "daq_b_temp",
+        "daq_c_temp",
+        "daq_d_temp",
+        "daq_e_temp",
+        "sb_sha_board_temp",
+        "sb_shb_board_temp",
+        "sb_shc_board_temp",
+        "sb_mot_a_temp",
+        "sb_mot_b_temp",
+        "sb_mot_c_temp",
+        "sb_reg_a_temp",
+        "sb_reg_b_temp",
+        "sb_reg_c_temp",
+        "sb_mcu_temp",
+        "sb_case_temp",
+        "sb_bottom_temp",
+    ],
+    "plot_HK_2": [
+        "timestamp",
+        "cav_heatsink_temp",
+        "cav_inst_a_u_temp",
+        "cav_inst_b_u_temp",
+        "cav_inst_c_u_temp",
+        "sb_4qa",
+        "sb_4qb",
+        "sb_4qc",
+        "sb_4qd",
+        "daq_hk_ref_mon",
+        "adc128s_5v",
+        "adc128s_2v5",
+        "adc128s_agnd",
+    ],
+    "plot_SCI_1": [
+        "timestamp",
+        "voltage_a",
+        "voltage_b",
+        "voltage_c",
+        "shuntvoltagea",
+        "shuntvoltageb",
+        "shuntvoltagec",
+        "daca",
+        "dacb",
+        "dacc",
+        "nominal_cavity",
+        "reference_cavity",
+        "backup_cavity_1",
+        "shutter_a_2st_phase_open",
+        "shutter_b_2st_phase_open",
+        "shutter_c_2st_phase_open",
+        "shutter_a_1st_phase_open",
+        "shutter_b_1st_phase_open",
+        "shutter_c_1st_phase_open",
+    ],
+    "plot_irr": [
+        "timestamp",
+        "irradiance_a_wm2",
+        "irradiance_b_wm2",
+        "irradiance_c_wm2",
+    ],
+    "plot_parameter": [
+        "timestamp",
+        "ttu",
+        "thk",
+        "iss",
+        "ima",
+        "imb",
+        "imc",
+        "ucr",
+        "apo",
+        "aio",
+        "ado",
+        "apc",
+        "aic",
+        "adc",
+        "bpo",
+        "bio",
+        "bdo",
+        "bpc",
+        "bic",
+        "bdc",
+        "cpo",
+        "cio",
+        "cdo",
+        "cpc",
+        "cic",
+        "cdc",
+    ],
+}
+
+
+def cfg_columns(cfg) -> list:
+    """Returns the x and y columns of a plot config like `hk1.yml`."""
+    columns = []
+    for subplot in cfg["content"]:
+        for plot_cfg in subplot["data"]:
+            columns += [plot_cfg["x"], plot_cfg["y"]]
+    return list(dict.fromkeys(columns))
+
+
+def plot_columns(*plots, cfgs=()) -> list:
+    """
+    Returns the columns needed by plot functions and plot configs.
+
+    Args:
+        *plots: Names of plot functions in `PLOT_COLUMNS`.
+        cfgs: Plot configs for `plot_HK_1_from_cfg`.
+
+    Returns:
+        list: The union of the columns in order of first use.
+    """
+    columns = []
+    for plot in plots:
+        columns += PLOT_COLUMNS[plot]
+    for cfg in cfgs:
+        columns += cfg_columns(cfg)
+    return list(dict.fromkeys(columns))
+
 
 def replace(i):
     switcher = {"none": 0, "A": 1, "B": 2, "C": 3}
@@ -103,36 +471,29 @@ def create_irradiance_fig(plot_title):
     return f, ax
 
 
+CAVITY_COLUMNS = ("nominal_cavity", "reference_cavity", "backup_cavity_1")
+CAVITY_CODES = {"a": 1, "b": 2, "c": 3}
+
+
 def convert_cavity_to_numeric(
     df,
 ):
-    cavity_map = {
-        "a": 1,
-        "A": 1,
-        "b": 2,
-        "B": 2,
-        "c": 3,
-        "C": 3,
-        "none": 0,
-        None: 0,
-    }
-    df["nominal_cavity"] = (
-        df["nominal_cavity"]
-        .map(lambda x: cavity_map.get(x, 0))
-        .astype("uint8")
-    )
-    df["reference_cavity"] = (
-        df["reference_cavity"]
-        .map(lambda x: cavity_map.get(x, 0))
-        .astype("uint8")
-    )
-    df["backup_cavity_1"] = (
-        df["backup_cavity_1"]
-        .map(lambda x: cavity_map.get(x, 0))
-        .astype("uint8")
-    )
+    """Converts cavity letters to 1, 2, 3 and anything else to 0.
+
+    Databases ingested with the cavity `enums` in the fits2db config
+    already store the codes, those columns are returned unchanged.
+    """
+    for column in CAVITY_COLUMNS:
+        if column not in df or pd.api.types.is_numeric_dtype(df[column]):
+            continue
+        positions, uniques = pd.factorize(df[column])
+        codes = [
+            CAVITY_CODES.get(str(value).strip().lower(), 0)
+            for value in uniques
+        ]
+        lookup = np.array(codes + [0], dtype="uint8")
+        df[column] = lookup.take(positions)
     return df
-    pass
 
 
 def plot_HK_1_from_cfg(hkdata: pd.DataFrame, ax: plt.Axes, mode: str, cfg):
@@ -160,7 +521,8 @@ def plot_HK_1_from_cfg(hkdata: pd.DataFrame, ax: plt.Axes, mode: str, cfg):
         axis.set_ylabel(subplot["ylabel"])
         offset = subplot["y_offset"]
         for plot_cfg in subplot["data"]:
-            axis.plot(
+            plot_series(
+                axis,
                 hkdata[plot_cfg["x"]],
                 hkdata[plot_cfg["y"]] + offset,
                 plot_cfg["marker"],
@@ -243,7 +605,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
 
     ax[0, 0].set_title("DCDC Temperatures")
     ax[0, 0].set_ylabel("Temp [°C]")
-    ax[0, 0].plot(
+    plot_series(
+        ax[0, 0],
         hkdata["timestamp"],
         hkdata["dcdc_12vdcdc_temp"] - 273.15,
         "o",
@@ -251,7 +614,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DCDC_12VDCDC_Temp",
     )
-    ax[0, 0].plot(
+    plot_series(
+        ax[0, 0],
         hkdata["timestamp"],
         hkdata["dcdc_5vdcdc_temp"] - 273.15,
         "o",
@@ -259,7 +623,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DCDC_5VDCDC_Temp",
     )
-    ax[0, 0].plot(
+    plot_series(
+        ax[0, 0],
         hkdata["timestamp"],
         hkdata["dcdc_icl_temp"] - 273.15,
         "o",
@@ -267,7 +632,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DCDC_ICL_Temp",
     )
-    ax[0, 0].plot(
+    plot_series(
+        ax[0, 0],
         hkdata["timestamp"],
         hkdata["dcdc_cs_temp"] - 273.15,
         "o",
@@ -284,7 +650,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
 
     ax[0, 1].set_title("Currents")
     ax[0, 1].set_ylabel("Current [mA]")
-    ax[0, 1].plot(
+    plot_series(
+        ax[0, 1],
         hkdata["timestamp"],
         hkdata["dcdc_5vpos_d_cm"],
         "o",
@@ -292,7 +659,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DCDC_5VPOS_D_CM",
     )
-    ax[0, 1].plot(
+    plot_series(
+        ax[0, 1],
         hkdata["timestamp"],
         hkdata["dcdc_5vpos_a_cm"],
         "o",
@@ -300,7 +668,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DCDC_5VPOS_A_CM",
     )
-    ax[0, 1].plot(
+    plot_series(
+        ax[0, 1],
         hkdata["timestamp"],
         hkdata["dcdc_12vpos_cm"],
         "o",
@@ -308,7 +677,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DCDC_12VPOS_CM",
     )
-    ax[0, 1].plot(
+    plot_series(
+        ax[0, 1],
         hkdata["timestamp"],
         hkdata["dcdc_12vneg_cm"],
         "o",
@@ -316,7 +686,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DCDC_12VNEG_CM",
     )
-    ax[0, 1].plot(
+    plot_series(
+        ax[0, 1],
         hkdata["timestamp"],
         hkdata["dcdc_28v_prim_current"],
         "o",
@@ -334,7 +705,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
 
     ax[1, 0].set_title("CPU Temperatures")
     ax[1, 0].set_ylabel("Temp [°C]")
-    ax[1, 0].plot(
+    plot_series(
+        ax[1, 0],
         hkdata["timestamp"],
         hkdata["cpu_hkref_temp"] - 273.15,
         "o",
@@ -342,7 +714,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="CPU_HKREF_TEMP",
     )
-    ax[1, 0].plot(
+    plot_series(
+        ax[1, 0],
         hkdata["timestamp"],
         hkdata["cpu_adc_temp"] - 273.15,
         "o",
@@ -350,7 +723,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="CPU_ADC_TEMP",
     )
-    ax[1, 0].plot(
+    plot_series(
+        ax[1, 0],
         hkdata["timestamp"],
         hkdata["cpu_cpu_temp"] - 273.15,
         "o",
@@ -358,7 +732,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="CPU_CPU_TEMP",
     )
-    ax[1, 0].plot(
+    plot_series(
+        ax[1, 0],
         hkdata["timestamp"],
         hkdata["cpu_mram_temp"] - 273.15,
         "o",
@@ -366,7 +741,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="CPU_MRAM_TEMP",
     )
-    ax[1, 0].plot(
+    plot_series(
+        ax[1, 0],
         hkdata["timestamp"],
         hkdata["cpu_sram_temp"] - 273.15,
         "o",
@@ -374,7 +750,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="CPU_SRAM_TEMP",
     )
-    ax[1, 0].plot(
+    plot_series(
+        ax[1, 0],
         hkdata["timestamp"],
         hkdata["cpu_osc_temp"] - 273.15,
         "o",
@@ -394,7 +771,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
     # plot Secondary Voltages graph
     ax[1, 1].set_title("Secondary Voltages")
     ax[1, 1].set_ylabel("Voltage [V]")
-    ax[1, 1].plot(
+    plot_series(
+        ax[1, 1],
         hkdata["timestamp"],
         hkdata["dcdc_5vpos_a_prot"],
         "o",
@@ -402,7 +780,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DCDC_5VPOS_A_PROT",
     )
-    ax[1, 1].plot(
+    plot_series(
+        ax[1, 1],
         hkdata["timestamp"],
         hkdata["dcdc_5vpos_d_prot"],
         "o",
@@ -410,7 +789,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DCDC_5VPOS_D_PROT",
     )
-    ax[1, 1].plot(
+    plot_series(
+        ax[1, 1],
         hkdata["timestamp"],
         hkdata["dcdc_12vneg_prot"],
         "o",
@@ -418,7 +798,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DCDC_12VNEG_PROT",
     )
-    ax[1, 1].plot(
+    plot_series(
+        ax[1, 1],
         hkdata["timestamp"],
         hkdata["dcdc_12vpos_prot"],
         "o",
@@ -427,7 +808,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         label="DCDC_12VPOS_PROT",
     )
 
-    ax[1, 1].plot(
+    plot_series(
+        ax[1, 1],
         hkdata["timestamp"],
         hkdata["cpu_vcc"],
         "o",
@@ -435,7 +817,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="CPU_VCC",
     )
-    ax[1, 1].plot(
+    plot_series(
+        ax[1, 1],
         hkdata["timestamp"],
         hkdata["cpu_vcc_3v3"],
         "o",
@@ -454,7 +837,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
     # plot 4Q Sensor graph
     ax[2, 0].set_title("DAQ Temperatures")
     ax[2, 0].set_ylabel("Temp [°C]")
-    ax[2, 0].plot(
+    plot_series(
+        ax[2, 0],
         hkdata["timestamp"],
         hkdata["daq_inst_a_i_temp"] - 273.15,
         "o",
@@ -462,7 +846,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DAQ_INST_A_I_TEMP",
     )
-    ax[2, 0].plot(
+    plot_series(
+        ax[2, 0],
         hkdata["timestamp"],
         hkdata["daq_inst_b_i_temp"] - 273.15,
         "o",
@@ -470,7 +855,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DAQ_INST_B_I_TEMP",
     )
-    ax[2, 0].plot(
+    plot_series(
+        ax[2, 0],
         hkdata["timestamp"],
         hkdata["daq_inst_c_i_temp"] - 273.15,
         "o",
@@ -478,7 +864,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DAQ_INST_C_I_TEMP",
     )
-    ax[2, 0].plot(
+    plot_series(
+        ax[2, 0],
         hkdata["timestamp"],
         hkdata["daq_ref_temp"] - 273.15,
         "o",
@@ -486,7 +873,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DAQ_REF_TEMP",
     )
-    ax[2, 0].plot(
+    plot_series(
+        ax[2, 0],
         hkdata["timestamp"],
         hkdata["daq_a_temp"] - 273.15,
         "o",
@@ -494,7 +882,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DAQ_A_TEMP",
     )
-    ax[2, 0].plot(
+    plot_series(
+        ax[2, 0],
         hkdata["timestamp"],
         hkdata["daq_b_temp"] - 273.15,
         "o",
@@ -502,7 +891,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DAQ_B_TEMP",
     )
-    ax[2, 0].plot(
+    plot_series(
+        ax[2, 0],
         hkdata["timestamp"],
         hkdata["daq_c_temp"] - 273.15,
         "o",
@@ -510,7 +900,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DAQ_C_TEMP",
     )
-    ax[2, 0].plot(
+    plot_series(
+        ax[2, 0],
         hkdata["timestamp"],
         hkdata["daq_d_temp"] - 273.15,
         "o",
@@ -518,7 +909,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DAQ_D_TEMP",
     )
-    ax[2, 0].plot(
+    plot_series(
+        ax[2, 0],
         hkdata["timestamp"],
         hkdata["daq_e_temp"] - 273.15,
         "o",
@@ -537,7 +929,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
     # plot Reference Volatges graph
     ax[2, 1].set_title("Shutter Board Temperatures")
     ax[2, 1].set_ylabel("TEMP [°C]")
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         hkdata["timestamp"],
         hkdata["sb_sha_board_temp"] - 273.15,
         "o",
@@ -545,7 +938,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="SB_SHA_BOARD_TEMP",
     )
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         hkdata["timestamp"],
         hkdata["sb_shb_board_temp"] - 273.15,
         "o",
@@ -553,7 +947,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="SB_SHB_BOARD_TEMP",
     )
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         hkdata["timestamp"],
         hkdata["sb_shc_board_temp"] - 273.15,
         "o",
@@ -561,7 +956,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="SB_SHC_BOARD_TEMP",
     )
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         hkdata["timestamp"],
         hkdata["sb_mot_a_temp"] - 273.15,
         "o",
@@ -569,7 +965,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="SB_MOT_A_TEMP",
     )
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         hkdata["timestamp"],
         hkdata["sb_mot_b_temp"] - 273.15,
         "o",
@@ -577,7 +974,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="SB_MOT_B_TEMP",
     )
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         hkdata["timestamp"],
         hkdata["sb_mot_c_temp"] - 273.15,
         "o",
@@ -585,7 +983,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="SB_MOT_C_TEMP",
     )
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         hkdata["timestamp"],
         hkdata["sb_reg_a_temp"] - 273.15,
         "o",
@@ -593,7 +992,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="SB_REG_A_TEMP",
     )
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         hkdata["timestamp"],
         hkdata["sb_reg_b_temp"] - 273.15,
         "o",
@@ -601,7 +1001,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="SB_REG_B_TEMP",
     )
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         hkdata["timestamp"],
         hkdata["sb_reg_c_temp"] - 273.15,
         "o",
@@ -609,7 +1010,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="SB_REG_C_TEMP",
     )
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         hkdata["timestamp"],
         hkdata["sb_mcu_temp"] - 273.15,
         "o",
@@ -617,7 +1019,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="SB_MCU_TEMP",
     )
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         hkdata["timestamp"],
         hkdata["sb_case_temp"] - 273.15,
         "o",
@@ -625,7 +1028,8 @@ def plot_HK_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="SB_CASE_TEMP",
     )
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         hkdata["timestamp"],
         hkdata["sb_bottom_temp"] - 273.15,
         "o",
@@ -707,7 +1111,8 @@ def plot_HK_2(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
 
     ax[0, 0].set_title("Cavity Temperatures")
     ax[0, 0].set_ylabel("Temp [°C]")
-    ax[0, 0].plot(
+    plot_series(
+        ax[0, 0],
         hkdata["timestamp"],
         hkdata["cav_heatsink_temp"] - 273.15,
         "o",
@@ -715,7 +1120,8 @@ def plot_HK_2(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="CAV_HEATSINK_TEMP",
     )
-    ax[0, 0].plot(
+    plot_series(
+        ax[0, 0],
         hkdata["timestamp"],
         hkdata["cav_inst_a_u_temp"] - 273.15,
         "o",
@@ -723,7 +1129,8 @@ def plot_HK_2(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="CAV_INST_A_U_TEMP",
     )
-    ax[0, 0].plot(
+    plot_series(
+        ax[0, 0],
         hkdata["timestamp"],
         hkdata["cav_inst_b_u_temp"] - 273.15,
         "o",
@@ -731,7 +1138,8 @@ def plot_HK_2(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="CAV_INST_B_U_TEMP",
     )
-    ax[0, 0].plot(
+    plot_series(
+        ax[0, 0],
         hkdata["timestamp"],
         hkdata["cav_inst_c_u_temp"] - 273.15,
         "o",
@@ -749,7 +1157,8 @@ def plot_HK_2(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
     ax[0, 1].set_title("4Q Sensor Raw")
     ax[0, 1].set_ylabel("Voltage [V]")
 
-    ax[0, 1].plot(
+    plot_series(
+        ax[0, 1],
         hkdata["timestamp"],
         hkdata["sb_4qa"],
         "o",
@@ -757,7 +1166,8 @@ def plot_HK_2(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="SB_4QA",
     )
-    ax[0, 1].plot(
+    plot_series(
+        ax[0, 1],
         hkdata["timestamp"],
         hkdata["sb_4qb"],
         "o",
@@ -765,7 +1175,8 @@ def plot_HK_2(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="SB_4QB",
     )
-    ax[0, 1].plot(
+    plot_series(
+        ax[0, 1],
         hkdata["timestamp"],
         hkdata["sb_4qc"],
         "o",
@@ -773,7 +1184,8 @@ def plot_HK_2(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="SB_4QC",
     )
-    ax[0, 1].plot(
+    plot_series(
+        ax[0, 1],
         hkdata["timestamp"],
         hkdata["sb_4qd"],
         "o",
@@ -781,7 +1193,8 @@ def plot_HK_2(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="SB_4QD",
     )
-    ax[0, 1].plot(
+    plot_series(
+        ax[0, 1],
         hkdata["timestamp"],
         hkdata["sb_4qa"]
         + hkdata["sb_4qb"]
@@ -846,11 +1259,21 @@ def plot_HK_2(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
     ax[1, 0].set_ylabel("arcmin")
     # ax[1, 0].plot(hkdata["timestamp"], ___gamma, "b", markersize=__ms)
     # ax[1, 0].plot(hkdata["timestamp"], ___beta, "r", markersize=__ms)
-    ax[1, 0].plot(
-        hkdata["timestamp"], ___gamma, "b.", markersize=__ms, label="GAMMA"
+    plot_series(
+        ax[1, 0],
+        hkdata["timestamp"],
+        ___gamma,
+        "b.",
+        markersize=__ms,
+        label="GAMMA",
     )
-    ax[1, 0].plot(
-        hkdata["timestamp"], ___beta, "r.", markersize=__ms, label="BETA"
+    plot_series(
+        ax[1, 0],
+        hkdata["timestamp"],
+        ___beta,
+        "r.",
+        markersize=__ms,
+        label="BETA",
     )
     ax[1, 0].set_ylim(-60, 60)
     ax[1, 0].legend(numpoints=5, ncol=2, loc="upper right")
@@ -858,7 +1281,8 @@ def plot_HK_2(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
     # plot Auxilliary Voltages graph
     ax[1, 1].set_title("Aux Voltages")
     ax[1, 1].set_ylabel("Voltage [V]")
-    ax[1, 1].plot(
+    plot_series(
+        ax[1, 1],
         hkdata["timestamp"],
         hkdata["daq_hk_ref_mon"],
         "o",
@@ -866,7 +1290,8 @@ def plot_HK_2(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="DAQ_HK_REF_MON",
     )
-    ax[1, 1].plot(
+    plot_series(
+        ax[1, 1],
         hkdata["timestamp"],
         hkdata["adc128s_5v"],
         "o",
@@ -874,7 +1299,8 @@ def plot_HK_2(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="ADC128S_5V",
     )
-    ax[1, 1].plot(
+    plot_series(
+        ax[1, 1],
         hkdata["timestamp"],
         hkdata["adc128s_2v5"],
         "o",
@@ -882,7 +1308,8 @@ def plot_HK_2(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="ADC128S_2V5",
     )
-    ax[1, 1].plot(
+    plot_series(
+        ax[1, 1],
         hkdata["timestamp"],
         hkdata["adc128s_agnd"],
         "o",
@@ -906,17 +1333,18 @@ def plot_HK_2(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
     ax[2, 0].set_title("4Q Sensor Eval")
     ax[2, 0].set_xlabel("arcmin GAMMA")
     ax[2, 0].set_ylabel("arcmin BETA")
-    ax[2, 0].plot(
+    ax[2, 0].axis("equal")
+    plot_scatter(
+        ax[2, 0],
         ___gamma,
         ___beta,
         color="red",
         marker=".",
         markersize=__ms,
         linewidth=0,
+        xlim=(-60, 60),
+        ylim=(-50, 50),
     )
-    ax[2, 0].axis("equal")
-    ax[2, 0].set_xlim(left=-60, right=60)
-    ax[2, 0].set_ylim(-50, 50)
     # ax[2, 0].set_xlim(-73.3, 73.3)
 
     # plot 4Q Sensor graph
@@ -927,17 +1355,18 @@ def plot_HK_2(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
     ax[2, 1].set_title("4Q Sensor Eval")
     ax[2, 1].set_xlabel("arcmin GAMMA")
     ax[2, 1].set_ylabel("arcmin BETA")
-    ax[2, 1].plot(
+    ax[2, 1].axis("equal")
+    plot_scatter(
+        ax[2, 1],
         ___gamma,
         ___beta,
         color="red",
         marker=".",
         markersize=__ms,
         linewidth=0,
+        xlim=(-120, 120),
+        ylim=(-110, 110),
     )
-    ax[2, 1].axis("equal")
-    ax[2, 1].set_xlim(left=-120, right=120)
-    ax[2, 1].set_ylim(-110, 110)
     # ax[2, 1].set_xlim(-146.67, 146.67)
 
 
@@ -1010,7 +1439,8 @@ def plot_SCI_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
 
     ax[0, 0].set_title("Calibration Voltages Heater Voltage")
     ax[0, 0].set_ylabel("Heater Voltage [V]")
-    ax[0, 0].plot(
+    plot_series(
+        ax[0, 0],
         hkdata["timestamp"],
         hkdata["voltage_a"],
         "o",
@@ -1018,7 +1448,8 @@ def plot_SCI_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="heaterVoltageA",
     )
-    ax[0, 0].plot(
+    plot_series(
+        ax[0, 0],
         hkdata["timestamp"],
         hkdata["voltage_b"],
         "o",
@@ -1026,7 +1457,8 @@ def plot_SCI_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
         markersize=__ms,
         label="heaterVoltageB",
     )
-    ax[0, 0].plot(
+    plot_series(
+        ax[0, 0],
         hkdata["timestamp"],
         hkdata["voltage_c"],
         "o",
@@ -1044,23 +1476,29 @@ def plot_SCI_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
 
     ax[0, 1].set_title("Calibration Voltages Heater Current")
     ax[0, 1].set_ylabel("Shunt Voltage [V]")
-    ax[0, 1].plot_date(
+    plot_series(
+        ax[0, 1],
         hkdata["timestamp"],
         hkdata["shuntvoltagea"],
+        "o",
         color="blue",
         markersize=__ms,
         label="shuntVoltageA",
     )
-    ax[0, 1].plot_date(
+    plot_series(
+        ax[0, 1],
         hkdata["timestamp"],
         hkdata["shuntvoltageb"],
+        "o",
         color="red",
         markersize=__ms,
         label="shuntVoltageB",
     )
-    ax[0, 1].plot_date(
+    plot_series(
+        ax[0, 1],
         hkdata["timestamp"],
         hkdata["shuntvoltagec"],
+        "o",
         color="green",
         markersize=__ms,
         label="shuntVoltageC",
@@ -1078,23 +1516,29 @@ def plot_SCI_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
     else:
         ax[1, 0].set_xlabel("Date UTC")
     ax[1, 0].set_ylabel("DAC Voltage [V]")
-    ax[1, 0].plot_date(
+    plot_series(
+        ax[1, 0],
         hkdata["timestamp"],
         hkdata["daca"],
+        "o",
         color="blue",
         markersize=__ms,
         label="dacA",
     )
-    ax[1, 0].plot_date(
+    plot_series(
+        ax[1, 0],
         hkdata["timestamp"],
         hkdata["dacb"],
+        "o",
         color="red",
         markersize=__ms,
         label="dacB",
     )
-    ax[1, 0].plot_date(
+    plot_series(
+        ax[1, 0],
         hkdata["timestamp"],
         hkdata["dacc"],
+        "o",
         color="green",
         markersize=__ms,
         label="dacC",
@@ -1104,27 +1548,33 @@ def plot_SCI_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
 
     ax[1, 1].set_title("Cavity Assignment")
     ax[1, 1].set_ylabel("CAVITY")
-    ax[1, 1].plot_date(
+    plot_series(
+        ax[1, 1],
         hkdata["timestamp"],
         hkdata["nominal_cavity"],
+        "o",
         color="blue",
         markersize=__ms,
         linestyle="-",
         linewidth=0.1,
         label="nominal cavity",
     )
-    ax[1, 1].plot_date(
+    plot_series(
+        ax[1, 1],
         hkdata["timestamp"],
         hkdata["reference_cavity"],
+        "o",
         color="red",
         markersize=__ms,
         linestyle="-",
         linewidth=0.1,
         label="reference cavity",
     )
-    ax[1, 1].plot_date(
+    plot_series(
+        ax[1, 1],
         hkdata["timestamp"],
         hkdata["backup_cavity_1"],
+        "o",
         color="green",
         markersize=__ms,
         linestyle="-",
@@ -1145,27 +1595,33 @@ def plot_SCI_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
 
     ax[2, 0].set_title("Shutter 2 Phase Status")
     ax[2, 0].set_ylabel("Shutter")
-    ax[2, 0].plot_date(
+    plot_series(
+        ax[2, 0],
         hkdata["timestamp"],
         hkdata["shutter_a_2st_phase_open"] + 0,
+        "o",
         color="blue",
         markersize=__ms,
         linestyle="-",
         linewidth=0.1,
         label="Shutter A",
     )
-    ax[2, 0].plot_date(
+    plot_series(
+        ax[2, 0],
         hkdata["timestamp"],
         hkdata["shutter_b_2st_phase_open"] + 2,
+        "o",
         color="red",
         markersize=__ms,
         linestyle="-",
         linewidth=0.1,
         label="Shutter B",
     )
-    ax[2, 0].plot_date(
+    plot_series(
+        ax[2, 0],
         hkdata["timestamp"],
         hkdata["shutter_c_2st_phase_open"] + 4,
+        "o",
         color="green",
         markersize=__ms,
         linestyle="-",
@@ -1186,27 +1642,33 @@ def plot_SCI_1(hkdata: pd.DataFrame, ax: plt.Axes, mode: str):
     else:
         ax[2, 1].set_xlabel("Date UTC")
     ax[2, 1].set_ylabel("Shutter")
-    ax[2, 1].plot_date(
+    plot_series(
+        ax[2, 1],
         hkdata["timestamp"],
         hkdata["shutter_a_1st_phase_open"] + 0,
+        "o",
         color="blue",
         markersize=__ms,
         linestyle="-",
         linewidth=0.1,
         label="Shutter A",
     )
-    ax[2, 1].plot_date(
+    plot_series(
+        ax[2, 1],
         hkdata["timestamp"],
         hkdata["shutter_b_1st_phase_open"] + 2,
+        "o",
         color="red",
         markersize=__ms,
         linestyle="-",
         linewidth=0.1,
         label="Shutter B",
     )
-    ax[2, 1].plot_date(
+    plot_series(
+        ax[2, 1],
         hkdata["timestamp"],
         hkdata["shutter_c_1st_phase_open"] + 4,
+        "o",
         color="green",
         markersize=__ms,
         linestyle="-",
@@ -1286,30 +1748,36 @@ def plot_irr(irr_data: pd.DataFrame, ax: plt.Axes, mode: str = "lifetime"):
 
     ax[0].set_title("Irradiance A")
     ax[0].set_ylabel(r"Irradiance [W/m$^2$]")
-    ax[0].plot(
+    plot_series(
+        ax[0],
         irr_data["timestamp"],
         irr_data["irradiance_a_wm2"],
         "o",
         color="red",
         markersize=__ms,
+        method="lttb",
     )
     ax[1].set_title("Irradiance B")
     ax[1].set_ylabel(r"Irradiance [W/m$^2$]")
-    ax[1].plot(
+    plot_series(
+        ax[1],
         irr_data["timestamp"],
         irr_data["irradiance_b_wm2"],
         "o",
         color="blue",
         markersize=__ms,
+        method="lttb",
     )
     ax[2].set_title("Irradiance C")
     ax[2].set_ylabel(r"Irradiance [W/m$^2$]")
-    ax[2].plot(
+    plot_series(
+        ax[2],
         irr_data["timestamp"],
         irr_data["irradiance_c_wm2"],
         "o",
         color="green",
         markersize=__ms,
+        method="lttb",
     )
 
 
@@ -1380,14 +1848,16 @@ def plot_parameter(
 
     ax[0, 0].set_title("Parameter ttu/thk")
     ax[0, 0].set_ylabel("Interval Time [s]")
-    ax[0, 0].plot(
+    plot_series(
+        ax[0, 0],
         param_data["timestamp"],
         param_data["ttu"],
         "o",
         color="blue",
         markersize=__ms,
     )
-    ax[0, 0].plot(
+    plot_series(
+        ax[0, 0],
         param_data["timestamp"],
         param_data["thk"],
         "o",
@@ -1400,7 +1870,8 @@ def plot_parameter(
 
     ax[0, 1].set_title("Parameter iss/ima/imb/imc")
     ax[0, 1].set_ylabel("Value [number]")
-    ax[0, 1].plot(
+    plot_series(
+        ax[0, 1],
         param_data["timestamp"],
         param_data["iss"],
         "o",
@@ -1408,7 +1879,8 @@ def plot_parameter(
         markersize=__ms,
         label="iss",
     )
-    ax[0, 1].plot(
+    plot_series(
+        ax[0, 1],
         param_data["timestamp"],
         param_data["ima"],
         "o",
@@ -1416,7 +1888,8 @@ def plot_parameter(
         markersize=__ms,
         label="ima",
     )
-    ax[0, 1].plot(
+    plot_series(
+        ax[0, 1],
         param_data["timestamp"],
         param_data["imb"],
         "o",
@@ -1424,7 +1897,8 @@ def plot_parameter(
         markersize=__ms,
         label="imb",
     )
-    ax[0, 1].plot(
+    plot_series(
+        ax[0, 1],
         param_data["timestamp"],
         param_data["imc"],
         "o",
@@ -1438,7 +1912,8 @@ def plot_parameter(
 
     ax[1, 0].set_title("Parameter ucr")
     ax[1, 0].set_ylabel("Voltage [V]")
-    ax[1, 0].plot(
+    plot_series(
+        ax[1, 0],
         param_data["timestamp"],
         param_data["ucr"],
         "o",
@@ -1451,7 +1926,8 @@ def plot_parameter(
 
     ax[1, 1].set_title("Parameter apo/aio/ado/apc/aic/adc")
     ax[1, 1].set_ylabel("Value")
-    ax[1, 1].plot(
+    plot_series(
+        ax[1, 1],
         param_data["timestamp"],
         param_data["apo"],
         "o",
@@ -1459,7 +1935,8 @@ def plot_parameter(
         markersize=__ms,
         label="apo",
     )
-    ax[1, 1].plot(
+    plot_series(
+        ax[1, 1],
         param_data["timestamp"],
         param_data["aio"],
         "o",
@@ -1467,7 +1944,8 @@ def plot_parameter(
         markersize=__ms,
         label="aio",
     )
-    ax[1, 1].plot(
+    plot_series(
+        ax[1, 1],
         param_data["timestamp"],
         param_data["ado"],
         "o",
@@ -1475,7 +1953,8 @@ def plot_parameter(
         markersize=__ms,
         label="ado",
     )
-    ax[1, 1].plot(
+    plot_series(
+        ax[1, 1],
         param_data["timestamp"],
         param_data["apc"],
         "o",
@@ -1483,7 +1962,8 @@ def plot_parameter(
         markersize=__ms,
         label="apc",
     )
-    ax[1, 1].plot(
+    plot_series(
+        ax[1, 1],
         param_data["timestamp"],
         param_data["aic"],
         "o",
@@ -1491,7 +1971,8 @@ def plot_parameter(
         markersize=__ms,
         label="aic",
     )
-    ax[1, 1].plot(
+    plot_series(
+        ax[1, 1],
         param_data["timestamp"],
         param_data["adc"],
         "o",
@@ -1505,7 +1986,8 @@ def plot_parameter(
 
     ax[2, 0].set_title("Parameter bpo/bio/bdo/bpc/bic/bdc")
     ax[2, 0].set_ylabel("Value")
-    ax[2, 0].plot(
+    plot_series(
+        ax[2, 0],
         param_data["timestamp"],
         param_data["bpo"],
         "o",
@@ -1513,7 +1995,8 @@ def plot_parameter(
         markersize=__ms,
         label="bpo",
     )
-    ax[2, 0].plot(
+    plot_series(
+        ax[2, 0],
         param_data["timestamp"],
         param_data["bio"],
         "o",
@@ -1521,7 +2004,8 @@ def plot_parameter(
         markersize=__ms,
         label="bio",
     )
-    ax[2, 0].plot(
+    plot_series(
+        ax[2, 0],
         param_data["timestamp"],
         param_data["bdo"],
         "o",
@@ -1529,7 +2013,8 @@ def plot_parameter(
         markersize=__ms,
         label="bdo",
     )
-    ax[2, 0].plot(
+    plot_series(
+        ax[2, 0],
         param_data["timestamp"],
         param_data["bpc"],
         "o",
@@ -1537,7 +2022,8 @@ def plot_parameter(
         markersize=__ms,
         label="bpc",
     )
-    ax[2, 0].plot(
+    plot_series(
+        ax[2, 0],
         param_data["timestamp"],
         param_data["bic"],
         "o",
@@ -1545,7 +2031,8 @@ def plot_parameter(
         markersize=__ms,
         label="bic",
     )
-    ax[2, 0].plot(
+    plot_series(
+        ax[2, 0],
         param_data["timestamp"],
         param_data["bdc"],
         "o",
@@ -1559,7 +2046,8 @@ def plot_parameter(
 
     ax[2, 1].set_title("Parameter cpo/cio/cdo/cpc/cic/cdc")
     ax[2, 1].set_ylabel("Value")
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         param_data["timestamp"],
         param_data["cpo"],
         "o",
@@ -1567,7 +2055,8 @@ def plot_parameter(
         markersize=__ms,
         label="cpo",
     )
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         param_data["timestamp"],
         param_data["cio"],
         "o",
@@ -1575,7 +2064,8 @@ def plot_parameter(
         markersize=__ms,
         label="cio",
     )
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         param_data["timestamp"],
         param_data["cdo"],
         "o",
@@ -1583,7 +2073,8 @@ def plot_parameter(
         markersize=__ms,
         label="cdo",
     )
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         param_data["timestamp"],
         param_data["cpc"],
         "o",
@@ -1591,7 +2082,8 @@ def plot_parameter(
         markersize=__ms,
         label="cpc",
     )
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         param_data["timestamp"],
         param_data["cic"],
         "o",
@@ -1599,7 +2091,8 @@ def plot_parameter(
         markersize=__ms,
         label="cic",
     )
-    ax[2, 1].plot(
+    plot_series(
+        ax[2, 1],
         param_data["timestamp"],
         param_data["cdc"],
         "o",
@@ -7,7 +7,7 @@ import astropy.io.fits as fitsio
 from matplotlib.dates import DateFormatter
 from datetime import datetime
 from sqlalchemy import create_engine
-from TSI_PLOT_LIB_JTSIM_pandas import create_HKfig, create_Irradfig, plot_HK_1, plot_HK_2, plot_SCI_1 
+from TSI_PLOT_LIB_JTSIM_pandas import create_HKfig, create_Irradfig, plot_HK_1, plot_HK_2, plot_SCI_1, plot_columns
 
 # https://stackoverflow.com/questions/5734438/how-to-create-a-month-iterator
 def month_year_iter( start_month, start_year, end_month, end_year ):
@@ -49,13 +49,15 @@ end_date = '2022-06-10'
 # end_date = '2022-06-02 11:11:11'
 
 print(f'----- {start_date} to {end_date} -----')
-housekeeping_query = f"SELECT * FROM housekeeping WHERE timestamp BETWEEN '{start_date}' and '{end_date}' order by timestamp;"
+housekeeping_columns = ", ".join(plot_columns("plot_HK_1", "plot_HK_2"))
+housekeeping_query = f"SELECT {housekeeping_columns} FROM housekeeping WHERE timestamp BETWEEN '{start_date}' and '{end_date}' order by timestamp;"
 df_housekeeping = pd.read_sql(housekeeping_query, con=engine)
 df_housekeeping.columns = map(str.lower, df_housekeeping.columns)
 print("Finish loading data from DB")
 print(f"Rows loaded {len(df_housekeeping)}")
 
-calibration_query = f"SELECT * FROM calibration WHERE timestamp BETWEEN '{start_date}' and '{end_date}' order by timestamp;"
+calibration_columns = ", ".join(plot_columns("plot_SCI_1"))
+calibration_query = f"SELECT {calibration_columns} FROM calibration WHERE timestamp BETWEEN '{start_date}' and '{end_date}' order by timestamp;"
 df_calibration = pd.read_sql(calibration_query, con=engine)
 df_calibration.columns = map(str.lower, df_calibration.columns)
 print("Finish loading data from DB")
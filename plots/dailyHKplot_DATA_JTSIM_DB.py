@@ -14,7 +14,8 @@ from TSI_PLOT_LIB_JTSIM_pandas import (
     plot_HK_2,
     plot_SCI_1,
     convert_cavity_to_numeric,
-    plot_HK_1_from_cfg
+    plot_HK_1_from_cfg,
+    plot_columns,
 )
 
 
@@ -50,13 +51,18 @@ end_day = 30
 # AND `MONTH` = {start_month}
 # AND `DAY` BETWEEN {start_day} AND {end_day};
 # """
+housekeeping_columns = ", ".join(
+    plot_columns("plot_HK_1", "plot_HK_2", cfgs=[cfg])
+)
+calibration_columns = ", ".join(plot_columns("plot_SCI_1"))
+
 query = f"""
-SELECT * FROM housekeeping WHERE timestamp 
+SELECT {housekeeping_columns} FROM housekeeping WHERE timestamp 
 between '{start_year}-{start_month:02d}-{start_day:02d}' 
 and '{end_year}-{end_month:02d}-{end_day:02d}';"""
 
 calibration_query = f"""
-SELECT * FROM calibration WHERE timestamp 
+SELECT {calibration_columns} FROM calibration WHERE timestamp 
 between '{start_year}-{start_month:02d}-{start_day:02d}' 
 and '{end_year}-{end_month:02d}-{end_day:02d}';"""
 
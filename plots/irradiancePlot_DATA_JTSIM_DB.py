@@ -16,6 +16,7 @@ from TSI_PLOT_LIB_JTSIM_pandas import (
     plot_SCI_1,
     plot_irr,
     plot_parameter,
+    plot_columns,
 )
 
 
@@ -50,8 +51,8 @@ plot_irr(df_irradiance, ax, "year")
 fig.savefig(save_folder + plotname)
 plt.close(fig)
 
-parameter_query = """SELECT
-    * FROM `parameterset` WHERE timestamp is not null"""
+parameter_query = f"""SELECT
+    {", ".join(plot_columns("plot_parameter"))} FROM `parameterset` WHERE timestamp is not null"""
 df_parameter = pd.read_sql(parameter_query, con=engine)
 df_parameter.columns = map(str.lower, df_parameter.columns)
 print("Finish loading data from DB")
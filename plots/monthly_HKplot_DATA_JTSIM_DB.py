@@ -7,7 +7,7 @@ import astropy.io.fits as fitsio
 from matplotlib.dates import DateFormatter
 from datetime import datetime
 from sqlalchemy import create_engine
-from TSI_PLOT_LIB_JTSIM_pandas import create_HKfig, create_Irradfig, plot_HK_1, plot_HK_2, plot_SCI_1 
+from TSI_PLOT_LIB_JTSIM_pandas import create_HKfig, create_Irradfig, plot_HK_1, plot_HK_2, plot_SCI_1, plot_columns
 
 # https://stackoverflow.com/questions/5734438/how-to-create-a-month-iterator
 def month_year_iter( start_month, start_year, end_month, end_year ):
@@ -35,6 +35,9 @@ engine = create_engine(
     conn_string
 )
 
+housekeeping_columns = ", ".join(plot_columns("plot_HK_1", "plot_HK_2"))
+calibration_columns = ", ".join(plot_columns("plot_SCI_1"))
+
 start_year = 2022
 start_month = 6
 end_year = 2023
@@ -42,13 +45,13 @@ end_month = 12
 
 for year, month in month_year_iter(start_month, start_year, end_month, end_year):
     print(f'----- {year}-{month:02d} -----')
-    housekeeping_query = f"SELECT * FROM housekeeping WHERE MONTH(timestamp) = {month} and YEAR(timestamp) = {year} order by timestamp;"
+    housekeeping_query = f"SELECT {housekeeping_columns} FROM housekeeping WHERE MONTH(timestamp) = {month} and YEAR(timestamp) = {year} order by timestamp;"
     df_housekeeping = pd.read_sql(housekeeping_query, con=engine)
     df_housekeeping.columns = map(str.lower, df_housekeeping.columns)
     print("Finish loading data from DB")
     print(f"Rows loaded {len(df_housekeeping)}")
 
-    calibration_query = f"SELECT * FROM calibration WHERE MONTH(timestamp) = {month} and YEAR(timestamp) = {year} order by timestamp;"
+    calibration_query = f"SELECT {calibration_columns} FROM calibration WHERE MONTH(timestamp) = {month} and YEAR(timestamp) = {year} order by timestamp;"
     df_calibration = pd.read_sql(calibration_query, con=engine)
     df_calibration.columns = map(str.lower, df_calibration.columns)
     print("Finish loading data from DB")
@@ -0,0 +1,232 @@
+"""
+Ingest benchmarks for fits2db.
+
+Generates synthetic FITS files and times `FitsFile.get_table`,
+`BaseLoader._prepare_dataframe` and, if a config file is given, the end to
+end `upload_file` into the configured database. Results are written as JSON
+together with the current commit, so runs can be compared across commits.
+
+!!! note "Example usage"
+    ```bash
+    python -m tests.benchmarks.run --rows 86400 --output bench.json
+    python -m tests.benchmarks.run --config bench_config.yml --compare bench.json
+    ```
+
+!!! warning
+    The end to end benchmark drops all tables of the configured database.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from fits2db.adapters import DBWriter
+from fits2db.adapters.base import BaseLoader
+from fits2db.config import get_configs
+from fits2db.fits import FitsFile
+
+from .synthetic import write_synthetic_fits
+
+
+def git_commit() -> Optional[str]:
+    """Returns the current commit hash if run inside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(
+    func: Callable[[], int], repeat: int, setup: Callable[[], None] = None
+) -> Dict[str, float]:
+    """
+    Times `func` several times. `func` returns the number of processed rows.
+
+    Returns:
+        Dict[str, float]: Timings of the runs with min, median and rows/s.
+    """
+    runs: List[float] = []
+    rows = 0
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        rows = func()
+        runs.append(time.perf_counter() - start)
+    best = min(runs)
+    return {
+        "runs_s": runs,
+        "min_s": best,
+        "median_s": statistics.median(runs),
+        "rows": rows,
+        "rows_per_s": rows / best if best else 0.0,
+    }
+
+
+def bench_get_table(path: Path, table: str, repeat: int) -> Dict[str, float]:
+    file = FitsFile(path)
+
+    def run() -> int:
+        return len(file.get_table(table).data)
+
+    return measure(run, repeat)
+
+
+def bench_prepare_dataframe(
+    path: Path, table: str, repeat: int
+) -> Dict[str, float]:
+    file = FitsFile(path)
+    data = file.get_table(table).data
+    data.columns = map(str.lower, data.columns)
+
+    def run() -> int:
+        return len(BaseLoader._prepare_dataframe(None, data, "timestamp"))
+
+    return measure(run, repeat)
+
+
+def bench_upload_file(
+    path: Path, config_path: Path, repeat: int
+) -> Dict[str, float]:
+    configs = get_configs(config_path)
+    file = FitsFile(path)
+    rows = sum(
+        len(file.get_table(table["name"]).data)
+        for table in configs["fits_files"]["tables"]
+    )
+
+    def setup() -> None:
+        DBWriter(configs).clean_db()
+
+    def run() -> int:
+        file = FitsFile(path)
+        DBWriter(configs, file, bulk_load=True).upsert()
+        return rows
+
+    return measure(run, repeat, setup)
+
+
+def compare(results: dict, previous_path: Path) -> None:
+    """Prints the speedup of each benchmark against a previous result file."""
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = json.load(f)
+    print(f"Compared to {previous.get('commit')} ({previous_path})")
+    for name, result in results["results"].items():
+        before = previous["results"].get(name)
+        if before is None:
+            continue
+        speedup = before["min_s"] / result["min_s"] if result["min_s"] else 0
+        print(
+            f"  {name:<40} {before['min_s']:>8.3f} s -> "
+            f"{result['min_s']:>8.3f} s  ({speedup:.2f}x)"
+        )
+
+
+def main(args: argparse.Namespace) -> dict:
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="fits2db_bench_"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    path = write_synthetic_fits(
+        work_dir / "2021-07-07_L1a.fits",
+        n_rows=args.rows,
+        n_columns=args.columns,
+    )
+
+    results = {}
+    for table in ("HOUSEKEEPING", "CALIBRATION", "IRRADIANCE"):
+        print(f"get_table {table} ...")
+        results[f"get_table[{table}]"] = bench_get_table(
+            path, table, args.repeat
+        )
+        print(f"prepare_dataframe {table} ...")
+        results[f"prepare_dataframe[{table}]"] = bench_prepare_dataframe(
+            path, table, args.repeat
+        )
+    if args.config:
+        print("upload_file ...")
+        results["upload_file"] = bench_upload_file(
+            path, args.config, args.repeat
+        )
+
+    output = {
+        "commit": git_commit(),
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "rows": args.rows,
+            "columns": args.columns,
+            "repeat": args.repeat,
+            "file_size": path.stat().st_size,
+        },
+        "results": results,
+    }
+    for name, result in results.items():
+        print(
+            f"{name:<40} min {result['min_s']:>8.3f} s  "
+            f"median {result['median_s']:>8.3f} s  "
+            f"{result['rows_per_s']:>12.0f} rows/s"
+        )
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"Results written to {args.output}")
+    if args.compare:
+        compare(output, args.compare)
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="fits2db-bench",
+        description="Benchmark the fits2db ingest on synthetic FITS files",
+    )
+    parser.add_argument(
+        "-n", "--rows", type=int, default=86400, help="Rows per table"
+    )
+    parser.add_argument(
+        "--columns",
+        type=int,
+        default=150,
+        help="Numeric columns of the HOUSEKEEPING table",
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3, help="Runs per benchmark"
+    )
+    parser.add_argument(
+        "-c",
+        "--config",
+        type=Path,
+        default=None,
+        help="fits2db config of the database for the upload benchmark",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=Path("bench_results.json"),
+        help="JSON file the results are written to",
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        default=None,
+        help="Previous result file to compare against",
+    )
+    parser.add_argument(
+        "--work_dir",
+        type=Path,
+        default=None,
+        help="Directory for the generated files",
+    )
+    main(parser.parse_args())
@@ -0,0 +1,144 @@
+"""
+Generator for synthetic FITS files used by the benchmarks.
+
+The files mimic the level 1 files of the instrument: a wide HOUSEKEEPING
+table with many big-endian numeric columns, a CALIBRATION table with
+cavity string columns and a narrow IRRADIANCE table. All tables carry an
+ISO formatted `timestamp` string column at 1 Hz.
+"""
+
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+from astropy.io import fits
+
+# FITS binary table formats with the numpy dtypes they are stored as
+NUMERIC_FORMATS = {
+    "E": ">f4",
+    "D": ">f8",
+    "J": ">i4",
+    "I": ">i2",
+    "K": ">i8",
+    "B": "u1",
+}
+
+
+def timestamp_column(
+    n_rows: int, start: str = "2021-07-07", name: str = "TIMESTAMP"
+) -> fits.Column:
+    """Creates a 1 Hz ISO timestamp string column."""
+    stamps = pd.date_range(start, periods=n_rows, freq="s")
+    array = np.array(stamps.strftime("%Y-%m-%dT%H:%M:%S.%f"), dtype="S26")
+    return fits.Column(name=name, format="26A", array=array)
+
+
+def numeric_columns(
+    n_rows: int, n_columns: int, rng: np.random.Generator, prefix: str
+) -> list:
+    """Creates big-endian numeric columns cycling through the FITS formats."""
+    formats = list(NUMERIC_FORMATS.items())
+    columns = []
+    for i in range(n_columns):
+        fmt, dtype = formats[i % len(formats)]
+        if fmt in ("E", "D"):
+            array = 273.15 + rng.normal(0, 5, n_rows)
+        else:
+            info = np.iinfo(np.dtype(dtype))
+            array = rng.integers(0, min(info.max, 4096), n_rows)
+        columns.append(
+            fits.Column(
+                name=f"{prefix}_{i:03d}",
+                format=fmt,
+                array=array.astype(dtype),
+            )
+        )
+    return columns
+
+
+def string_columns(
+    n_rows: int,
+    names: list,
+    rng: np.random.Generator,
+    values: tuple = ("a", "b", "c"),
+) -> list:
+    """Creates single character string columns drawn from `values`."""
+    return [
+        fits.Column(
+            name=name,
+            format="1A",
+            array=np.array(rng.choice(values, n_rows), dtype="S1"),
+        )
+        for name in names
+    ]
+
+
+def housekeeping_hdu(
+    n_rows: int, n_columns: int = 150, seed: int = 0
+) -> fits.BinTableHDU:
+    """Creates a wide HOUSEKEEPING-like table."""
+    rng = np.random.default_rng(seed)
+    columns = [timestamp_column(n_rows)]
+    columns += numeric_columns(n_rows, n_columns, rng, "HK")
+    columns += string_columns(n_rows, ["MODE", "STATE"], rng)
+    hdu = fits.BinTableHDU.from_columns(columns, name="HOUSEKEEPING")
+    return hdu
+
+
+def calibration_hdu(n_rows: int, seed: int = 1) -> fits.BinTableHDU:
+    """Creates a CALIBRATION-like table with cavity string columns."""
+    rng = np.random.default_rng(seed)
+    columns = [timestamp_column(n_rows)]
+    columns += numeric_columns(n_rows, 20, rng, "CAL")
+    columns += string_columns(
+        n_rows, ["NOMINAL_CAVITY", "REFERENCE_CAVITY", "BACKUP_CAVITY_1"], rng
+    )
+    return fits.BinTableHDU.from_columns(columns, name="CALIBRATION")
+
+
+def irradiance_hdu(n_rows: int, seed: int = 2) -> fits.BinTableHDU:
+    """Creates a narrow IRRADIANCE-like table."""
+    rng = np.random.default_rng(seed)
+    columns = [timestamp_column(n_rows)]
+    for cavity in ("A", "B", "C"):
+        columns.append(
+            fits.Column(
+                name=f"IRRADIANCE_{cavity}_WM2",
+                format="D",
+                array=(1361 + rng.normal(0, 0.5, n_rows)).astype(">f8"),
+            )
+        )
+    return fits.BinTableHDU.from_columns(columns, name="IRRADIANCE")
+
+
+def write_synthetic_fits(
+    path: Union[str, Path],
+    n_rows: int = 86400,
+    n_columns: int = 150,
+    tables: Optional[Dict[str, int]] = None,
+    seed: int = 0,
+) -> Path:
+    """
+    Writes a synthetic level 1 FITS file.
+
+    Args:
+        path (Union[str, Path]): Path of the file to write.
+        n_rows (int): Rows of the HOUSEKEEPING table.
+        n_columns (int): Numeric columns of the HOUSEKEEPING table.
+        tables (Optional[Dict[str, int]]): Row counts of the CALIBRATION and
+            IRRADIANCE tables. Defaults to `n_rows` for both.
+        seed (int): Seed of the random data.
+
+    Returns:
+        Path: Path of the written file.
+    """
+    path = Path(path)
+    tables = tables or {"CALIBRATION": n_rows, "IRRADIANCE": n_rows}
+    hdus = [fits.PrimaryHDU(), housekeeping_hdu(n_rows, n_columns, seed)]
+    if "CALIBRATION" in tables:
+        hdus.append(calibration_hdu(tables["CALIBRATION"], seed + 1))
+    if "IRRADIANCE" in tables:
+        hdus.append(irradiance_hdu(tables["IRRADIANCE"], seed + 2))
+    fits.HDUList(hdus).writeto(path, overwrite=True)
+    return path
@@ -148,10 +148,10 @@ def test_upload(mock_fits_file, db_config, db_engine, clear_database):
     assert set(table_names) == set([
         "fits2db_meta",
         "testtablea",
-        "testtablea_meta",
         "testtableb",
-        "testtableb_meta",
         "fits2db_table_meta",
+        "fits2db_header",
+        "fits2db_enum",
     ])
 
     # Assert correctness of some column
@@ -160,6 +160,14 @@ def test_upload(mock_fits_file, db_config, db_engine, clear_database):
     assert tableb['param_b'].to_list().sort() == test_file.get_table(
         'testtableb').data['pARAm C'].to_list().sort()
 
+    # Assert that the headers are stored once per hash
+    with db_engine.connect() as conn:
+        table_meta = pd.read_sql('SELECT * FROM fits2db_table_meta', conn)
+        header = pd.read_sql('SELECT * FROM fits2db_header', conn)
+    assert table_meta['header_hash'].notna().all()
+    assert set(header['header_hash']) == set(table_meta['header_hash'])
+    assert len(header.index) == 13 * header['header_hash'].nunique()
+
 
 # @pytest.mark.parametrize("db_config", [("config_update.yml")], indirect=True)
 def test_second_upload(mock_fits_file, db_config, db_engine):
@@ -186,10 +194,10 @@ def test_second_upload(mock_fits_file, db_config, db_engine):
     assert set(table_names) == set([
         "fits2db_meta",
         "testtablea",
-        "testtablea_meta",
         "testtableb",
-        "testtableb_meta",
         "fits2db_table_meta",
+        "fits2db_header",
+        "fits2db_enum",
     ])
     # assert right ammount of rows
     assert row_num == 22
@@ -234,12 +242,11 @@ def test_update(mock_fits_file, update_db_config, db_engine):
     assert set(table_names) == set([
         "fits2db_meta",
         "testtablea",
-        "testtablea_meta",
         "testtableb",
-        "testtableb_meta",
         "fits2db_table_meta",
+        "fits2db_header",
+        "fits2db_enum",
         "testtablec",
-        "testtablec_meta",
     ])
     # assert that the old contnent of file1 was overwritten
     param_a_a = tablea['param_a_a']
@@ -289,12 +296,11 @@ def test_remove_row(mock_fits_file, update_db_config, db_engine):
     assert set(table_names) == set([
         "fits2db_meta",
         "testtablea",
-        "testtablea_meta",
         "testtableb",
-        "testtableb_meta",
         "fits2db_table_meta",
+        "fits2db_header",
+        "fits2db_enum",
         "testtablec",
-        "testtablec_meta",
     ])
     # Assert corrrect updates of tables
     param_a_a = tablea['param_a_a']
@@ -340,12 +346,11 @@ def test_upload_error(mock_fits_file, update_db_config, db_engine):
     assert set(table_names) == set([
         "fits2db_meta",
         "testtablea",
-        "testtablea_meta",
         "testtableb",
-        "testtableb_meta",
         "fits2db_table_meta",
+        "fits2db_header",
+        "fits2db_enum",
         "testtablec",
-        "testtablec_meta",
     ])
     # Assert that no content of the file was uploaded, as it had corrupt data
     assert len(file_data.index) == 0
@@ -383,12 +388,11 @@ def test_update_error(mock_fits_file, update_db_config, db_engine):
     assert set(table_names) == set([
         "fits2db_meta",
         "testtablea",
-        "testtablea_meta",
         "testtableb",
-        "testtableb_meta",
         "fits2db_table_meta",
+        "fits2db_header",
+        "fits2db_enum",
         "testtablec",
-        "testtablec_meta",
     ])
     # asserct that the file was not updated
     assert not testtable_a['param_a'].str.startswith('corrupt').any()
@@ -424,12 +428,11 @@ def test_bad_timestamp(mock_fits_file, update_db_config, db_engine):
     assert set(table_names) == set([
         "fits2db_meta",
         "testtablea",
-        "testtablea_meta",
         "testtableb",
-        "testtableb_meta",
         "fits2db_table_meta",
+        "fits2db_header",
+        "fits2db_enum",
         "testtablec",
-        "testtablec_meta",
     ])
     assert len(file_data.index) == 0
 
@@ -472,12 +475,11 @@ def test_bad_timestamp_update(mock_fits_file, update_db_config, db_engine):
     assert set(table_names) == set([
         "fits2db_meta",
         "testtablea",
-        "testtablea_meta",
         "testtableb",
-        "testtableb_meta",
         "fits2db_table_meta",
+        "fits2db_header",
+        "fits2db_enum",
         "testtablec",
-        "testtablec_meta",
     ])
     param_a_a = tablea['param_a_a']
     param_a_a = param_a_a.apply(lambda x: x.startswith('1.2_'))
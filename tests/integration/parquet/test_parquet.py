@@ -0,0 +1,300 @@
+import datetime
+import string
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from fits2db.adapters import DBWriter
+from fits2db.fits import fits
+from fits2db.memory import governor
+from tests.benchmarks.synthetic import write_synthetic_fits
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from fits2db.adapters.parquet import CATALOG_NAME, Parquet
+
+
+@pytest.fixture(scope="module")
+def root(tmp_path_factory):
+    return tmp_path_factory.mktemp("parquet") / "archive"
+
+
+@pytest.fixture
+def db_config(root):
+    return {
+        "database": {"type": "parquet", "db_name": root.as_posix()},
+        "fits_files": {
+            "paths": [],
+            "delete_rows_from_missing_tables": True,
+            "tables": [
+                {
+                    "name": "TesTTablea",
+                    "date_column": "timestamp",
+                    "ingest_all_columns": True,
+                    "rollups": ["hour", "day"],
+                },
+                {
+                    "name": "tEsTTABLEb",
+                    "date_column": "timestamp",
+                    "ingest_all_columns": True,
+                },
+            ],
+        },
+    }
+
+
+@pytest.fixture
+def mock_fits_file(monkeypatch):
+
+    def mock_post_init(self):
+        self.file_name = f"{self.file_path}.fits"
+        self.absolute_path = Path(f"/data/{self.file_path}.fits")
+        self.mtime = time.ctime(time.time())
+        self.mdate = datetime.datetime.fromtimestamp(time.time())
+        self.hdul = None
+        self.prefix = ""
+        self.start = "2023-06-30 22:00:00"
+        self.corrupt = False
+        self.tables = None
+
+    def mock_get_table(self, name):
+        if self.tables is not None and name not in self.tables:
+            raise KeyError(f"Table {name} not found")
+        data = pd.DataFrame()
+        dti = pd.date_range(self.start, periods=11, freq="15min")
+        data["timestamp"] = dti.strftime("%Y-%m-%d %H:%M:%S")
+        if self.corrupt:
+            data["timestamp"] = list(string.ascii_lowercase)[:11]
+        data["PaRaM A"] = [
+            self.prefix + c for c in string.ascii_lowercase[:11]
+        ]
+        data["pArAm b"] = list(range(11))
+        if getattr(self, "extra", False):
+            data["PARAM C"] = [0.5] * 11
+        meta = pd.DataFrame(
+            {"keyword": ["EXTNAME", "NAXIS2"], "value": [name, 11]}
+        )
+        return fits.FitsTable(name, meta, data)
+
+    monkeypatch.setattr(fits.FitsFile, "__post_init__", mock_post_init)
+    monkeypatch.setattr(fits.FitsFile, "get_table", mock_get_table)
+
+
+def read_table(root, table):
+    return ds.dataset(root / table, partitioning="hive").to_table().to_pandas()
+
+
+def test_get_loader(db_config):
+    writer = DBWriter(db_config)
+    assert isinstance(writer.loader, Parquet)
+
+
+def test_upload_partitions(mock_fits_file, db_config, root):
+    test_file = fits.FitsFile("file1")
+    test_file.prefix = "1_"
+    Parquet(db_config, test_file, bulk_load=True).upload_file()
+
+    fragments = sorted(
+        p.relative_to(root).as_posix() for p in root.rglob("*.parquet")
+    )
+    assert fragments == [
+        "testtablea/year=2023/month=06/part-1.parquet",
+        "testtablea/year=2023/month=07/part-1.parquet",
+        "testtablea_rollup_day/year=2023/month=06/part-1.parquet",
+        "testtablea_rollup_day/year=2023/month=07/part-1.parquet",
+        "testtablea_rollup_hour/year=2023/month=06/part-1.parquet",
+        "testtablea_rollup_hour/year=2023/month=07/part-1.parquet",
+        "testtableb/year=2023/month=06/part-1.parquet",
+        "testtableb/year=2023/month=07/part-1.parquet",
+    ]
+    assert (root / CATALOG_NAME).is_file()
+    metadata = pq.ParquetFile(root / fragments[0]).metadata
+    column = metadata.row_group(0).column(0)
+    assert column.compression == "ZSTD"
+    assert column.statistics is not None
+
+    tablea = read_table(root, "testtablea")
+    assert len(tablea.index) == 11
+    assert tablea["param_a"].str.startswith("1_").all()
+    assert (tablea["file_meta_id"] == 1).all()
+
+
+def test_second_upload(mock_fits_file, db_config, root):
+    test_file = fits.FitsFile("file2")
+    test_file.start = "2023-08-01 00:00:00"
+    Parquet(db_config, test_file).upload_file()
+
+    files = DBWriter(db_config).get_db_file_infos()
+    assert files["filename"].to_list() == ["file1.fits", "file2.fits"]
+    assert len(read_table(root, "testtablea").index) == 22
+
+
+def test_update_replaces_only_touched_partitions(
+    mock_fits_file, db_config, root
+):
+    untouched = root / "testtablea/year=2023/month=08/part-2.parquet"
+    mtime = untouched.stat().st_mtime_ns
+
+    test_file = fits.FitsFile("file1")
+    test_file.prefix = "1.1_"
+    test_file.start = "2023-07-02 00:00:00"
+    test_file.tables = ["TesTTablea"]
+    Parquet(db_config, test_file).update_file()
+
+    assert untouched.stat().st_mtime_ns == mtime
+    assert not (root / "testtablea/year=2023/month=06/part-1.parquet").exists()
+    tablea = read_table(root, "testtablea")
+    assert len(tablea.index) == 22
+    file1 = tablea[tablea["file_meta_id"] == 1]
+    assert file1["param_a"].str.startswith("1.1_").all()
+    # testtableb is missing in the updated file and its rows are deleted
+    assert len(read_table(root, "testtableb").index) == 11
+
+
+def test_upload_error(mock_fits_file, db_config, root):
+    test_file = fits.FitsFile("file3")
+    test_file.corrupt = True
+    Parquet(db_config, test_file).upload_file()
+
+    files = DBWriter(db_config).get_db_file_infos()
+    assert "file3.fits" not in files["filename"].to_list()
+    assert not list(root.rglob(".*.tmp"))
+    assert len(read_table(root, "testtablea").index) == 22
+
+
+def test_read(db_config):
+    writer = DBWriter(db_config)
+    df = writer.read(
+        "TesTTablea", "2023-07-02 00:30:00", "2023-08-01 00:15:00", ["PARAM_A"]
+    )
+    assert list(df.columns) == ["timestamp", "param_a"]
+    assert len(df.index) == 9 + 2
+    assert df["timestamp"].is_monotonic_increasing
+
+
+def test_read_chunks(db_config):
+    chunks = list(DBWriter(db_config).read("testtablea", chunksize=5))
+    assert all(len(chunk.index) <= 5 for chunk in chunks)
+    df = pd.concat(chunks, ignore_index=True)
+    assert len(df.index) == 22
+    assert df["timestamp"].is_monotonic_increasing
+
+
+def test_read_chunks_merges_fragments(tmp_path):
+    directory = tmp_path / "table" / "year=2021" / "month=01"
+    directory.mkdir(parents=True)
+    # Files overlap in time, each is read in several record batches
+    for file_id in range(3):
+        timestamps = pd.date_range(
+            "2021-01-01", periods=200, freq=f"{file_id + 1}min"
+        )
+        df = pd.DataFrame({"timestamp": timestamps, "file": file_id})
+        pq.write_table(
+            pa.Table.from_pandas(df, preserve_index=False),
+            directory / f"part-{file_id}.parquet",
+            row_group_size=30,
+        )
+    loader = object.__new__(Parquet)
+    loader.root = tmp_path
+
+    chunks = list(loader.read_table("table", chunksize=50))
+    assert all(len(chunk.index) <= 50 for chunk in chunks)
+    df = pd.concat(chunks, ignore_index=True)
+    assert len(df.index) == 600
+    assert df["timestamp"].is_monotonic_increasing
+    whole = loader.read_table("table", "2021-01-01 01:00", "2021-01-01 02:00")
+    chunks = loader.read_table(
+        "table", "2021-01-01 01:00", "2021-01-01 02:00", chunksize=7
+    )
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks, ignore_index=True)[["timestamp"]],
+        whole[["timestamp"]],
+    )
+
+
+def test_read_rollup(db_config):
+    days = DBWriter(db_config).read("testtablea", resolution="day")
+    assert days["timestamp"].dt.day.to_list() == [2, 1]
+    assert days["param_b_count"].to_list() == [11, 11]
+
+
+def test_read_unknown_column(db_config):
+    with pytest.raises(ValueError, match="unknown_column"):
+        DBWriter(db_config).read("testtablea", columns=["unknown_column"])
+
+
+def test_file_ranges(db_config):
+    ranges = DBWriter(db_config).file_ranges("testtablea")
+    assert ranges["file_meta_id"].to_list() == [1, 2]
+    assert ranges["start"].to_list() == [
+        pd.Timestamp("2023-07-02 00:00:00"),
+        pd.Timestamp("2023-08-01 00:00:00"),
+    ]
+    assert ranges["end"].to_list() == [
+        pd.Timestamp("2023-07-02 02:30:00"),
+        pd.Timestamp("2023-08-01 02:30:00"),
+    ]
+
+
+def test_read_evolved_schema(mock_fits_file, db_config, tmp_path):
+    db_config["database"]["db_name"] = (tmp_path / "archive").as_posix()
+    first = fits.FitsFile("file1")
+    second = fits.FitsFile("file2")
+    second.start = "2023-08-01 00:00:00"
+    second.extra = True
+    for test_file in (first, second):
+        Parquet(db_config, test_file).upload_file()
+
+    df = DBWriter(db_config).read("testtablea", columns=["param_c"])
+    assert list(df.columns) == ["timestamp", "param_c"]
+    assert df["param_c"].isna().sum() == 11
+    assert (df["param_c"].dropna() == 0.5).all()
+    chunks = list(DBWriter(db_config).read("testtablea", chunksize=5))
+    assert all("param_c" in chunk.columns for chunk in chunks)
+
+
+def test_clean_db(mock_fits_file, db_config, root):
+    DBWriter(db_config).clean_db()
+    assert not list(root.rglob("*.parquet"))
+
+
+def test_upload_in_chunks(tmp_path):
+    path = write_synthetic_fits(tmp_path / "a.fits", n_rows=25000, n_columns=6)
+    for name, max_bytes in [("whole", None), ("chunks", 1024**2)]:
+        config = {
+            "database": {
+                "type": "parquet",
+                "db_name": (tmp_path / name).as_posix(),
+            },
+            "fits_files": {
+                "paths": [],
+                "tables": [
+                    {
+                        "name": "HOUSEKEEPING",
+                        "date_column": "timestamp",
+                        "ingest_all_columns": True,
+                        "rollups": ["minute", "hour"],
+                    }
+                ],
+            },
+        }
+        governor.configure(max_bytes)
+        try:
+            DBWriter(config, fits.FitsFile(path)).upsert()
+        finally:
+            governor.configure(None)
+    for table in [
+        "housekeeping",
+        "housekeeping_rollup_minute",
+        "housekeeping_rollup_hour",
+    ]:
+        whole = read_table(tmp_path / "whole", table)
+        chunks = read_table(tmp_path / "chunks", table)[whole.columns]
+        whole = whole.sort_values("timestamp", ignore_index=True)
+        chunks = chunks.sort_values("timestamp", ignore_index=True)
+        pd.testing.assert_frame_equal(whole, chunks)
+    assert len(chunks.index) == 7
@@ -0,0 +1,475 @@
+import datetime
+import string
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from sqlalchemy import MetaData, create_engine, event
+
+from fits2db.adapters import DBWriter, SQLite
+from fits2db.fits import fits
+from fits2db.memory import governor
+from tests.benchmarks.synthetic import write_synthetic_fits
+
+
+@pytest.fixture(scope="module")
+def db_path(tmp_path_factory):
+    return tmp_path_factory.mktemp("sqlite") / "fits2db.db"
+
+
+@pytest.fixture
+def db_config(db_path):
+    return {
+        "database": {"type": "sqlite", "db_name": db_path.as_posix()},
+        "fits_files": {
+            "paths": [],
+            "delete_rows_from_missing_tables": False,
+            "tables": [
+                {
+                    "name": "TesTTablea",
+                    "date_column": "timestamp",
+                    "ingest_all_columns": True,
+                    "rollups": ["minute", "hour"],
+                },
+                {
+                    "name": "tEsTTABLEb",
+                    "date_column": "timestamp",
+                    "ingest_all_columns": True,
+                },
+            ],
+        },
+    }
+
+
+@pytest.fixture
+def db_engine(db_path):
+    engine = create_engine(f"sqlite:///{db_path.as_posix()}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def mock_fits_file(monkeypatch):
+
+    def mock_post_init(self):
+        self.file_name = f"{self.file_path}.fits"
+        self.absolute_path = Path(f"/data/{self.file_path}.fits")
+        self.mtime = time.ctime(time.time())
+        self.mdate = datetime.datetime.fromtimestamp(time.time())
+        self.hdul = None
+        self.prefix = ""
+        self.corrupt = False
+        self.extra_column = False
+
+    def mock_get_table(self, name):
+        data = pd.DataFrame()
+        dti = pd.date_range("2023-06-07 6:00:00", periods=11, freq="15min")
+        data["timestamp"] = dti.strftime("%Y-%m-%d %H:%M:%S")
+        if self.corrupt:
+            data["timestamp"] = list(string.ascii_lowercase)[:11]
+        data["PaRaM A"] = [
+            self.prefix + c for c in string.ascii_lowercase[:11]
+        ]
+        data["pArAm b"] = list(range(11))
+        if self.extra_column:
+            data["pARAm C"] = [i / 8 for i in range(11)]
+        meta = pd.DataFrame(
+            {"keyword": ["EXTNAME", "NAXIS2"], "value": [name, 11]}
+        )
+        return fits.FitsTable(name, meta, data)
+
+    monkeypatch.setattr(fits.FitsFile, "__post_init__", mock_post_init)
+    monkeypatch.setattr(fits.FitsFile, "get_table", mock_get_table)
+
+
+def table_names(engine):
+    metadata = MetaData()
+    metadata.reflect(bind=engine)
+    return {table.name for table in metadata.sorted_tables}
+
+
+def test_get_loader(db_config):
+    writer = DBWriter(db_config)
+    assert isinstance(writer.loader, SQLite)
+
+
+def test_upload(mock_fits_file, db_config, db_engine):
+    test_file = fits.FitsFile("file1")
+    test_file.prefix = "1_"
+    SQLite(db_config, test_file, bulk_load=True).upload_file()
+
+    assert table_names(db_engine) == {
+        "fits2db_meta",
+        "fits2db_table_meta",
+        "fits2db_header",
+        "fits2db_enum",
+        "testtablea",
+        "testtablea_rollup_minute",
+        "testtablea_rollup_hour",
+        "testtableb",
+    }
+    tablea = pd.read_sql("SELECT * FROM testtablea", db_engine)
+    assert len(tablea.index) == 11
+    assert tablea["id"].is_unique
+    assert tablea["param_a"].str.startswith("1_").all()
+
+
+def test_second_upload_adds_columns(mock_fits_file, db_config, db_engine):
+    test_file = fits.FitsFile("file2")
+    test_file.prefix = "2_"
+    test_file.extra_column = True
+    SQLite(db_config, test_file).upload_file()
+
+    tablea = pd.read_sql("SELECT * FROM testtablea", db_engine)
+    assert len(tablea.index) == 22
+    assert tablea["param_c"].notna().sum() == 11
+    header = pd.read_sql("SELECT * FROM fits2db_header", db_engine)
+    # file1 and file2 share identical headers
+    assert header["header_hash"].nunique() == 2
+
+
+def test_update(mock_fits_file, db_config, db_engine):
+    test_file = fits.FitsFile("file1")
+    test_file.prefix = "1.1_"
+    SQLite(db_config, test_file).update_file()
+
+    file_id = pd.read_sql(
+        "SELECT id FROM fits2db_meta WHERE filename = 'file1.fits'", db_engine
+    )["id"][0]
+    tablea = pd.read_sql(
+        f"SELECT * FROM testtablea WHERE file_meta_id = {file_id}", db_engine
+    )
+    assert tablea["param_a"].str.startswith("1.1_").all()
+    count = pd.read_sql("SELECT count(*) AS n FROM testtablea", db_engine)
+    assert count["n"][0] == 22
+
+
+def test_upload_error(mock_fits_file, db_config, db_engine):
+    test_file = fits.FitsFile("file3")
+    test_file.corrupt = True
+    SQLite(db_config, test_file).upload_file()
+
+    files = pd.read_sql("SELECT * FROM fits2db_meta", db_engine)
+    assert "file3.fits" not in files["filename"].to_list()
+    assert "tmp_testtablea" not in table_names(db_engine)
+    count = pd.read_sql("SELECT count(*) AS n FROM testtablea", db_engine)
+    assert count["n"][0] == 22
+
+
+def test_read(db_config):
+    writer = DBWriter(db_config)
+    df = writer.read(
+        "TesTTablea", "2023-06-07 07:00:00", "2023-06-07 08:00:00", ["PARAM_A"]
+    )
+    assert list(df.columns) == ["timestamp", "param_a"]
+    assert len(df.index) == 2 * 5
+    assert df["timestamp"].is_monotonic_increasing
+
+
+def test_read_chunks(db_config):
+    chunks = list(DBWriter(db_config).read("testtablea", chunksize=5))
+    assert [len(chunk.index) for chunk in chunks] == [5, 5, 5, 5, 2]
+    df = pd.concat(chunks, ignore_index=True)
+    assert df["timestamp"].is_monotonic_increasing
+
+
+def test_read_rollup(db_config):
+    writer = DBWriter(db_config)
+    hours = writer.read(
+        "testtablea",
+        resolution="hour",
+        columns=["timestamp", "param_a", "param_b"],
+    )
+    assert hours["timestamp"].dt.hour.to_list() == [6, 7, 8]
+    assert hours["param_a_last"].str[-1].to_list() == ["d", "h", "k"]
+    assert hours["param_b_count"].to_list() == [8, 8, 6]
+    assert hours["param_b_max"].to_list() == [3, 7, 10]
+    assert hours["param_b_mean"][0] == pytest.approx(1.5)
+    minutes = writer.read(
+        "testtablea",
+        "2023-06-07 06:00",
+        "2023-06-07 06:30",
+        resolution="minute",
+    )
+    assert minutes["param_b_count"].to_list() == [2, 2, 2]
+    assert "param_c_mean" in minutes.columns
+
+
+def test_read_unknown_column(db_config):
+    with pytest.raises(ValueError, match="unknown_column"):
+        DBWriter(db_config).read("testtablea", columns=["unknown_column"])
+
+
+def test_file_ranges(db_config):
+    ranges = DBWriter(db_config).file_ranges("testtablea")
+    assert len(ranges.index) == 2
+    assert (ranges["start"] == pd.Timestamp("2023-06-07 06:00:00")).all()
+    assert (ranges["end"] == pd.Timestamp("2023-06-07 08:30:00")).all()
+
+
+def test_upload_batch(mock_fits_file, db_config, db_engine):
+    files = []
+    for name, corrupt in [("file4", False), ("file5", True), ("file6", False)]:
+        test_file = fits.FitsFile(name)
+        test_file.corrupt = corrupt
+        test_file.extra_column = name == "file6"
+        files.append(test_file)
+
+    with pytest.raises(RuntimeError):
+        with DBWriter(db_config).begin_batch() as batch:
+            DBWriter(db_config, files[0], batch=batch).upsert()
+            raise RuntimeError
+    filenames = pd.read_sql("SELECT * FROM fits2db_meta", db_engine)[
+        "filename"
+    ]
+    assert "file4.fits" not in filenames.to_list()
+
+    with DBWriter(db_config).begin_batch() as batch:
+        for test_file in files:
+            DBWriter(db_config, test_file, batch=batch).upsert()
+        # Nothing is visible to other connections before the batch commits
+        count = pd.read_sql("SELECT count(*) AS n FROM testtablea", db_engine)
+        assert count["n"][0] == 22
+
+    filenames = pd.read_sql("SELECT * FROM fits2db_meta", db_engine)[
+        "filename"
+    ]
+    assert {"file4.fits", "file6.fits"} <= set(filenames)
+    assert "file5.fits" not in filenames.to_list()
+    assert "tmp_testtablea" not in table_names(db_engine)
+    count = pd.read_sql("SELECT count(*) AS n FROM testtablea", db_engine)
+    assert count["n"][0] == 44
+    rollup = pd.read_sql(
+        "SELECT DISTINCT file_meta_id FROM testtablea_rollup_minute", db_engine
+    )
+    assert len(rollup.index) == 4
+
+
+def test_unit_of_work(mock_fits_file, db_config, db_engine):
+    for name, extra_column in [("file7", False), ("file8", True)]:
+        test_file = fits.FitsFile(name)
+        test_file.extra_column = extra_column
+        loader = SQLite(db_config, test_file)
+        checkouts = []
+        event.listen(
+            loader.engine, "checkout", lambda *args: checkouts.append(1)
+        )
+        lookups = []
+        check_table_exists = loader.check_table_exists
+        loader.check_table_exists = lambda table: (
+            lookups.append(table) or check_table_exists(table)
+        )
+        with loader.unit_of_work() as unit:
+            loader.upload_file()
+            assert unit.tables["testtablea"]
+            assert not unit.tables["tmp_testtablea"]
+        loader.close_connection()
+        # The pinned connection and the ones of the session
+        assert len(checkouts) <= 4
+        assert len(lookups) == len(set(lookups))
+    count = pd.read_sql("SELECT count(*) AS n FROM testtablea", db_engine)
+    assert count["n"][0] == 66
+    tablea = pd.read_sql("SELECT * FROM testtablea", db_engine)
+    assert tablea["param_c"].notna().sum() == 33
+
+
+def test_clean_db(mock_fits_file, db_config, db_engine):
+    DBWriter(db_config).clean_db()
+    assert table_names(db_engine) == set()
+
+
+def test_upload_in_chunks(tmp_path):
+    path = write_synthetic_fits(tmp_path / "a.fits", n_rows=25000, n_columns=6)
+    tables = {}
+    for name, max_bytes in [("whole", None), ("chunks", 1024**2)]:
+        config = {
+            "database": {
+                "type": "sqlite",
+                "db_name": (tmp_path / f"{name}.db").as_posix(),
+            },
+            "fits_files": {
+                "paths": [],
+                "tables": [
+                    {
+                        "name": "HOUSEKEEPING",
+                        "date_column": "timestamp",
+                        "ingest_all_columns": True,
+                        "rollups": ["minute", "hour"],
+                    }
+                ],
+            },
+        }
+        governor.configure(max_bytes)
+        try:
+            DBWriter(config, fits.FitsFile(path)).upsert()
+        finally:
+            governor.configure(None)
+        engine = create_engine(
+            f"sqlite:///{(tmp_path / f'{name}.db').as_posix()}"
+        )
+        tables[name] = {
+            table: pd.read_sql(f"SELECT * FROM {table}", engine)
+            for table in [
+                "housekeeping",
+                "housekeeping_rollup_minute",
+                "housekeeping_rollup_hour",
+                "fits2db_table_meta",
+            ]
+        }
+        engine.dispose()
+    assert len(tables["chunks"]["housekeeping"].index) == 25000
+    for table, df in tables["whole"].items():
+        pd.testing.assert_frame_equal(df, tables["chunks"][table])
+
+
+@pytest.mark.parametrize("merge_mode", ["update", "ignore"])
+def test_row_keys(tmp_path, merge_mode):
+    path = write_synthetic_fits(tmp_path / "a.fits", n_rows=25000, n_columns=6)
+    db_path = (tmp_path / "fits2db.db").as_posix()
+    config = {
+        "database": {"type": "sqlite", "db_name": db_path},
+        "fits_files": {
+            "paths": [],
+            "merge_mode": merge_mode,
+            "delete_rows_from_missing_tables": False,
+            "tables": [
+                {
+                    "name": "HOUSEKEEPING",
+                    "date_column": "timestamp",
+                    "ingest_all_columns": True,
+                    "rollups": ["hour"],
+                }
+            ],
+        },
+    }
+    engine = create_engine(f"sqlite:///{db_path}")
+    # The second upload is a retry, its rows are loaded in chunks
+    DBWriter(config, fits.FitsFile(path)).upsert()
+    governor.configure(1024**2)
+    try:
+        DBWriter(config, fits.FitsFile(path)).upsert()
+    finally:
+        governor.configure(None)
+    df = pd.read_sql("SELECT * FROM housekeeping ORDER BY row_ordinal", engine)
+    assert df["row_ordinal"].to_list() == list(range(25000))
+    assert (df["file_meta_id"] == 1).all()
+    meta = pd.read_sql("SELECT * FROM fits2db_meta", engine)
+    assert len(meta.index) == 1
+
+    # A changed file keeps the rows it still has and drops the others
+    path = write_synthetic_fits(path, n_rows=20000, n_columns=7, seed=1)
+    DBWriter(config, fits.FitsFile(path)).update()
+    df = pd.read_sql("SELECT * FROM housekeeping ORDER BY row_ordinal", engine)
+    data = fits.FitsFile(path).get_table("HOUSEKEEPING").data
+    assert df["row_ordinal"].to_list() == list(range(20000))
+    assert df["hk_006"].to_list() == data["HK_006"].to_list()
+    indexes = pd.read_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'index'", engine
+    )
+    assert "uq_housekeeping_row" in indexes["name"].to_list()
+    assert (
+        "row_ordinal_mean"
+        not in pd.read_sql(
+            "SELECT * FROM housekeeping_rollup_hour", engine
+        ).columns
+    )
+    engine.dispose()
+
+
+def test_evolve_schema(tmp_path):
+    from fits2db.plan import union_schema
+
+    paths = [
+        write_synthetic_fits(
+            tmp_path / f"{name}.fits", n_rows=500, n_columns=n_columns
+        )
+        for name, n_columns in [("a", 6), ("b", 8), ("c", 10)]
+    ]
+    tables = [
+        {
+            "name": "HOUSEKEEPING",
+            "date_column": "timestamp",
+            "ingest_all_columns": True,
+            "rollups": ["minute", "hour"],
+        }
+    ]
+    results = {}
+    for name in ("evolved", "stepwise"):
+        db_path = (tmp_path / f"{name}.db").as_posix()
+        config = {
+            "database": {"type": "sqlite", "db_name": db_path},
+            "fits_files": {"paths": [], "tables": tables},
+        }
+        if name == "evolved":
+            DBWriter(config).evolve_schema(union_schema(paths, tables))
+        for path in paths:
+            writer = DBWriter(config, fits.FitsFile(path))
+            added = []
+            add_missing_columns = writer.loader._add_missing_columns
+            writer.loader._add_missing_columns = lambda *args: (
+                added.extend(add_missing_columns(*args)) or []
+            )
+            writer.upsert()
+            if name == "evolved":
+                # No table is altered while the files are loaded
+                assert added == []
+        engine = create_engine(f"sqlite:///{db_path}")
+        results[name] = [
+            pd.read_sql(f"SELECT * FROM {table}", engine)
+            for table in (
+                "housekeeping",
+                "housekeeping_rollup_minute",
+                "housekeeping_rollup_hour",
+            )
+        ]
+        engine.dispose()
+    for evolved, stepwise in zip(results["evolved"], results["stepwise"]):
+        pd.testing.assert_frame_equal(evolved, stepwise)
+
+
+def test_upload_from_spool(tmp_path):
+    pytest.importorskip("pyarrow")
+    from fits2db.spool import Spool
+
+    path = write_synthetic_fits(tmp_path / "a.fits", n_rows=500, n_columns=6)
+    tables = [
+        {
+            "name": "HOUSEKEEPING",
+            "date_column": "timestamp",
+            "ingest_all_columns": True,
+            "rollups": ["minute"],
+        }
+    ]
+    spool = Spool(tmp_path / "spool")
+    spool.write(fits.FitsFile(path), tables)
+    results = {}
+    for name in ("direct", "spool"):
+        db_path = (tmp_path / f"{name}.db").as_posix()
+        config = {
+            "database": {"type": "sqlite", "db_name": db_path},
+            "fits_files": {"paths": [], "tables": tables},
+        }
+        file = (
+            fits.FitsFile(path)
+            if name == "direct"
+            else spool.open(path, tables)
+        )
+        DBWriter(config, file).upsert()
+        engine = create_engine(f"sqlite:///{db_path}")
+        results[name] = [
+            pd.read_sql(f"SELECT * FROM {table}", engine)
+            for table in (
+                "housekeeping",
+                "housekeeping_rollup_minute",
+                "fits2db_meta",
+            )
+        ]
+        engine.dispose()
+    for direct, spooled in zip(results["direct"][:2], results["spool"][:2]):
+        pd.testing.assert_frame_equal(direct, spooled)
+    direct_meta, spool_meta = results["direct"][2], results["spool"][2]
+    assert spool_meta["filepath"].equals(direct_meta["filepath"])
+    assert spool_meta["last_file_mutation"].equals(
+        direct_meta["last_file_mutation"]
+    )
@@ -0,0 +1,133 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from fits2db.cache import QueryCache
+
+
+class FakeReader:
+    """Stands in for DBWriter with one housekeeping file per day."""
+
+    def __init__(self):
+        self.updates = {1: "2023-01-10", 2: "2023-01-10"}
+        self.ranges = {
+            1: ("2023-01-01 00:00", "2023-01-01 23:59"),
+            2: ("2023-01-05 00:00", "2023-01-05 23:59"),
+        }
+        self.range_queries = []
+
+    def get_db_file_infos(self):
+        return pd.DataFrame(
+            {
+                "id": list(self.updates),
+                "last_db_update": pd.to_datetime(list(self.updates.values())),
+            }
+        )
+
+    def file_ranges(self, table, file_ids=None):
+        self.range_queries.append((table, file_ids))
+        ids = list(self.ranges) if file_ids is None else file_ids
+        ids = [file_id for file_id in ids if file_id in self.ranges]
+        return pd.DataFrame(
+            {
+                "file_meta_id": ids,
+                "start": [pd.Timestamp(self.ranges[i][0]) for i in ids],
+                "end": [pd.Timestamp(self.ranges[i][1]) for i in ids],
+            }
+        )
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return QueryCache(tmp_path / "cache")
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame(
+        {
+            "timestamp": pd.date_range("2023-01-01", periods=10, freq="1h"),
+            "value": range(10),
+        }
+    )
+
+
+def put_days(cache, df):
+    for day in ("2023-01-01", "2023-01-05"):
+        start = pd.Timestamp(day)
+        end = start + pd.Timedelta("1D")
+        cache.put("housekeeping", ["value"], start, end, df)
+
+
+def get_day(cache, day):
+    start = pd.Timestamp(day)
+    return cache.get(
+        "housekeeping", ["value"], start, start + pd.Timedelta("1D")
+    )
+
+
+def test_get_put(cache, df):
+    window = ("2023-01-01", "2023-01-02")
+    assert cache.get("housekeeping", ["value"], *window) is None
+    cache.put("housekeeping", ["value"], *window, df)
+    cached = cache.get("housekeeping", ["value"], *window)
+    pd.testing.assert_frame_equal(cached, df)
+    # Columns, window and resolution are part of the key
+    assert cache.get("housekeeping", None, *window) is None
+    assert cache.get("housekeeping", ["value"], *window, "hour") is None
+
+
+def test_validate_keeps_unchanged_entries(cache, df):
+    reader = FakeReader()
+    # The first validation only records the files, as in a fresh cache
+    cache.validate(reader)
+    put_days(cache, df)
+    assert cache.validate(reader) == 0
+    assert reader.range_queries == [("housekeeping", None)]
+    assert cache.validate(reader) == 0
+    assert len(reader.range_queries) == 1
+    assert get_day(cache, "2023-01-01") is not None
+
+
+def test_validate_removes_overlapping_entries(cache, df):
+    reader = FakeReader()
+    cache.validate(reader)
+    put_days(cache, df)
+    cache.validate(reader)
+
+    reader.updates[2] = "2023-02-01"
+    assert cache.validate(reader) == 1
+    assert reader.range_queries[-1] == ("housekeeping", [2])
+    assert get_day(cache, "2023-01-01") is not None
+    assert get_day(cache, "2023-01-05") is None
+
+
+def test_validate_removed_file(cache, df):
+    reader = FakeReader()
+    cache.validate(reader)
+    put_days(cache, df)
+    cache.validate(reader)
+
+    del reader.updates[1]
+    del reader.ranges[1]
+    assert cache.validate(reader) == 1
+    assert get_day(cache, "2023-01-01") is None
+    assert get_day(cache, "2023-01-05") is not None
+
+
+def test_evict_least_recently_used(tmp_path, df):
+    cache = QueryCache(tmp_path / "cache")
+    put_days(cache, df)
+    entry_size = cache.size() // 2
+    # Age both entries, then use the first day again
+    for path in cache.root.glob("*.parquet"):
+        os.utime(path, (0, 0))
+    get_day(cache, "2023-01-01")
+
+    cache.max_bytes = entry_size
+    cache.evict()
+    assert get_day(cache, "2023-01-01") is not None
+    assert get_day(cache, "2023-01-05") is None
@@ -8,9 +8,10 @@ from fits2db.config.config_model import (
     ApplicationConfig,
     FitsConfig,
     ConfigFileValidator,
+    TableConfig,
 )
 
-ACCEPTABLE_TYPES = {"mysql"}
+ACCEPTABLE_TYPES = {"mysql", "sqlite"}
 
 
 def test_valid_database_config_user_password():
@@ -65,7 +66,7 @@ def test_invalid_database_config_both_credentials():
 def test_invalid_database_type():
     with pytest.raises(ValidationError):
         DatabaseConfig(
-            type="sqlite",
+            type="oracle",
             host="localhost",
             user="admin",
             password="adminpass",
@@ -74,6 +75,46 @@ def test_invalid_database_type():
         )
 
 
+def test_bulk_session_config():
+    config = DatabaseConfig(
+        type="mysql",
+        host="localhost",
+        user="admin",
+        password="adminpass",
+        bulk_session={"sql_log_bin": False},
+    )
+    assert config.bulk_session.unique_checks is False
+    assert config.bulk_session.sql_log_bin is False
+    with pytest.raises(ValidationError):
+        DatabaseConfig(type="sqlite", db_name="fits.db", bulk_session={})
+
+
+def test_partition_by_file_config():
+    config = DatabaseConfig(
+        type="postgresql",
+        host="localhost",
+        user="admin",
+        password="adminpass",
+        partition_by_file=True,
+    )
+    assert config.partition_by_file
+    with pytest.raises(ValidationError):
+        DatabaseConfig(
+            type="sqlite", db_name="fits.db", partition_by_file=True
+        )
+
+
+def test_valid_sqlite_config():
+    config = DatabaseConfig(type="sqlite", db_name="fits.db")
+    assert config.host is None
+    assert config.db_name == "fits.db"
+
+
+def test_invalid_sqlite_config_no_db_name():
+    with pytest.raises(ValidationError):
+        DatabaseConfig(type="sqlite")
+
+
 def test_valid_application_config():
     db_config = DatabaseConfig(
         type="mysql",
@@ -101,9 +142,36 @@ def test_valid_application_config():
         "description": None,
         "name": "test",
         "ingest_all_columns": True,
+        "rollups": None,
+        "enums": None,
     }
 
 
+def test_table_config_enums():
+    table = TableConfig(
+        name="calibration",
+        enums=[
+            {
+                "columns": ["nominal_cavity", "reference_cavity"],
+                "values": {"a": 1, "b": 2, "c": 3},
+            }
+        ],
+    )
+    assert table.enums[0].default == 0
+    with pytest.raises(ValidationError):
+        TableConfig(
+            name="calibration",
+            enums=[{"columns": ["nominal_cavity"], "values": {"a": 256}}],
+        )
+    with pytest.raises(ValidationError):
+        TableConfig(
+            name="calibration",
+            enums=[
+                {"columns": ["nominal_cavity"], "values": {"a": 1, "A": 2}}
+            ],
+        )
+
+
 def test_invalid_application_config():
     with pytest.raises(ValidationError):
         FitsConfig(name=123)
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from fits2db.adapters.base import encode_enums
+from fits2db.adapters.meta import Base, Fits2DbEnum
+from fits2db.adapters.mysql import MySQL
+
+CAVITY = {
+    "columns": ["Nominal_Cavity", "reference_cavity"],
+    "values": {"a": 1, "b": 2, "c": 3},
+    "default": 0,
+}
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        yield session
+    engine.dispose()
+
+
+def test_encode_enums():
+    data = pd.DataFrame(
+        {
+            "nominal_cavity": ["a", "B", " c ", None, "x"],
+            "reference_cavity": [b"b", b"b", b"a", b"c", b"C"],
+            "other": ["a", "b", "c", "a", "b"],
+        }
+    )
+    data = encode_enums(data, [CAVITY])
+    assert data["nominal_cavity"].dtype == np.uint8
+    assert data["nominal_cavity"].tolist() == [1, 2, 3, 0, 0]
+    assert data["reference_cavity"].tolist() == [2, 2, 1, 3, 3]
+    assert data["other"].tolist() == ["a", "b", "c", "a", "b"]
+
+
+def test_encode_enums_missing_column():
+    data = pd.DataFrame({"nominal_cavity": ["a"]})
+    data = encode_enums(data, [CAVITY])
+    assert data["nominal_cavity"].tolist() == [1]
+    assert "reference_cavity" not in data
+
+
+def test_write_enums_replaces_rows(session):
+    loader = object.__new__(MySQL)
+    loader.config = {
+        "fits_files": {"tables": [{"name": "CALIBRATION", "enums": [CAVITY]}]}
+    }
+    loader.write_enums(["calibration", "housekeeping"], session)
+    loader.write_enums(["calibration"], session)
+    session.commit()
+
+    rows = session.execute(select(Fits2DbEnum)).scalars().all()
+    assert len(rows) == 6
+    assert {row.tablename for row in rows} == {"calibration"}
+    nominal = {
+        row.label: row.code
+        for row in rows
+        if row.column_name == "nominal_cavity"
+    }
+    assert nominal == {"a": 1, "b": 2, "c": 3}
+
+    loader.engine = session.get_bind()
+    lookup = loader.get_enums("CALIBRATION")
+    assert list(lookup.columns) == ["column_name", "label", "code"]
+    assert len(lookup.index) == 6
@@ -1,8 +1,16 @@
+import bz2
+import gzip
+import shutil
+
+import numpy as np
 import pytest
 from astropy.io import fits
 from pathlib import Path
 import pandas as pd
+from fits2db.core.core import get_all_fits
 from fits2db.fits import FitsFile
+from fits2db.fits import fits as fits_module
+from tests.benchmarks.synthetic import write_synthetic_fits
 
 # Sample FITS file paths for testing
 SAMPLE_FITS_FILE = Path(r"data\2021-07-07_L1a.fits")
@@ -68,3 +76,66 @@ def test_load_file_invalid_format(tmp_path):
     invalid_file_path.write_text("This is not a FITS file.")
     with pytest.raises(ValueError):
         FitsFile(file_path=invalid_file_path)
+
+
+@pytest.mark.parametrize(
+    "suffix, opener", [(".gz", gzip.open), (".bz2", bz2.open)]
+)
+def test_compressed_file(tmp_path, monkeypatch, suffix, opener):
+    """Test reading a gzip or bzip2 compressed FITS file in chunks."""
+    monkeypatch.setattr(fits_module, "STREAM_CHUNK_BYTES", 4096)
+    path = write_synthetic_fits(tmp_path / "a.fits", n_rows=1000, n_columns=6)
+    compressed = tmp_path / f"a.fits{suffix}"
+    with open(path, "rb") as src, opener(compressed, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    fits_file = FitsFile(compressed)
+    original = FitsFile(path)
+    assert fits_file.table_names == original.table_names
+    chunks = list(fits_file.iter_table("HOUSEKEEPING", 300))
+    assert [len(chunk.data) for chunk in chunks] == [300, 300, 300, 100]
+    assert chunks[1].data.index[0] == 300
+    pd.testing.assert_frame_equal(
+        pd.concat([chunk.data for chunk in chunks]),
+        original.get_table("HOUSEKEEPING").data,
+    )
+    pd.testing.assert_frame_equal(
+        fits_file.get_table("HOUSEKEEPING").data,
+        original.get_table("HOUSEKEEPING").data,
+    )
+    pd.testing.assert_frame_equal(
+        fits_file.get_table("CALIBRATION").data,
+        original.get_table("CALIBRATION").data,
+    )
+    # The tables were streamed, astropy did not decompress them
+    assert not any(hdu._data_loaded for hdu in fits_file.hdul[1:])
+
+
+def test_tile_compressed_file(tmp_path):
+    """Test that only the plain tables of an fpack file are read."""
+    path = tmp_path / "a.fz"
+    table = fits.BinTableHDU.from_columns(
+        [fits.Column(name="col1", format="E", array=[1.0, 2.0, 3.0])],
+        name=SAMPLE_TABLE_NAME,
+    )
+    ztable = table.copy()
+    ztable.header["ZTABLE"] = True
+    ztable.name = "ZTABLE"
+    image = fits.CompImageHDU(np.zeros((8, 8), dtype=np.float32), name="IMAGE")
+    fits.HDUList([fits.PrimaryHDU(), image, table, ztable]).writeto(path)
+    fits_file = FitsFile(path)
+    assert fits_file.table_names == [SAMPLE_TABLE_NAME]
+    assert fits_file.get_table(SAMPLE_TABLE_NAME).data["col1"].tolist() == [
+        1,
+        2,
+        3,
+    ]
+
+
+def test_get_all_fits_compressed(tmp_path):
+    """Test that compressed FITS files are found."""
+    for name in ("a.fits", "b.fits.gz", "c.FITS.BZ2", "d.fz", "e.gz", "f.txt"):
+        (tmp_path / name).touch()
+    found = sorted(
+        Path(path).name for path in get_all_fits([tmp_path.as_posix()])
+    )
+    assert found == ["a.fits", "b.fits.gz", "c.FITS.BZ2", "d.fz"]
@@ -0,0 +1,111 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, func, inspect, select
+from sqlalchemy.orm import sessionmaker
+
+from fits2db.adapters.base import hash_header
+from fits2db.adapters.meta import Base, Fits2DbHeader, Fits2DbTableMeta
+from fits2db.adapters.mysql import MySQL
+from fits2db.adapters.sqlite import SQLite
+from fits2db.fits import FitsTable
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        yield session
+    engine.dispose()
+
+
+def header(value):
+    return pd.DataFrame(
+        {
+            "keyword": ["XTENSION", "NAXIS", "EXTNAME"],
+            "value": ["BINTABLE", 2, value],
+        }
+    )
+
+
+def test_hash_header_is_stable():
+    assert hash_header(header("A")) == hash_header(header("A"))
+    assert hash_header(header("A")) != hash_header(header("B"))
+
+
+def test_write_headers_deduplicates(session):
+    loader = object.__new__(MySQL)
+    first, second = loader.write_headers([header("A"), header("A")], session)
+    (third,) = loader.write_headers([header("B")], session)
+    (fourth,) = loader.write_headers([header("A")], session)
+    session.commit()
+
+    assert first == second == fourth != third
+    count = session.execute(select(func.count(Fits2DbHeader.id))).scalar()
+    assert count == 6
+
+
+def test_write_table_meta_replaces_rows(session):
+    loader = object.__new__(MySQL)
+    loader.config = {"fits_files": {"tables": []}}
+    data = pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
+    tables = [("TABLE_A", FitsTable("TABLE_A", header("A"), data))]
+    loader.write_table_meta(tables, session, 1)
+    loader.write_table_meta(tables, session, 1)
+    session.commit()
+
+    rows = session.execute(select(Fits2DbTableMeta)).scalars().all()
+    assert len(rows) == 1
+    assert rows[0].tablename == "table_a"
+    assert rows[0].record_count == 3
+    assert rows[0].header_hash == hash_header(header("A"))
+
+
+def test_migrate_meta_adds_header_hash():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE fits2db_table_meta (id INTEGER PRIMARY KEY, "
+            "file_meta_id INTEGER, tablename TEXT, record_count INTEGER, "
+            "column_count INTEGER)"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO fits2db_table_meta VALUES "
+            "(1, 1, 'table_a', 3, 2), (2, 2, 'table_a', 3, 2)"
+        )
+        conn.exec_driver_sql("CREATE TABLE table_a (id INTEGER)")
+        conn.exec_driver_sql(
+            'CREATE TABLE table_a_meta ("Keyword" TEXT, "Value" TEXT)'
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO table_a_meta VALUES ('XTENSION', 'BINTABLE'), "
+            "('NAXIS', '2'), ('EXTNAME', 'A')"
+        )
+    loader = object.__new__(SQLite)
+    loader.engine = engine
+    loader.config = {"fits_files": {"tables": [{"name": "TABLE_A"}]}}
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        loader.migrate_meta(conn)
+        loader.migrate_meta(conn)
+
+    inspector = inspect(engine)
+    columns = [
+        column["name"]
+        for column in inspector.get_columns("fits2db_table_meta")
+    ]
+    assert "header_hash" in columns
+    assert {"table_a", "table_a_meta"} <= set(inspector.get_table_names())
+    with sessionmaker(bind=engine)() as session:
+        rows = session.execute(
+            select(Fits2DbTableMeta).order_by(Fits2DbTableMeta.id)
+        ).scalars()
+        assert [row.header_hash for row in rows] == [
+            None,
+            hash_header(header("A")),
+        ]
+        cards = session.execute(
+            select(Fits2DbHeader.keyword).order_by(Fits2DbHeader.card_index)
+        ).scalars()
+        assert list(cards) == ["XTENSION", "NAXIS", "EXTNAME"]
+    engine.dispose()
@@ -0,0 +1,62 @@
+import pytest
+from astropy.io import fits
+
+from fits2db.memory import (
+    MIN_CHUNK_ROWS,
+    OBJECT_BYTES,
+    PEAK_FACTOR,
+    MemoryGovernor,
+    column_bytes,
+    estimate_table_bytes,
+    parse_size,
+)
+from tests.benchmarks.synthetic import write_synthetic_fits
+
+
+def test_parse_size():
+    assert parse_size("512") == 512
+    assert parse_size("512M") == 512 * 1024**2
+    assert parse_size("4g") == 4 * 1024**3
+    assert parse_size("1.5GB") == int(1.5 * 1024**3)
+    assert parse_size("2 KiB") == 2048
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_column_bytes():
+    assert column_bytes("E") == 4
+    assert column_bytes("3D") == 24
+    assert column_bytes("26A") == OBJECT_BYTES + 26
+    assert column_bytes("1PE(10)") == OBJECT_BYTES
+    assert column_bytes("A8", ascii_table=True) == OBJECT_BYTES + 8
+    assert column_bytes("F10.3", ascii_table=True) == 8
+
+
+def test_estimate_table_bytes(tmp_path):
+    path = write_synthetic_fits(tmp_path / "a.fits", n_rows=40, n_columns=5)
+    with fits.open(path) as hdul:
+        header = hdul["IRRADIANCE"].header
+    # 26A timestamp and three D columns
+    row_bytes = OBJECT_BYTES + 26 + 3 * 8
+    assert estimate_table_bytes(header) == 40 * row_bytes * PEAK_FACTOR
+
+
+def test_governor():
+    governor = MemoryGovernor()
+    assert not governor.enabled
+    assert governor.try_reserve(10**12)
+    assert governor.available() is None
+    with pytest.raises(ValueError):
+        governor.chunk_rows(100)
+
+    governor.configure(1000)
+    assert governor.try_reserve(600)
+    assert not governor.try_reserve(600)
+    assert governor.available() == 400
+    governor.release(600)
+    assert governor.try_reserve(600)
+    governor.reserve(600)
+    assert governor.available() == 0
+    governor.configure(100 * MIN_CHUNK_ROWS * 10)
+    assert governor.chunk_rows(10) == 100 * MIN_CHUNK_ROWS
+    assert governor.chunk_rows(10**9) == MIN_CHUNK_ROWS
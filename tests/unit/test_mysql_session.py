@@ -0,0 +1,265 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from fits2db.adapters.mysql import MAX_PARTITIONS, MySQL
+from fits2db.profiling import profiler
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, statement):
+        self.connection.statements.append(statement)
+        if statement.startswith("SET SESSION sql_log_bin"):
+            raise self.connection.error("Access denied")
+
+    def fetchone(self):
+        return self.connection.previous
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, previous, error):
+        self.previous = previous
+        self.error = error
+        self.statements = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+def mysql_config(bulk_session):
+    return {
+        "database": {
+            "type": "mysql",
+            "host": "localhost",
+            "user": "user",
+            "password": "password",
+            "port": 3306,
+            "db_name": "fits",
+            "bulk_session": bulk_session,
+        },
+        "fits_files": {"paths": [], "tables": []},
+    }
+
+
+def test_bulk_session_only_for_bulk_load():
+    config = mysql_config({"sql_log_bin": False})
+    assert MySQL(config, None).bulk_session == {}
+    loader = MySQL(config, None, bulk_load=True)
+    assert loader.bulk_session == {
+        "unique_checks": 0,
+        "foreign_key_checks": 0,
+        "sql_log_bin": 0,
+        "bulk_insert_buffer_size": 256 * 1024**2,
+    }
+    assert loader.to_sql_options == {"chunksize": 50000}
+    assert MySQL(mysql_config(None), None, bulk_load=True).bulk_session == {}
+
+
+def test_bulk_session_is_noted_in_profile():
+    profiler.enable()
+    try:
+        loader = MySQL(mysql_config({}), None, bulk_load=True)
+        assert profiler.notes["bulk_session"] == loader.bulk_session
+    finally:
+        profiler.disable()
+        profiler.reset()
+
+
+def test_bulk_session_is_restored():
+    loader = MySQL(mysql_config({"sql_log_bin": False}), None, bulk_load=True)
+    error = loader.engine.dialect.loaded_dbapi.Error
+    connection = FakeConnection((1, 1, 1, 8 * 1024**2), error)
+    record = SimpleNamespace(info={})
+
+    loader._apply_bulk_session(connection, record, None)
+    assert connection.statements[1:] == [
+        "SET SESSION unique_checks = 0",
+        "SET SESSION foreign_key_checks = 0",
+        "SET SESSION sql_log_bin = 0",
+        f"SET SESSION bulk_insert_buffer_size = {256 * 1024**2}",
+    ]
+    # sql_log_bin could not be set and is not restored
+    assert record.info["bulk_session"] == {
+        "unique_checks": 1,
+        "foreign_key_checks": 1,
+        "bulk_insert_buffer_size": 8 * 1024**2,
+    }
+
+    connection.statements = []
+    loader._restore_session(connection, record)
+    assert connection.statements == [
+        "SET SESSION unique_checks = 1",
+        "SET SESSION foreign_key_checks = 1",
+        f"SET SESSION bulk_insert_buffer_size = {8 * 1024**2}",
+    ]
+    assert "bulk_session" not in record.info
+
+
+class FakeAlterConnection:
+    def __init__(self, version, is_mariadb=False, instant_errno=None):
+        self.dialect = SimpleNamespace(
+            server_version_info=version, is_mariadb=is_mariadb
+        )
+        self.instant_errno = instant_errno
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(str(statement))
+        if self.instant_errno and "ALGORITHM=INSTANT" in str(statement):
+            orig = SimpleNamespace(errno=self.instant_errno)
+            raise OperationalError(str(statement), {}, orig)
+
+
+@pytest.mark.parametrize(
+    "version, is_mariadb, instant",
+    [
+        ((8, 0, 36), False, True),
+        ((5, 7, 44), False, False),
+        ((10, 6, 16), True, True),
+    ],
+)
+def test_instant_add_column(version, is_mariadb, instant):
+    loader = MySQL(mysql_config(None), None)
+    conn = FakeAlterConnection(version, is_mariadb)
+    loader.execute_alter(
+        conn, "hk", ["ADD COLUMN a FLOAT", "ADD COLUMN b FLOAT"]
+    )
+    statement = "ALTER TABLE hk ADD COLUMN a FLOAT, ADD COLUMN b FLOAT"
+    if instant:
+        statement += ", ALGORITHM=INSTANT"
+    assert conn.statements == [statement]
+
+    conn = FakeAlterConnection(version, is_mariadb)
+    loader.execute_alter(conn, "hk", ["DROP COLUMN a"])
+    assert conn.statements == ["ALTER TABLE hk DROP COLUMN a"]
+
+
+def test_instant_add_column_fallback():
+    loader = MySQL(mysql_config(None), None)
+    conn = FakeAlterConnection((8, 0, 36), instant_errno=1846)
+    loader.execute_alter(conn, "hk", ["ADD COLUMN a FLOAT"])
+    assert conn.statements == [
+        "ALTER TABLE hk ADD COLUMN a FLOAT, ALGORITHM=INSTANT",
+        "ALTER TABLE hk ADD COLUMN a FLOAT",
+    ]
+    conn = FakeAlterConnection((8, 0, 36), instant_errno=1054)
+    with pytest.raises(OperationalError):
+        loader.execute_alter(conn, "hk", ["ADD COLUMN a FLOAT"])
+
+
+@pytest.mark.parametrize(
+    "merge_mode, statement",
+    [
+        (
+            "update",
+            "INSERT INTO hk (a, file_meta_id, row_ordinal) "
+            "SELECT a, file_meta_id, row_ordinal FROM tmp_hk "
+            "ON DUPLICATE KEY UPDATE a = VALUES(a)",
+        ),
+        (
+            "ignore",
+            "INSERT IGNORE INTO hk (a, file_meta_id, row_ordinal) "
+            "SELECT a, file_meta_id, row_ordinal FROM tmp_hk",
+        ),
+    ],
+)
+def test_keyed_insert(merge_mode, statement):
+    config = mysql_config(None)
+    config["fits_files"]["merge_mode"] = merge_mode
+    loader = MySQL(config, None)
+    assert loader.row_keys
+    columns = ["a", "file_meta_id", "row_ordinal"]
+    assert loader.keyed_insert("hk", "tmp_hk", columns) == statement
+
+
+class FakePartitionConnection:
+    def __init__(self, partitions):
+        self.partitions = partitions
+        self.statements = []
+
+    def execute(self, statement, parameters=None):
+        if parameters is not None:
+            found = parameters["partition_name"] in self.partitions
+            return SimpleNamespace(
+                one=lambda: (len(self.partitions), int(found)),
+                fetchone=lambda: (1,) if found else None,
+            )
+        self.statements.append(str(statement))
+
+
+def test_file_partitions():
+    config = mysql_config(None)
+    config["database"]["partition_by_file"] = True
+    loader = MySQL(config, None)
+    assert loader.partition_by_file
+    conn = FakePartitionConnection({"p0", "p1"})
+    loader.add_file_partition(conn, "hk", 1)
+    loader.add_file_partition(conn, "hk", 2)
+    loader.truncate_file_partition(conn, "hk", 1)
+    loader.drop_file_partition(conn, "hk", 1)
+    loader.drop_file_partition(conn, "hk", 3)
+    assert conn.statements == [
+        "ALTER TABLE hk ADD PARTITION (PARTITION p2 VALUES IN (2))",
+        "ALTER TABLE hk TRUNCATE PARTITION p1",
+        "ALTER TABLE hk DROP PARTITION p1",
+    ]
+
+
+def test_file_partition_limit():
+    config = mysql_config(None)
+    config["database"]["partition_by_file"] = True
+    loader = MySQL(config, None)
+    conn = FakePartitionConnection({f"p{i}" for i in range(MAX_PARTITIONS)})
+    loader.add_file_partition(conn, "hk", 1)
+    with pytest.raises(ValueError, match="partition_by_file"):
+        loader.add_file_partition(conn, "hk", MAX_PARTITIONS)
+    assert conn.statements == []
+
+
+class FakeImplicitCommitConnection:
+    """Commits the open transaction before DDL, like MySQL."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.pending = None
+
+    def execute(self, statement, parameters=None):
+        sql = str(statement).strip()
+        if sql.startswith("ALTER"):
+            self.commit()
+            if "TRUNCATE PARTITION p1" in sql:
+                self.rows = [row for row in self.rows if row != 1]
+        elif sql.startswith("DELETE"):
+            self.pending = [row for row in self.rows if row != 1]
+        elif sql.startswith("INSERT"):
+            raise OperationalError(sql, {}, Exception("insert failed"))
+
+    def commit(self):
+        if self.pending is not None:
+            self.rows = self.pending
+        self.pending = None
+
+    def rollback(self):
+        self.pending = None
+
+
+def test_failed_merge_keeps_rows_of_partition():
+    config = mysql_config(None)
+    config["database"]["partition_by_file"] = True
+    loader = MySQL(config, None)
+    columns = {"a": None, "file_meta_id": None}
+    loader.unit = SimpleNamespace(
+        columns={"hk": columns, "tmp_hk": columns}, partitioned={"hk": True}
+    )
+    conn = FakeImplicitCommitConnection([1, 1, 2])
+    with pytest.raises(OperationalError):
+        loader.merge_tables("hk", "tmp_hk", conn, 1)
+    conn.rollback()
+    assert conn.rows == [1, 1, 2]
@@ -0,0 +1,179 @@
+import gzip
+import json
+import shutil
+
+import pandas as pd
+
+from fits2db.adapters.base import union_frame
+from fits2db.fits import FitsFile
+from fits2db.plan import (
+    load_throughput,
+    plan_ingest,
+    read_table_headers,
+    rollup_columns,
+    schema_frame,
+    table_columns,
+    union_schema,
+)
+from tests.benchmarks.synthetic import write_synthetic_fits
+
+TABLES = [
+    {"name": "HOUSEKEEPING", "date_column": "timestamp"},
+    {"name": "IRRADIANCE", "date_column": "timestamp"},
+]
+
+
+def test_read_table_headers(tmp_path):
+    path = write_synthetic_fits(tmp_path / "a.fits", n_rows=40, n_columns=5)
+    headers = read_table_headers(path)
+    assert list(headers) == ["HOUSEKEEPING", "CALIBRATION", "IRRADIANCE"]
+    housekeeping = headers["HOUSEKEEPING"]
+    assert housekeeping["rows"] == 40
+    assert housekeeping["columns"][:2] == ["TIMESTAMP", "HK_000"]
+    # 26A timestamp, E, D, J, I, K and two 1A strings
+    assert housekeeping["row_bytes"] == 26 + 4 + 8 + 4 + 2 + 8 + 2
+
+
+def test_table_columns():
+    columns = table_columns(["Time Stamp", "A-B", "ab"], "time_stamp")
+    assert columns == ["time_stamp", "ab", "ab_1", "file_meta_id", "timestamp"]
+    columns = table_columns(["TIMESTAMP", "A"], "timestamp", row_keys=True)
+    assert columns == ["timestamp", "a", "file_meta_id", "row_ordinal"]
+
+
+def test_rollup_columns():
+    table = {
+        "name": "CALIBRATION",
+        "date_column": "time_stamp",
+        "enums": [{"columns": ["Cavity"], "values": {"A": 1}}],
+    }
+    columns = rollup_columns(
+        ["Time Stamp", "TIMESTAMP", "Value", "Cavity", "Shutter"],
+        ["26A", "26A", "1E", "1A", "L"],
+        table,
+    )
+    assert columns == [
+        "timestamp",
+        "value_min",
+        "value_max",
+        "value_mean",
+        "value_count",
+        "time_stamp_last",
+        "cavity_last",
+        "shutter_last",
+        "file_meta_id",
+    ]
+
+
+def test_plan_ingest(tmp_path):
+    paths = [
+        write_synthetic_fits(tmp_path / "a.fits", n_rows=40, n_columns=5),
+        write_synthetic_fits(tmp_path / "b.fits", n_rows=60, n_columns=7),
+        write_synthetic_fits(tmp_path / "c.fits", n_rows=10, n_columns=7),
+    ]
+    plan = plan_ingest(paths, TABLES)
+    tables = plan.tables.set_index("table")
+    assert tables.loc["housekeeping", "files"] == 3
+    assert tables.loc["housekeeping", "rows"] == 110
+    assert tables.loc["housekeeping", "alters"] == 1
+    assert tables.loc["irradiance", "rows"] == 110
+    assert tables.loc["irradiance", "bytes"] == 110 * (26 + 3 * 8)
+    changes = plan.schema_changes
+    assert changes["action"].tolist() == ["create", "create", "alter"]
+    assert changes.iloc[2]["columns"] == ["hk_005", "hk_006"]
+    assert changes.iloc[2]["file"] == "b.fits"
+    assert plan.seconds is None
+    assert plan.file_count == 3
+
+
+def test_plan_ingest_rollups(tmp_path):
+    paths = [
+        write_synthetic_fits(tmp_path / "a.fits", n_rows=40, n_columns=5),
+        write_synthetic_fits(tmp_path / "b.fits", n_rows=60, n_columns=7),
+        tmp_path / "broken.fits",
+    ]
+    paths[2].write_bytes(b"not a fits file")
+    tables = [{**TABLES[0], "rollups": ["hour", "day"]}]
+    plan = plan_ingest(paths, tables, row_keys=True)
+    changes = plan.schema_changes
+    assert changes["table"].tolist() == [
+        "housekeeping",
+        "housekeeping_rollup_hour",
+        "housekeeping_rollup_day",
+        "housekeeping",
+        "housekeeping_rollup_hour",
+        "housekeeping_rollup_day",
+    ]
+    assert "row_ordinal" in changes.iloc[0]["columns"]
+    assert "row_ordinal_mean" not in changes.iloc[1]["columns"]
+    assert "hk_000_mean" in changes.iloc[1]["columns"]
+    assert changes.iloc[4]["columns"][0] == "hk_005_min"
+    assert plan.tables.set_index("table").loc["housekeeping", "alters"] == 1
+    assert plan.file_count == 2
+
+
+def test_plan_ingest_existing_columns(tmp_path):
+    paths = [write_synthetic_fits(tmp_path / "a.fits", n_rows=40, n_columns=5)]
+    existing = {"housekeeping": table_columns(["TIMESTAMP", "HK_000"], None)}
+    plan = plan_ingest(paths, TABLES, existing_columns=existing)
+    housekeeping = plan.schema_changes.iloc[0]
+    assert housekeeping["action"] == "alter"
+    assert housekeeping["columns"][0] == "hk_001"
+    assert "timestamp" not in housekeeping["columns"]
+
+    plan = plan_ingest(paths, TABLES, schema_changes=False)
+    assert plan.schema_changes.empty
+
+
+def test_union_schema(tmp_path):
+    paths = [
+        write_synthetic_fits(tmp_path / "a.fits", n_rows=40, n_columns=5),
+        write_synthetic_fits(tmp_path / "b.fits", n_rows=60, n_columns=7),
+        write_synthetic_fits(tmp_path / "c.fits", n_rows=10, n_columns=6),
+    ]
+    tables = union_schema(paths, TABLES)
+    assert [len(frames) for frames in tables.values()] == [2, 1]
+    housekeeping = union_frame(tables["housekeeping"])
+    assert housekeeping.empty
+    assert list(housekeeping.columns)[-3:] == [
+        "file_meta_id",
+        "hk_005",
+        "hk_006",
+    ]
+    assert housekeeping["timestamp"].dtype.kind == "M"
+    assert housekeeping["hk_000"].dtype == "float32"
+    assert housekeeping["hk_005"].dtype == "uint8"
+
+
+def test_schema_frame_compressed(tmp_path):
+    path = write_synthetic_fits(tmp_path / "a.fits", n_rows=40, n_columns=5)
+    with open(path, "rb") as src, gzip.open(f"{path}.gz", "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    file = FitsFile(tmp_path / "a.fits.gz")
+    frame = schema_frame(file, TABLES[0])
+    # Only the header was read, the table was not decompressed
+    assert not file.hdul["HOUSEKEEPING"]._data_loaded
+    assert frame.empty
+    pd.testing.assert_frame_equal(
+        frame, schema_frame(FitsFile(path), TABLES[0])
+    )
+
+
+def test_load_throughput(tmp_path):
+    profile = {
+        "wall_time_s": 10.0,
+        "stages": {
+            "extract_data": {"rows": 5000},
+            "open_file": {"bytes": 1000},
+        },
+    }
+    path = tmp_path / "profile.json"
+    path.write_text(json.dumps(profile))
+    throughput = load_throughput([path, path, tmp_path / "missing.json"])
+    assert throughput == {"rows_per_s": 500.0, "bytes_per_s": 100.0, "runs": 2}
+    assert load_throughput([tmp_path / "missing.json"]) is None
+
+    paths = [write_synthetic_fits(tmp_path / "a.fits", n_rows=40, n_columns=5)]
+    plan = plan_ingest(paths, TABLES, throughput=throughput)
+    assert plan.seconds == 80 / 500
+    assert "estimated duration" in plan.report()
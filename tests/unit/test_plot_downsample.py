@@ -0,0 +1,98 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("matplotlib")
+sys.path.insert(0, str(Path(__file__).parents[2] / "plots"))
+
+from TSI_PLOT_LIB_JTSIM_pandas import (
+    downsample,
+    lttb,
+    minmax_downsample,
+    pixel_downsample,
+    plot_scatter,
+)
+
+
+@pytest.fixture
+def series():
+    x = pd.Series(pd.date_range("2021-01-01", periods=10000, freq="s"))
+    y = pd.Series(np.sin(np.linspace(0, 20, 10000)))
+    y[4321] = 50.0
+    y[6789] = -50.0
+    return x, y
+
+
+def test_minmax_downsample(series):
+    x, y = series
+    index = minmax_downsample(x, y, 100)
+    assert len(index) <= 200
+    assert index[0] == 0
+    assert index[-1] == len(x) - 1
+    assert {4321, 6789} <= set(index)
+    assert (np.diff(index) > 0).all()
+
+
+def test_lttb(series):
+    x, y = series
+    index = lttb(x, y, 100)
+    assert len(index) == 100
+    assert index[0] == 0
+    assert index[-1] == len(x) - 1
+    assert {4321, 6789} <= set(index)
+    assert (np.diff(index) > 0).all()
+
+
+@pytest.mark.parametrize("method", ["minmax", "lttb"])
+def test_downsample_drops_nan(series, method):
+    x, y = series
+    y[:10] = np.nan
+    y[-10:] = np.nan
+    y[5000] = np.nan
+    small_x, small_y = downsample(x, y, 100, method)
+    assert not small_y.isna().any()
+    assert small_x.iloc[0] == x.iloc[10]
+    assert small_x.iloc[-1] == x.iloc[-11]
+    assert small_y.max() == 50.0
+    assert small_y.min() == -50.0
+
+
+def test_downsample_keeps_short_series(series):
+    x, y = series
+    small_x, small_y = downsample(x[:50], y[:50], 100)
+    assert len(small_x) == len(small_y) == 50
+    assert downsample(x, y, 100, "none")[1] is y
+    with pytest.raises(ValueError, match="Unknown method"):
+        downsample(x, y, 100, "mean")
+
+
+def test_pixel_downsample():
+    rng = np.random.default_rng(0)
+    x = rng.uniform(-10, 10, 100000)
+    y = rng.uniform(-10, 10, 100000)
+    x[0], y[0] = 500.0, 500.0
+    x[1], y[1] = np.nan, 0.0
+    index = pixel_downsample(x, y, (-10, 10), (-10, 10), (20, 10))
+    assert len(index) == 20 * 10 + 1
+    assert index[0] == 0
+    assert 1 not in index
+    assert (np.diff(index) > 0).all()
+
+
+def test_plot_scatter():
+    import matplotlib.pyplot as plt
+
+    fig, axis = plt.subplots(figsize=(2, 2), dpi=50)
+    rng = np.random.default_rng(0)
+    x = pd.Series(rng.normal(0, 20, 100000))
+    y = pd.Series(rng.normal(0, 20, 100000))
+    (line,) = plot_scatter(
+        axis, x, y, marker=".", linewidth=0, xlim=(-60, 60), ylim=(-50, 50)
+    )
+    extent = axis.get_window_extent()
+    assert len(line.get_xdata()) < 2 * extent.width * extent.height
+    assert axis.get_xlim() == (-60, 60)
+    plt.close(fig)
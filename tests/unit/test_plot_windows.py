@@ -0,0 +1,113 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("matplotlib")
+sys.path.insert(0, str(Path(__file__).parents[2] / "plots"))
+
+from plot_data import SpanReader, WindowSlicer
+
+
+def hourly(start, periods):
+    return pd.DataFrame(
+        {
+            "timestamp": pd.date_range(start, periods=periods, freq="h"),
+            "value": range(periods),
+        }
+    )
+
+
+def chunked(df, size):
+    return [df.iloc[i : i + size] for i in range(0, len(df.index), size)]
+
+
+DAYS = [
+    (pd.Timestamp("2021-01-01") + pd.Timedelta(days=day),)
+    + (pd.Timestamp("2021-01-02") + pd.Timedelta(days=day),)
+    for day in range(4)
+]
+
+
+class FakeReader:
+    """Streams the hourly rows of four days in chunks of 10 rows."""
+
+    def __init__(self):
+        self.df = hourly("2021-01-01", 4 * 24)
+        self.reads = []
+
+    def read(self, table, start, end, columns=None, chunksize=None):
+        self.reads.append((table, start))
+        rows = self.df[self.df["timestamp"].between(start, end)]
+        return iter(chunked(rows, 10))
+
+
+class FakeCache:
+    """Holds the windows of the days in `cached`."""
+
+    def __init__(self, df, cached):
+        self.df = df
+        self.cached = cached
+        self.puts = []
+
+    def get(self, table, columns, start, end, resolution):
+        if start not in self.cached:
+            return None
+        return self.df[self.df["timestamp"].between(start, end)]
+
+    def put(self, table, columns, start, end, df, resolution):
+        self.puts.append(start)
+
+
+def test_windows_share_boundary():
+    slicer = WindowSlicer(chunked(hourly("2021-01-01", 4 * 24), 7))
+    windows = [slicer.window(start, end) for start, end in DAYS]
+    assert [len(df.index) for df in windows] == [25, 25, 25, 24]
+    for (start, end), df in zip(DAYS, windows):
+        assert df["timestamp"].iloc[0] == start
+        assert df["timestamp"].iloc[-1] == min(
+            end, pd.Timestamp("2021-01-04 23:00")
+        )
+    # The boundary row is in both windows
+    assert windows[0]["value"].iloc[-1] == windows[1]["value"].iloc[0]
+
+
+def test_window_without_rows():
+    slicer = WindowSlicer(chunked(hourly("2021-01-03", 24), 10))
+    assert slicer.window(*DAYS[0]).empty
+    assert len(slicer.window(*DAYS[2]).index) == 24
+    assert slicer.window(*DAYS[3]).empty
+    assert WindowSlicer([]).window(*DAYS[0]).empty
+
+
+def test_skip_trims_buffer():
+    slicer = WindowSlicer(chunked(hourly("2021-01-01", 4 * 24), 30))
+    slicer.window(*DAYS[0])
+    slicer.skip(DAYS[1][1])
+    assert (slicer.buffer["timestamp"] >= DAYS[1][1]).all()
+    df = slicer.window(*DAYS[2])
+    assert df["timestamp"].iloc[0] == DAYS[2][0]
+    # Rows of the skipped window are dropped as the chunks arrive
+    assert len(slicer.buffer.index) <= 30
+    assert (slicer.buffer["timestamp"] >= DAYS[2][1]).all()
+
+
+@pytest.mark.parametrize(
+    "cached", [set(), {DAYS[0][0]}, {DAYS[1][0]}, {DAYS[0][0], DAYS[2][0]}]
+)
+def test_span_reader_with_cache(cached):
+    reader = FakeReader()
+    cache = FakeCache(reader.df, cached)
+    span = SpanReader(reader, DAYS, "daily", cache)
+    for start, end in DAYS:
+        df = span.window("housekeeping", start, end)
+        expected = reader.df[reader.df["timestamp"].between(start, end)]
+        assert df["value"].tolist() == expected["value"].tolist()
+        slicer = span.slicers.get("housekeeping")
+        if slicer is not None and slicer.buffer is not None:
+            assert len(slicer.buffer.index) <= 10
+            assert (slicer.buffer["timestamp"] >= end).all()
+    first_missing = min(start for start, _ in DAYS if start not in cached)
+    assert reader.reads == [("housekeeping", first_missing)]
+    assert cache.puts == [start for start, _ in DAYS if start not in cached]
@@ -0,0 +1,90 @@
+import json
+from time import sleep
+
+import pytest
+
+from fits2db.profiling import Profiler
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler()
+    with profiler.stage("to_sql", table="a") as stage:
+        stage.count(rows=10)
+    assert profiler.records == []
+
+
+def test_summary_per_stage_and_table():
+    profiler = Profiler()
+    profiler.enable()
+    for rows in (10, 20, 30):
+        with profiler.stage("extract_data", file="f.fits", table="a") as stage:
+            stage.count(rows=rows, nbytes=rows * 8)
+    with profiler.stage("to_sql", file="f.fits", table="a"):
+        pass
+
+    summary = profiler.summary()
+    extract = summary["stages"]["extract_data"]
+    assert extract["count"] == 3
+    assert extract["rows"] == 60
+    assert extract["bytes"] == 480
+    assert extract["p50_s"] <= extract["p95_s"] <= extract["max_s"]
+    assert summary["tables"]["a"]["rows"] == 60
+    assert set(summary["tables"]["a"]["stages"]) == {"extract_data", "to_sql"}
+    assert "f.fits" in summary["files"]
+
+
+def test_nested_stages_record_self_time():
+    profiler = Profiler()
+    profiler.enable()
+    with profiler.stage("ddl", table="a"):
+        with profiler.stage("to_sql", table="a"):
+            sleep(0.05)
+
+    summary = profiler.summary()
+    to_sql = summary["stages"]["to_sql"]["total_s"]
+    ddl = summary["stages"]["ddl"]["total_s"]
+    assert to_sql >= 0.05
+    assert ddl < 0.05
+    assert to_sql + ddl <= summary["wall_time_s"]
+
+
+def test_dump_and_report(tmp_path):
+    profiler = Profiler()
+    profiler.enable()
+    with profiler.stage("merge_tables", table="a"):
+        pass
+    profiler.note("config", "config.yml")
+    path = tmp_path / "profile.json"
+    profiler.dump(path)
+
+    data = json.loads(path.read_text())
+    assert data["records"][0]["stage"] == "merge_tables"
+    report = profiler.report()
+    assert "merge_tables" in report
+    assert "config: config.yml" in report
+
+
+def test_speedup():
+    profiler = Profiler()
+    profiler.enable()
+    with profiler.stage("to_sql", table="a") as stage:
+        stage.count(rows=1000)
+    with profiler.stage("ddl", table="a"):
+        pass
+    with profiler.stage("extract_data", table="a") as stage:
+        sleep(0.05)
+        stage.count(rows=1000)
+    summary = profiler.summary()
+    baseline = {
+        "wall_time_s": summary["wall_time_s"] * 4,
+        "stages": {
+            "to_sql": {
+                "rows_per_s": summary["stages"]["to_sql"]["rows_per_s"] / 2
+            },
+            "extract_data": {"rows": 1000},
+        },
+    }
+    speedup = profiler.speedup(baseline)
+    assert speedup["to_sql"] == 2.0
+    assert speedup["run"] == pytest.approx(4.0, rel=0.1)
+    assert "ddl" not in speedup
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fits2db.rollup import (
+    choose_resolution,
+    combine_rollup,
+    compute_rollup,
+    rollup_table,
+)
+
+
+@pytest.fixture
+def data():
+    df = pd.DataFrame(
+        {
+            "timestamp": pd.date_range("2023-01-01", periods=7200, freq="1s"),
+            "value": np.arange(7200, dtype=float),
+            "flag": np.arange(7200) % 3,
+            "text": np.where(np.arange(7200) < 5000, "closed", "open"),
+            "file_meta_id": 1,
+        }
+    )
+    df.loc[5, "value"] = np.nan
+    return df
+
+
+def test_compute_rollup(data):
+    rollup = compute_rollup(data, "hour")
+    assert list(rollup.columns) == [
+        "timestamp",
+        "value_min",
+        "value_max",
+        "value_mean",
+        "value_count",
+        "flag_min",
+        "flag_max",
+        "flag_mean",
+        "flag_count",
+        "text_last",
+    ]
+    assert len(rollup.index) == 2
+    assert rollup["value_count"].to_list() == [3599, 3600]
+    assert rollup["value_max"].to_list() == [3599.0, 7199.0]
+    expected = data["value"][:3600].mean()
+    assert rollup["value_mean"][0] == pytest.approx(expected)
+    assert rollup["text_last"].to_list() == ["closed", "open"]
+
+
+def test_combine_into_coarser_resolution(data):
+    from_minutes = combine_rollup(compute_rollup(data, "minute"), "hour")
+    pd.testing.assert_frame_equal(from_minutes, compute_rollup(data, "hour"))
+
+
+def test_combine_files(data):
+    first = compute_rollup(data.iloc[:1800], "hour")
+    second = compute_rollup(data.iloc[1800:], "hour")
+    combined = combine_rollup(pd.concat([first, second]))
+    pd.testing.assert_frame_equal(combined, compute_rollup(data, "hour"))
+
+
+def test_rollup_states(data):
+    rollup = compute_rollup(data, "minute", states=["flag"])
+    assert "flag_mean" not in rollup.columns
+    assert rollup["flag_last"].to_list()[:2] == [59 % 3, 119 % 3]
+    hours = combine_rollup(rollup, "hour")
+    assert hours["flag_last"].to_list() == [3599 % 3, 7199 % 3]
+    assert hours["text_last"].to_list() == ["closed", "open"]
+
+
+def test_rollup_table():
+    assert rollup_table("HOUSEKEEPING", "day") == "housekeeping_rollup_day"
+    with pytest.raises(ValueError):
+        rollup_table("housekeeping", "week")
+
+
+@pytest.mark.parametrize(
+    "start, end, resolution",
+    [
+        ("2021-01-01", "2021-01-02", "minute"),
+        ("2021-01-01", "2021-02-01", "hour"),
+        ("2021-01-01", "2022-01-01", "hour"),
+        ("2015-01-01", "2025-01-01", "day"),
+    ],
+)
+def test_choose_resolution(start, end, resolution):
+    assert choose_resolution(start, end) == resolution
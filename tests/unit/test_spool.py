@@ -0,0 +1,100 @@
+import os
+
+import pandas as pd
+import pytest
+
+from fits2db.adapters.base import prepare_dataframe
+from fits2db.fits import FitsFile
+from tests.benchmarks.synthetic import write_synthetic_fits
+
+pytest.importorskip("pyarrow")
+
+from fits2db.spool import Spool
+
+TABLES = [
+    {"name": "HOUSEKEEPING", "date_column": "timestamp"},
+    {
+        "name": "CALIBRATION",
+        "date_column": "timestamp",
+        "enums": [
+            {
+                "columns": ["nominal_cavity"],
+                "values": {"a": 1, "b": 2, "c": 3},
+                "default": 0,
+            }
+        ],
+    },
+    {"name": "MISSING", "date_column": "timestamp"},
+]
+
+
+def prepared(path, table):
+    data = FitsFile(path).get_table(table["name"]).data
+    data["FILE_META_ID"] = 0
+    data.columns = map(str.lower, data.columns)
+    return prepare_dataframe(data, table["date_column"], table.get("enums"))
+
+
+def test_write_and_replay(tmp_path):
+    path = write_synthetic_fits(tmp_path / "a.fits", n_rows=50, n_columns=6)
+    spool = Spool(tmp_path / "spool")
+    assert spool.open(path, TABLES) is None
+
+    fits_file = FitsFile(path)
+    spool.write(fits_file, TABLES)
+    file = spool.open(path, TABLES)
+    assert file.file_name == "a.fits"
+    assert file.mdate == fits_file.mdate
+    assert file.table_names == fits_file.table_names
+
+    for table in TABLES[:2]:
+        replayed = file.get_table(table["name"])
+        assert replayed.prepared
+        pd.testing.assert_frame_equal(
+            replayed.data, prepared(path, table).reset_index(drop=True)
+        )
+    meta = file.get_table("HOUSEKEEPING").meta
+    original = fits_file.get_table("HOUSEKEEPING").meta
+    assert (
+        meta["Value"].map(str).tolist() == original["Value"].map(str).tolist()
+    )
+    assert (
+        file.get_table("CALIBRATION").data["nominal_cavity"].dtype == "uint8"
+    )
+    assert file.table_header("HOUSEKEEPING")["NAXIS2"] == 50
+    with pytest.raises(KeyError):
+        file.get_table("MISSING")
+
+
+def test_iter_table(tmp_path):
+    path = write_synthetic_fits(tmp_path / "a.fits", n_rows=50, n_columns=6)
+    spool = Spool(tmp_path / "spool")
+    file = spool.write(FitsFile(path), TABLES)
+    chunks = list(file.iter_table("HOUSEKEEPING", 20))
+    assert [len(chunk.data) for chunk in chunks] == [20, 20, 10]
+    pd.testing.assert_frame_equal(
+        pd.concat([chunk.data for chunk in chunks], ignore_index=True),
+        file.get_table("HOUSEKEEPING").data,
+    )
+
+
+def test_outdated_entries(tmp_path):
+    path = write_synthetic_fits(tmp_path / "a.fits", n_rows=50, n_columns=6)
+    spool = Spool(tmp_path / "spool")
+    entry = spool.write(FitsFile(path), TABLES).entry
+    assert spool.open(path, TABLES[:1]) is None
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert spool.open(path, TABLES) is None
+    spool.write(FitsFile(path), TABLES)
+    assert not entry.exists()
+    assert len(list(entry.parent.iterdir())) == 1
+
+
+def test_faulty_date_column(tmp_path):
+    path = write_synthetic_fits(tmp_path / "a.fits", n_rows=50, n_columns=6)
+    tables = [{"name": "HOUSEKEEPING", "date_column": "mode"}]
+    file = Spool(tmp_path / "spool").write(FitsFile(path), tables)
+    with pytest.raises(ValueError):
+        file.get_table("HOUSEKEEPING")
@@ -0,0 +1,22 @@
+from astropy.io import fits
+
+from fits2db.fits import FitsFile
+from tests.benchmarks.synthetic import write_synthetic_fits
+
+
+def test_synthetic_fits_file(tmp_path):
+    path = write_synthetic_fits(
+        tmp_path / "synthetic.fits", n_rows=50, n_columns=12
+    )
+    with fits.open(path) as hdul:
+        assert hdul["HOUSEKEEPING"].data["HK_000"].dtype.byteorder == ">"
+
+    fits_file = FitsFile(path)
+    assert fits_file.table_names == [
+        "HOUSEKEEPING",
+        "CALIBRATION",
+        "IRRADIANCE",
+    ]
+    table = fits_file.get_table("HOUSEKEEPING")
+    assert table.data.shape == (50, 15)
+    assert table.data["HK_000"].dtype.byteorder in ("<", "=")